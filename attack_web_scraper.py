@@ -7,10 +7,9 @@ import re
 import requests
 from typing import Dict, Optional, List, Any
 
-
-def normalize_title(name: str) -> str:
-    """Normalisiert einen Attackennamen für die URL."""
-    return name.replace(" ", "_")
+import cache_files
+import name_index
+import negative_cache
 
 
 def normalize_title(title: str) -> str:
@@ -45,9 +44,11 @@ def fetch_attack_page_wikitext(attack_name: str, session: Optional[requests.Sess
             return wikitext_cleaned[0].strip()
 
         print(f"❌ Kein Wikitext für Attacke '{attack_name}' gefunden.")
+        negative_cache.remember_missing(negative_cache.KIND_ATTACK, attack_name, negative_cache.REASON_NO_WIKITEXT)
 
     except Exception as e:
         print(f"❌ Fehler beim Abrufen von Attacke '{attack_name}': {e}")
+        negative_cache.remember_missing(negative_cache.KIND_ATTACK, attack_name, negative_cache.reason_from_exception(e))
 
     return None
 
@@ -150,6 +151,12 @@ def build_attack_entry(attack_name: str) -> Optional[Dict]:
 
 def save_attack_to_cache(attack_name: str, data: Dict, filename: Optional[str] = None):
     """Speichert eine Attacke im JSON-Cache."""
+    save_attacks_to_cache({attack_name: data}, filename)
+    print(f"✅ '{attack_name}' wurde erfolgreich im Cache gespeichert.")
+
+
+def save_attacks_to_cache(entries: Dict[str, Dict], filename: Optional[str] = None):
+    """Speichert mehrere Attacken mit einem einzigen Schreibvorgang im JSON-Cache."""
     if filename is None:
         try:
             import global_infos  # type: ignore
@@ -169,16 +176,18 @@ def save_attack_to_cache(attack_name: str, data: Dict, filename: Optional[str] =
     else:
         cache = {}
 
-    cache[attack_name] = data
+    cache.update(entries)
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(cache, f, indent=4, ensure_ascii=False)
-    print(f"✅ '{attack_name}' wurde erfolgreich im Cache gespeichert.")
 
 
 def get_attack(attack_name: str, filename: Optional[str] = None) -> Optional[Dict]:
     """
     Holt eine Attacke aus dem Cache oder scrapt sie bei Bedarf.
     Dies ist die primäre Zugriffsfunktion für andere Skripte.
+    Attacken, die bereits als nicht auflösbar bekannt sind (negativer Cache),
+    werden nicht erneut gescrapt. Der Cache-Zugriff läuft über den kanonischen
+    Namen (siehe name_index), 'Giga Lichtblick' findet also auch 'Giga-Lichtblick'.
     """
     if filename is None:
         try:
@@ -189,19 +198,21 @@ def get_attack(attack_name: str, filename: Optional[str] = None) -> Optional[Dic
     if filename is None:
         filename = os.path.join(os.getcwd(), "attack_cache.json")
 
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                cache = json.load(f)
-            if attack_name in cache:
-                return cache[attack_name]
-        except (json.JSONDecodeError, IOError):
-            pass  # Cache ist korrupt oder leer, wird überschrieben
+    # Cache ist korrupt, leer oder fehlt -> wird beim Speichern überschrieben
+    cache = cache_files.load_json_cached(filename, {})
+    if isinstance(cache, dict):
+        entry = name_index.lookup(cache, attack_name, filename)
+        if entry is not None:
+            return entry
+
+    if negative_cache.is_known_missing(negative_cache.KIND_ATTACK, attack_name):
+        return None
 
     print(f"ℹ️ '{attack_name}' nicht im Cache gefunden. Starte Scraping...")
     entry = build_attack_entry(attack_name)
     if entry:
         save_attack_to_cache(attack_name, entry, filename)
+        negative_cache.forget_missing(negative_cache.KIND_ATTACK, attack_name)
     return entry
 
 
@@ -210,12 +221,15 @@ def parse_args():
     ap = argparse.ArgumentParser(description="Scrape genau EINE Attacke von Pokéwiki und speichere sie in einem JSON-Cache.")
     ap.add_argument("attack", help="Name der Attacke (z. B. 'Ränkeschmied' oder 'Mogelhieb').")
     ap.add_argument("--cache-file", help="Optionaler Pfad zur Ziel-JSON-Datei.")
+    ap.add_argument("--retry-missing", action="store_true",
+                    help="Auch Attacken erneut scrapen, die als nicht auflösbar bekannt sind.")
     return ap.parse_args()
 
 
 def main():
     """Hauptfunktion des Skripts."""
     args = parse_args()
+    negative_cache.retry_missing = args.retry_missing
     attack_name = args.attack.strip()
     if not attack_name:
         print("Bitte einen gültigen Attackennamen angeben.")
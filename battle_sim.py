@@ -0,0 +1,207 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import compiled_snapshot
+import damage_distribution
+import global_infos
+import main as counter_analysis
+import negative_cache
+import scoring
+from compiled_snapshot import INITIATIVE, KP
+from damage_distribution import OUTCOME_WEIGHTS
+
+SIM_ROLLOUTS = 2000
+# Nach so vielen Runden ohne K.O. zählt ein Rollout als Unentschieden
+SIM_MAX_TURNS = 50
+
+# Snapshot im Worker-Prozess (wird einmal pro Worker im Initializer gesetzt)
+_snapshot: Optional[Dict[str, Any]] = None
+
+
+def simulate_matchup(own: Sequence[float], opp: Sequence[float], rollouts: int, rng: np.random.Generator,
+                     max_turns: int = SIM_MAX_TURNS) -> Dict[str, float]:
+    """
+    Rundenbasiertes 1v1, vektorisiert über alle Rollouts.
+
+    Args:
+        own, opp: (KP, Initiative, Schaden der 32 Treffer-Ausgänge, Genauigkeit) der beiden Seiten,
+            alles auf Level (siehe damage_distribution.fight_distributions)
+        rollouts: Anzahl simulierter Kämpfe
+
+    Jede Runde greift der Schnellere zuerst an (Gleichstand: Münzwurf pro Rollout), jeder
+    Angriff trifft mit seiner Genauigkeit, der Schaden wird aus den 32 Ausgängen gezogen
+    (Wurf 85..100 %, Volltreffer; Gewichte damage_distribution.OUTCOME_WEIGHTS). Der Langsamere
+    greift nur an, wenn er noch steht.
+
+    Returns:
+        Dict mit win/loss/draw (Anteile aus Sicht von own) und turns (simulierte Runden gesamt)
+    """
+    own_hp, own_speed, own_damage, own_accuracy = own
+    opp_hp, opp_speed, opp_damage, opp_accuracy = opp
+    hp_own = np.full(rollouts, max(own_hp, 1.0))
+    hp_opp = np.full(rollouts, max(opp_hp, 1.0))
+    outcome = np.zeros(rollouts, dtype=np.int8)  # 1 Sieg, -1 Niederlage, 0 Unentschieden
+    own_damage, opp_damage = np.asarray(own_damage, dtype=float), np.asarray(opp_damage, dtype=float)
+    active = np.arange(rollouts) if (own_damage.any() or opp_damage.any()) else np.zeros(0, dtype=int)
+    turns = 0
+
+    for _ in range(max_turns):
+        n = len(active)
+        if n == 0:
+            break
+        turns += n
+        if own_speed == opp_speed:
+            own_first = rng.random(n) < 0.5
+        else:
+            own_first = np.full(n, own_speed > opp_speed)
+        hit_own = (rng.random(n) < own_accuracy) * own_damage[rng.choice(len(OUTCOME_WEIGHTS), n, p=OUTCOME_WEIGHTS)]
+        hit_opp = (rng.random(n) < opp_accuracy) * opp_damage[rng.choice(len(OUTCOME_WEIGHTS), n, p=OUTCOME_WEIGHTS)]
+
+        h_own, h_opp = hp_own[active], hp_opp[active]
+        h_opp = h_opp - np.where(own_first, hit_own, 0.0)
+        h_own = h_own - np.where(own_first, 0.0, hit_opp)
+        h_own = h_own - np.where(own_first & (h_opp > 0), hit_opp, 0.0)
+        h_opp = h_opp - np.where(~own_first & (h_own > 0), hit_own, 0.0)
+        hp_own[active], hp_opp[active] = h_own, h_opp
+
+        outcome[active[h_opp <= 0]] = 1
+        outcome[active[h_own <= 0]] = -1
+        active = active[(h_own > 0) & (h_opp > 0)]
+
+    return {"win": float((outcome == 1).mean()), "loss": float((outcome == -1).mean()),
+            "draw": float((outcome == 0).mean()), "turns": turns}
+
+
+def simulate_rows(snapshot: Dict[str, Any], fight: int, rows: Sequence[int], rollouts: int, seed: int,
+                  max_turns: int = SIM_MAX_TURNS,
+                  own_level: Optional[int] = None) -> List[Tuple[int, np.ndarray, np.ndarray, int]]:
+    """
+    Simuliert alle Paare (eigenes Pokémon aus rows x Gegner-Slot) mit Schaden, KP und Initiative
+    auf Level (eigene auf own_level, None = höchstes Gegner-Level). Beide Seiten nutzen die
+    Attacke aus damage_distribution (beste K.O.-Chance). Jedes Paar hat einen eigenen
+    Zufallsgenerator aus (seed, Zeile, Slot) -> gleiche Ergebnisse unabhängig von der Worker-Zahl.
+    """
+    if not len(rows):
+        return []
+    dist = damage_distribution.fight_distributions(snapshot, fight, own_level, rows)
+    out, inc = dist["outgoing"], dist["incoming"]
+    accuracy = snapshot["move_accuracy"]
+
+    def hit(side: Dict[str, Any], r: int, j: int) -> Tuple[np.ndarray, float]:
+        move = side["move"][r, j]
+        return side["damage"][r, j], float(accuracy[move]) if move >= 0 else 0.0
+
+    results = []
+    for r, i in enumerate(rows):
+        n_slots = out["move"].shape[1]
+        win, draw, turns = np.zeros(n_slots), np.zeros(n_slots), 0
+        for j in range(n_slots):
+            own = (float(inc["hp"][r]), float(dist["own_speed"][r])) + hit(out, r, j)
+            opp = (float(out["hp"][j]), float(dist["slot_speed"][j])) + hit(inc, r, j)
+            result = simulate_matchup(own, opp, rollouts, np.random.default_rng([seed, i, j]), max_turns)
+            win[j], draw[j] = result["win"], result["draw"]
+            turns += result["turns"]
+        results.append((i, win, draw, turns))
+    return results
+
+
+def _init_worker(handle: Dict[str, Any]):
+    global _snapshot
+    _snapshot = compiled_snapshot.attach(handle)
+
+
+def _run_rows(fight: int, rows: List[int], rollouts: int, seed: int, max_turns: int, own_level: Optional[int]):
+    return simulate_rows(_snapshot, fight, rows, rollouts, seed, max_turns, own_level)
+
+
+def win_probabilities(snapshot: Dict[str, Any], fight: int = 0, rollouts: int = SIM_ROLLOUTS, seed: int = 0,
+                      workers: int = 0, max_turns: int = SIM_MAX_TURNS,
+                      own_level: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Siegwahrscheinlichkeiten (eigene x Gegner-Slots) eines Kampfes aus dem Snapshot.
+    Mit workers > 1 werden die Paare auf einen ProcessPoolExecutor verteilt (Snapshot in
+    Shared Memory, siehe compiled_snapshot.shared_snapshot).
+
+    Returns:
+        Dict mit win, draw (Matrizen) und turns (simulierte Runden gesamt)
+    """
+    n_own = len(snapshot["owned_pokemon"])
+    n_slots = int(snapshot["fight_offsets"][fight + 1] - snapshot["fight_offsets"][fight])
+    rows = list(range(n_own))
+    if workers <= 1 or n_own < 2:
+        results = simulate_rows(snapshot, fight, rows, rollouts, seed, max_turns, own_level)
+    else:
+        chunks = [rows[i::workers * 2] for i in range(min(n_own, workers * 2))]
+        with compiled_snapshot.shared_snapshot(snapshot) as handle:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(handle,)) as pool:
+                results = [r for chunk in pool.map(_run_rows, [fight] * len(chunks), chunks, [rollouts] * len(chunks),
+                                                   [seed] * len(chunks), [max_turns] * len(chunks),
+                                                   [own_level] * len(chunks)) for r in chunk]
+
+    win, draw, turns = np.zeros((n_own, n_slots)), np.zeros((n_own, n_slots)), 0
+    for i, row_win, row_draw, row_turns in results:
+        win[i], draw[i] = row_win, row_draw
+        turns += row_turns
+    return {"win": win, "draw": draw, "turns": turns}
+
+
+def rule_survival(snapshot: Dict[str, Any], fight: int = 0) -> np.ndarray:
+    """Survival-Score der Counter-Analyse (scoring.survival_scores) auf den Rohschäden, zum Vergleich."""
+    matrices = compiled_snapshot.fight_matrices(snapshot, fight)
+    lo, hi = snapshot["fight_offsets"][fight], snapshot["fight_offsets"][fight + 1]
+    own = snapshot["stats"][snapshot["owned_pokemon"]]
+    opp = snapshot["stats"][snapshot["slot_pokemon"][lo:hi]]
+    # vmin=0, vmax=1: die "normalisierten" Werte sind die Rohschäden selbst
+    return scoring.survival_scores(matrices["raw_o2p"], matrices["raw_p2o"], own[:, KP], own[:, INITIATIVE],
+                                   opp[:, KP], opp[:, INITIATIVE], 0.0, 1.0)
+
+
+def print_report(snapshot: Dict[str, Any], result: Dict[str, Any], survival: np.ndarray, rollouts: int,
+                 seconds: float, top: int = 3):
+    names = snapshot["owned_names"]
+    print(f"\n=== Siegchancen im 1v1 ({rollouts} Rollouts pro Paar) ===")
+    for j, opp_name in enumerate(snapshot["fights"][0]["opponents"]):
+        print(f"\nGegner: {opp_name}")
+        for rank, i in enumerate(scoring.top_k(result["win"][:, j], top).tolist(), start=1):
+            print(f" {rank}. {names[i]} — Sieg: {result['win'][i, j]:.1%}, Unentschieden: {result['draw'][i, j]:.1%}, "
+                  f"Survival-Score (Regel): {survival[i, j]:.2f}")
+    duels = max(result["win"].size * rollouts, 1)
+    print(f"\n ~ {result['turns']:,} Runden in {seconds:.2f}s ({result['turns'] / max(seconds, 1e-9):,.0f} Runden/s, "
+          f"Ø {result['turns'] / duels:.2f} Runden pro Duell)")
+
+
+def run(rollouts: int = SIM_ROLLOUTS, seed: int = 0, workers: int = 0, max_turns: int = SIM_MAX_TURNS,
+        own_level: Optional[int] = None):
+    opponent_team, owned_list, fight_level = counter_analysis.prepare_fight()
+    fight = {"trainer_name": global_infos.opponent_trainer_name, "team": opponent_team}
+    with negative_cache.offline_mode():
+        snapshot = compiled_snapshot.build_snapshot(owned_list, [fight], global_infos.level_aware_moves)
+        start = time.perf_counter()
+        result = win_probabilities(snapshot, 0, rollouts, seed, workers, max_turns,
+                                   own_level or global_infos.own_pokemon_level)
+        seconds = time.perf_counter() - start
+        survival = rule_survival(snapshot)
+    print_report(snapshot, result, survival, rollouts, seconds)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Monte-Carlo-Simulation der 1v1-Duelle gegen das gegnerische Team.")
+    ap.add_argument("--rollouts", type=int, default=SIM_ROLLOUTS, help="Simulierte Kämpfe pro Paar.")
+    ap.add_argument("--seed", type=int, default=0, help="Startwert der Zufallsgeneratoren.")
+    ap.add_argument("--workers", type=int, default=0, help="Anzahl Prozesse (0/1 = seriell).")
+    ap.add_argument("--max-turns", type=int, default=SIM_MAX_TURNS, help="Runden bis zum Unentschieden.")
+    ap.add_argument("--level", type=int, help="Level der eigenen Pokémon (Standard: global_infos bzw. Kampf-Level).")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    run(args.rollouts, args.seed, args.workers, args.max_turns, args.level)
+
+
+if __name__ == "__main__":
+    main()
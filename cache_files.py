@@ -0,0 +1,55 @@
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# path -> (file_signature, geladene Daten)
+_loaded_files: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime in ns, Größe) einer Datei, None wenn sie fehlt."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_json_cached(path: str, default: Any = None) -> Any:
+    """
+    Lädt eine JSON-Datei und hält das Ergebnis im Speicher.
+    Die Datei wird erst dann erneut gelesen, wenn sich mtime oder Größe ändern
+    (z. B. weil ein Scraper einen neuen Eintrag gespeichert hat).
+
+    Achtung: Das zurückgegebene Objekt wird geteilt und darf nicht verändert werden.
+
+    Args:
+        path: Pfad zur JSON-Datei.
+        default: Rückgabewert, wenn die Datei fehlt oder kein gültiges JSON enthält.
+
+    Returns:
+        Die geladenen Daten oder default.
+    """
+    path = os.path.abspath(path)
+    signature = file_signature(path)
+    if signature is None:
+        _loaded_files.pop(path, None)
+        return default
+
+    cached = _loaded_files.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return default
+
+    _loaded_files[path] = (signature, data)
+    return data
+
+
+def forget(path: str):
+    """Entfernt eine Datei aus dem Speicher-Cache (z. B. nach einem Schreibvorgang)."""
+    _loaded_files.pop(os.path.abspath(path), None)
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import compiled_snapshot
+import fight_index
+import global_infos
+import incremental_analysis
+import negative_cache
+import prefetch
+import scoring
+
+# Wie viele Counter pro Gegner im Report landen
+CAMPAIGN_TOP = 3
+
+# Snapshot im Worker-Prozess (wird einmal pro Worker im Initializer gesetzt)
+_snapshot: Optional[Dict[str, Any]] = None
+
+
+def select_fights(location: Optional[str] = None, edition: Optional[str] = None, trainer: Optional[str] = None,
+                  starter: Optional[str] = None, all_starters: bool = False) -> List[Dict[str, Any]]:
+    """Alle Kämpfe aus fight_data.json, optional gefiltert (Teilstring, Groß-/Kleinschreibung egal)."""
+    starter = None if all_starters else (starter or global_infos.starter_pokemon)
+    filters = {"location": location, "edition": edition, "trainer_name": trainer}
+    fights = []
+    for fight in fight_index.get_fight_index().fights:
+        if not fight_index.matches_starter(fight, starter):
+            continue
+        if all(not text or fight_index.normalize_search_text(text) in fight_index.normalize_search_text(fight.get(field))
+               for field, text in filters.items()):
+            fights.append(fight)
+    return fights
+
+
+def warmup_campaign(fights: List[Dict[str, Any]], owned_list: List[str], workers: int = prefetch.PREFETCH_WORKERS):
+    """Ein gemeinsamer Warmup über alle Gegner aller Kämpfe."""
+    combined_team = [pkm for fight in fights for pkm in fight.get("team", [])]
+    return prefetch.warmup(combined_team, owned_list, None, workers)
+
+
+def fight_scores(snapshot: Dict[str, Any], fight: int, weights: List[float]) -> tuple:
+    """Schadensmatrizen (compiled_snapshot.fight_matrices) und Bewertung (scoring.score_matrices) eines Kampfes."""
+    matrices = compiled_snapshot.fight_matrices(snapshot, fight)
+    return matrices, scoring.score_matrices(matrices["raw_p2o"], matrices["raw_o2p"], matrices["utility"], weights)
+
+
+def analyse_fight(snapshot: Dict[str, Any], fight: int, weights: List[float], top: int = CAMPAIGN_TOP) -> Dict[str, Any]:
+    """Counter-Analyse eines Kampfes auf dem Snapshot; liefert ein kompaktes Ergebnis."""
+    info = snapshot["fights"][fight]
+    result = {"fight": fight, "counters": []}
+    if not info["opponents"] or not len(snapshot["owned_pokemon"]):
+        return result
+
+    matrices, scores = fight_scores(snapshot, fight, weights)
+    move_names = snapshot["move_names"]
+    for j, opp_name in enumerate(info["opponents"]):
+        ranked = scoring.top_k(scores["counter_score"][:, j], top).tolist()
+        result["counters"].append({
+            "opponent": opp_name,
+            "top": [{
+                "pokemon": snapshot["owned_names"][i],
+                "score": float(scores["counter_score"][i, j]),
+                "counter_raw": float(scores["counter_raw"][i, j]),
+                "move": move_names[matrices["best_p2o"][i, j]] if matrices["best_p2o"][i, j] >= 0 else None,
+                "incoming_move": move_names[matrices["best_o2p"][i, j]] if matrices["best_o2p"][i, j] >= 0 else None,
+            } for i in ranked],
+        })
+    return result
+
+
+def _init_worker(handle: Dict[str, Any]):
+    global _snapshot
+    # Zero-Copy: die Arrays liegen im Shared Memory des Elternprozesses
+    _snapshot = compiled_snapshot.attach(handle)
+
+
+def _run_chunk(fights: List[int], weights: List[float], top: int) -> List[Dict[str, Any]]:
+    return [analyse_fight(_snapshot, fight, weights, top) for fight in fights]
+
+
+def run_campaign(snapshot: Dict[str, Any], weights: List[float], workers: int = 0,
+                 top: int = CAMPAIGN_TOP) -> List[Dict[str, Any]]:
+    """
+    Analysiert alle Kämpfe des Snapshots. Mit workers > 1 in einem ProcessPoolExecutor;
+    die Arrays des Snapshots liegen dabei in Shared Memory, die Worker hängen sich nur
+    ein (kein Kopieren, kein erneutes Laden der Caches).
+    """
+    fights = list(range(len(snapshot["fights"])))
+    if workers <= 1 or len(fights) < 2:
+        return [analyse_fight(snapshot, fight, weights, top) for fight in fights]
+
+    chunk_size = max(1, -(-len(fights) // (workers * 4)))
+    chunks = [fights[i:i + chunk_size] for i in range(0, len(fights), chunk_size)]
+    with compiled_snapshot.shared_snapshot(snapshot) as handle:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(handle,)) as pool:
+            results = pool.map(_run_chunk, chunks, [weights] * len(chunks), [top] * len(chunks))
+            return [result for chunk in results for result in chunk]
+
+
+def summarize(snapshot: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Konsolidiert die Ergebnisse:
+    - wie oft jedes eigene Pokémon Top-Counter (Platz 1) bzw. in der Top-Liste ist
+    - die schwersten Kämpfe (niedrigster mittlerer Counter-Rohwert des jeweils besten Counters)
+    """
+    owned = snapshot["owned_names"]
+    first = dict.fromkeys(owned, 0)
+    listed = dict.fromkeys(owned, 0)
+    difficulty = []
+    for result in results:
+        best_raw = []
+        for counter in result["counters"]:
+            if not counter["top"]:
+                continue
+            first[counter["top"][0]["pokemon"]] += 1
+            for entry in counter["top"]:
+                listed[entry["pokemon"]] += 1
+            best_raw.append(counter["top"][0]["counter_raw"])
+        if best_raw:
+            difficulty.append((float(np.mean(best_raw)), result["fight"]))
+    difficulty.sort()
+    return {
+        "top_counter": sorted(first.items(), key=lambda x: x[1], reverse=True),
+        "in_top_list": sorted(listed.items(), key=lambda x: x[1], reverse=True),
+        "hardest_fights": [fight for _, fight in difficulty],
+    }
+
+
+def print_report(snapshot: Dict[str, Any], results: List[Dict[str, Any]], seconds: float, workers: int,
+                 hardest: int = 10):
+    fights = snapshot["fights"]
+    print(f"\n=== Kampagne: {len(results)} Kämpfe, {len(snapshot['owned_names'])} eigene Pokémon, "
+          f"{max(workers, 1)} Worker, {seconds:.2f}s ===")
+    for result in results:
+        info = fights[result["fight"]]
+        if not result["counters"]:
+            continue
+        print(f"\n{info['trainer_name']} ({info['location']}, Lv. {info['level']})")
+        for counter in result["counters"]:
+            tops = ", ".join(f"{e['pokemon']} {e['score']:.1f}" for e in counter["top"])
+            print(f"   | {counter['opponent']}: {tops}")
+
+    summary = summarize(snapshot, results)
+    print("\n=== Meiste Top-Counter-Platzierungen ===")
+    for name, count in summary["top_counter"]:
+        if count:
+            print(f" {count:4d}x  {name}")
+    print(f"\n=== Schwerste Kämpfe (Top {hardest}) ===")
+    for fight in summary["hardest_fights"][:hardest]:
+        info = fights[fight]
+        print(f" - {info['trainer_name']} ({info['location']}, Lv. {info['level']})")
+
+
+def write_json(path: str, snapshot: Dict[str, Any], results: List[Dict[str, Any]]):
+    report = [{**snapshot["fights"][r["fight"]], "counters": r["counters"]} for r in results]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Counter-Analyse für alle Kämpfe aus fight_data.json (parallel).")
+    ap.add_argument("--location", help="Nur Kämpfe, deren Ort diesen Text enthält.")
+    ap.add_argument("--edition", help="Nur Kämpfe dieser Edition (z. B. SWSH).")
+    ap.add_argument("--trainer", help="Nur Kämpfe, deren Trainername diesen Text enthält.")
+    ap.add_argument("--all-starters", action="store_true", help="Alle Starter-Varianten statt nur global_infos.starter_pokemon.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl Prozesse (1 = seriell).")
+    ap.add_argument("--top", type=int, default=CAMPAIGN_TOP, help="Counter pro Gegner.")
+    ap.add_argument("--json", help="Konsolidierten Report zusätzlich als JSON schreiben.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    fights = select_fights(args.location, args.edition, args.trainer, all_starters=args.all_starters)
+    owned_list = global_infos.owned_pokemon_list
+    print(f" ~ {len(fights)} Kämpfe ausgewählt")
+
+    prefetch.print_warmup_report(warmup_campaign(fights, owned_list))
+
+    with negative_cache.offline_mode():
+        start = time.perf_counter()
+        snapshot = compiled_snapshot.build_snapshot(owned_list, fights, global_infos.level_aware_moves)
+        print(f" ~ Snapshot kompiliert ({time.perf_counter() - start:.2f}s)")
+
+        start = time.perf_counter()
+        results = run_campaign(snapshot, incremental_analysis.get_weights(), args.workers, args.top)
+        seconds = time.perf_counter() - start
+
+    print_report(snapshot, results, seconds, args.workers)
+    if args.json:
+        write_json(args.json, snapshot, results)
+        print(f"\nReport gespeichert: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
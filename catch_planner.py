@@ -0,0 +1,267 @@
+import argparse
+import html
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import cache_files
+import campaign
+import compiled_snapshot
+import fight_index
+import global_infos
+import incremental_analysis
+import info_manager
+import learnset_index
+import negative_cache
+import prefetch
+
+# Wie viele Fang-Kandidaten insgesamt bzw. pro Gegner im Report landen
+CATCH_TOP = 10
+CATCH_TOP_PER_OPP = 3
+
+# Höchste Fangrate im Spiel; 0 bedeutet "unbekannt" (extract_fangrate)
+MAX_CATCH_RATE = 255
+
+METHOD_WILD = "Wild"
+METHOD_RAID = "Dyna-Raid"
+
+# Einträge in "Fundorte", die kein Ort sind (Vergleich normalisiert; Events per Präfix)
+NON_LOCATIONS = {"tausch", "entwicklung", "pokémon home", "dyna-raids", "neuigkeiten aus der naturzone"}
+NON_LOCATION_PREFIXES = ("events/",)
+
+_BREAK_PATTERN = re.compile(r"<br\s*/?\s*>", re.IGNORECASE)
+_RAID_PATTERN = re.compile(r"Dyna-Raids.*?\(([^:()]+):")
+
+_index: Optional[Dict[str, Any]] = None
+_index_cache: Optional[Dict[str, Any]] = None
+
+
+def _clean_location(text: str) -> str:
+    """Entfernt Wikitext-Reste: Link-Klammern, Link-Ziel nach "|", alles ab dem ersten Tag."""
+    text = text.split("<")[0].replace("[[", "").replace("]]", "").split("|")[0]
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def parse_locations(raw: str) -> List[tuple]:
+    """
+    Zerlegt einen Eintrag aus "Fundorte" in (Ort, Methode). extract_sword_locations liefert
+    noch Wikitext-Reste, z. B. "[[Route 1" oder "Wonnewiesen&lt;br />Dyna-Raids &lt;small>(Brückental: [[…";
+    Dyna-Raids werden dem Ort in Klammern zugeordnet.
+    """
+    result = []
+    for part in _BREAK_PATTERN.split(html.unescape(raw or "")):
+        raid = _RAID_PATTERN.search(part)
+        if raid:
+            name, method = _clean_location(raid.group(1)), METHOD_RAID
+        else:
+            name, method = _clean_location(part), METHOD_WILD
+        key = fight_index.normalize_search_text(name)
+        if key and key not in NON_LOCATIONS and not key.startswith(NON_LOCATION_PREFIXES):
+            result.append((name, method))
+    return result
+
+
+def build_location_index(pokemon_cache: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Invertierter Index Ort -> fangbare Pokémon über alle Pokémon im Cache.
+
+    Returns:
+        Dict mit
+        - "locations":   normalisierter Ort -> {"name": Anzeigename, "pokemon": {Name: [Methoden]}}
+        - "catch_rates": Name -> Fangrate (0 = unbekannt)
+    """
+    locations: Dict[str, Dict[str, Any]] = {}
+    catch_rates: Dict[str, int] = {}
+    for name, data in pokemon_cache.items():
+        if not data:
+            continue
+        catch_rates[name] = int(data.get("Fangrate") or 0)
+        for raw in data.get("Fundorte") or []:
+            for location, method in parse_locations(raw):
+                entry = locations.setdefault(fight_index.normalize_search_text(location),
+                                             {"name": location, "pokemon": {}})
+                methods = entry["pokemon"].setdefault(name, [])
+                if method not in methods:
+                    methods.append(method)
+    return {"locations": locations, "catch_rates": catch_rates}
+
+
+def get_location_index() -> Dict[str, Any]:
+    """Der Index zum aktuellen Pokémon-Cache (neu gebaut, sobald sich die Datei ändert)."""
+    global _index, _index_cache
+    cache = cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {}) or {}
+    if _index is None or cache is not _index_cache:
+        _index = build_location_index(cache)
+        _index_cache = cache
+    return _index
+
+
+def catchable_pool(locations: Optional[List[str]] = None, raids: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Alle Pokémon, die an den erreichbaren Orten fangbar sind.
+
+    Args:
+        locations: Orte; ein exakter Name (z. B. "Route 1") trifft nur diesen Ort, sonst
+            zählt jeder Ort, der den Text enthält (None = alle bekannten Orte)
+        raids: Dyna-Raids mitzählen
+
+    Returns:
+        Name -> {"locations": [(Ort, Methode)], "catch_rate": Fangrate}
+    """
+    index = get_location_index()
+    keys = []
+    for text in locations or []:
+        text = fight_index.normalize_search_text(text)
+        keys.extend([text] if text in index["locations"] else [k for k in index["locations"] if text in k])
+    pool: Dict[str, Dict[str, Any]] = {}
+    for key in dict.fromkeys(keys) if locations else index["locations"]:
+        entry = index["locations"][key]
+        for name, methods in entry["pokemon"].items():
+            methods = [m for m in methods if raids or m != METHOD_RAID]
+            if not methods:
+                continue
+            info = pool.setdefault(name, {"locations": [], "catch_rate": index["catch_rates"].get(name, 0)})
+            info["locations"].extend((entry["name"], method) for method in methods)
+    return pool
+
+
+def catch_factor(catch_rates: np.ndarray, weight: float) -> np.ndarray:
+    """
+    Gewichtung nach Fangrate: (1 - weight) + weight * Fangrate / 255. Unbekannte Fangraten (0)
+    zählen wie die seltenste bekannte (3).
+    """
+    rates = np.where(catch_rates > 0, catch_rates, 3) / MAX_CATCH_RATE
+    return (1.0 - weight) + weight * rates
+
+
+def plan_catches(fight: Dict[str, Any], pool: Dict[str, Dict[str, Any]], owned_list: List[str],
+                 weights: List[float], catch_weight: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Bewertet alle fangbaren Pokémon gegen das Team eines Kampfes. Pool und eigene Pokémon
+    landen zusammen in einem kompilierten Snapshot, die Schadensmatrizen laufen für den
+    ganzen Pool auf einmal durch den vektorisierten Kernel; die Counter-Scores sind damit
+    über beide Gruppen vergleichbar.
+
+    Returns:
+        Dict mit
+        - "opponents":   Gegner-Namen
+        - "candidates":  nach "value" sortiert, je {"pokemon", "catch_rate", "locations", "value",
+                         "mean_score", "beats_owned", "scores", "moves"}
+        - "owned_best":  bester eigener Counter-Score pro Gegner
+        - "seconds":     Dauer von Snapshot + Bewertung
+    """
+    catch_weight = global_infos.catch_w_rate if catch_weight is None else catch_weight
+    start = time.perf_counter()
+    owned = [name for name in owned_list if info_manager.get_pokemon_in_cache(name)]
+    owned_set = set(owned)
+    catchable = [name for name in pool if name not in owned_set and info_manager.get_pokemon_in_cache(name)]
+    snapshot = compiled_snapshot.build_snapshot(owned + catchable, [fight], global_infos.level_aware_moves)
+    opponents = snapshot["fights"][0]["opponents"]
+    result = {"opponents": opponents, "candidates": [], "owned_best": np.zeros(len(opponents)), "seconds": 0.0}
+    if not opponents or not catchable:
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    matrices, scores = campaign.fight_scores(snapshot, 0, weights)
+    counter_score = scores["counter_score"]
+    n_owned = len(snapshot["owned_names"]) - len(catchable)
+    owned_best = counter_score[:n_owned].max(axis=0) if n_owned else np.zeros(len(opponents))
+
+    pool_scores = counter_score[n_owned:]
+    catch_rates = np.array([pool[name]["catch_rate"] for name in snapshot["owned_names"][n_owned:]], dtype=float)
+    mean_score = pool_scores.mean(axis=1)
+    value = mean_score * catch_factor(catch_rates, catch_weight)
+    beats_owned = (pool_scores > owned_best).sum(axis=1)
+
+    move_names = snapshot["move_names"]
+    for i in np.lexsort((-mean_score, -value)):
+        name = snapshot["owned_names"][n_owned + i]
+        result["candidates"].append({
+            "pokemon": name,
+            "catch_rate": pool[name]["catch_rate"],
+            "locations": pool[name]["locations"],
+            "value": float(value[i]),
+            "mean_score": float(mean_score[i]),
+            "beats_owned": int(beats_owned[i]),
+            "scores": pool_scores[i].tolist(),
+            "moves": [move_names[m] if m >= 0 else None for m in matrices["best_p2o"][n_owned + i]],
+        })
+    result["owned_best"] = owned_best
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def print_report(fight: Dict[str, Any], plan: Dict[str, Any], top: int = CATCH_TOP,
+                 top_per_opp: int = CATCH_TOP_PER_OPP):
+    candidates = plan["candidates"]
+    print(f"\n=== Fang-Planer: {fight.get('trainer_name')} ({fight.get('location')}), "
+          f"{len(candidates)} fangbare Pokémon in {plan['seconds'] * 1000:.1f} ms bewertet ===")
+    if not candidates:
+        print(" - keine fangbaren Pokémon an den gewählten Orten")
+        return
+
+    print(f"\nTop {top} (Ø Counter-Score x Fangrate):")
+    for rank, entry in enumerate(candidates[:top], start=1):
+        places = ", ".join(dict.fromkeys(f"{loc} ({method})" if method != METHOD_WILD else loc
+                                         for loc, method in entry["locations"]))
+        rate = entry["catch_rate"] or "?"
+        print(f" {rank:2d}. {entry['pokemon']:<14} Wert {entry['value']:6.2f}  Ø {entry['mean_score']:6.2f}  "
+              f"Fangrate {rate:>3}  besser als eigene: {entry['beats_owned']}/{len(plan['opponents'])}  — {places}")
+
+    for j, opp_name in enumerate(plan["opponents"]):
+        ranked = sorted(candidates, key=lambda e: e["scores"][j], reverse=True)[:top_per_opp]
+        tops = ", ".join(f"{e['pokemon']} {e['scores'][j]:.1f} ({e['moves'][j] or '-'})" for e in ranked)
+        print(f"\nGegner: {opp_name} (bester eigener Counter: {plan['owned_best'][j]:.1f})")
+        print(f"   | {tops}")
+
+
+def select_fight(trainer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Der erste Kampf zum (Teil-)Namen, Standard: global_infos.opponent_trainer_name."""
+    fights = campaign.select_fights(trainer=trainer or global_infos.opponent_trainer_name)
+    return fights[0] if fights else None
+
+
+def run(trainer: Optional[str] = None, locations: Optional[List[str]] = None, raids: bool = True,
+        top: int = CATCH_TOP, catch_weight: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    fight = select_fight(trainer)
+    if fight is None:
+        print(f"Kein Kampf gefunden: {trainer or global_infos.opponent_trainer_name}")
+        return None
+    pool = catchable_pool(locations, raids)
+    owned_list = global_infos.owned_pokemon_list
+    print(f" ~ {len(pool)} fangbare Pokémon an {len(locations) if locations else 'allen'} Orten")
+
+    fight_level = learnset_index.get_fight_level(fight.get("team", [])) if global_infos.level_aware_moves else None
+    prefetch.print_warmup_report(prefetch.warmup(fight.get("team", []), owned_list + list(pool), fight_level))
+
+    with negative_cache.offline_mode():
+        plan = plan_catches(fight, pool, owned_list, incremental_analysis.get_weights(), catch_weight)
+    print_report(fight, plan, top)
+    return plan
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Welche fangbaren Pokémon countern den nächsten Kampf?")
+    ap.add_argument("--trainer", help="Trainername (Teilstring), Standard: global_infos.opponent_trainer_name.")
+    ap.add_argument("--locations", nargs="*", help="Erreichbare Orte (Teilstrings), Standard: alle bekannten Orte.")
+    ap.add_argument("--no-raids", action="store_true", help="Dyna-Raids nicht mitzählen.")
+    ap.add_argument("--top", type=int, default=CATCH_TOP, help="Anzahl Kandidaten im Report.")
+    ap.add_argument("--catch-weight", type=float, default=global_infos.catch_w_rate,
+                    help="Einfluss der Fangrate (0 = keiner, 1 = voll).")
+    ap.add_argument("--list-locations", action="store_true", help="Alle bekannten Orte mit Anzahl Pokémon ausgeben.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list_locations:
+        for entry in sorted(get_location_index()["locations"].values(), key=lambda e: e["name"]):
+            print(f" {len(entry['pokemon']):3d}  {entry['name']}")
+        return
+    run(args.trainer, args.locations, not args.no_raids, args.top, args.catch_weight)
+
+
+if __name__ == "__main__":
+    main()
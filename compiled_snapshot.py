@@ -0,0 +1,333 @@
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import feature_store
+import global_infos
+import info_manager
+import learnset_index
+import move_table
+import name_index
+import type_effectiveness
+
+# Spalten der Statuswert-Matrix und ihre Standardwerte (wie in damage_calc:
+# Angriffswerte fehlen -> 0, Verteidigung/KP fehlen -> 1)
+STAT_NAMES = ("KP", "Angriff", "Verteidigung", "SpAngriff", "SpVerteidigung", "Initiative")
+STAT_DEFAULTS = (1.0, 0.0, 1.0, 0.0, 1.0, 0.0)
+KP, ANGRIFF, VERTEIDIGUNG, SP_ANGRIFF, SP_VERTEIDIGUNG, INITIATIVE = range(len(STAT_NAMES))
+
+# Werte von move_spread: Ziele einer Attacke im Doppelkampf
+SINGLE_TARGET, SPREAD_FOES, SPREAD_ALL = range(3)
+
+# Die numerischen Arrays eines Snapshots (alles andere sind kleine Python-Listen)
+ARRAY_FIELDS = (
+    "stats", "type_ids", "effectiveness",
+    "move_offsets", "move_power", "move_type", "move_accuracy", "move_special", "move_spread", "moveset_owner",
+    "owned_pokemon", "owned_moveset", "owned_utility",
+    "fight_offsets", "fight_band", "slot_pokemon", "slot_moveset", "slot_level",
+)
+
+
+class _Builder:
+    """Sammelt Pokémon, Typen und Movesets und vergibt dabei fortlaufende IDs."""
+
+    def __init__(self):
+        self.pokemon_names: List[str] = []
+        self.pokemon_data: List[Dict[str, Any]] = []
+        self._pokemon_ids: Dict[str, int] = {}
+        self.type_names: List[str] = list(global_infos.pokemon_types)
+        self._type_ids: Dict[str, int] = {t: i for i, t in enumerate(self.type_names)}
+        self.movesets: List[Tuple[int, List[move_table.CompiledMove]]] = []
+        self._moveset_ids: Dict[Any, int] = {}
+
+    def pokemon(self, name: str) -> int:
+        if name not in self._pokemon_ids:
+            self._pokemon_ids[name] = len(self.pokemon_names)
+            self.pokemon_names.append(name)
+            self.pokemon_data.append(info_manager.get_pokemon_in_cache(name))
+        return self._pokemon_ids[name]
+
+    def type_id(self, type_name: Optional[str]) -> int:
+        """ID eines Typs; Typen außerhalb von global_infos.pokemon_types bekommen eigene IDs."""
+        if type_name not in self._type_ids:
+            self._type_ids[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+        return self._type_ids[type_name]
+
+    def moveset(self, owner: int, key: Any, attack_lists: List[List[Any]]) -> int:
+        """Kompiliert ein Moveset einmal pro (Angreifer, key) und liefert seine ID."""
+        key = (owner, key)
+        if key not in self._moveset_ids:
+            compiled = move_table.compile_moveset(self.pokemon_data[owner], attack_lists)
+            self._moveset_ids[key] = len(self.movesets)
+            self.movesets.append((owner, compiled))
+        return self._moveset_ids[key]
+
+
+def build_snapshot(owned_list: List[str], fights: Sequence[Dict[str, Any]],
+                   level_aware: bool = False, chosen_movesets: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Kompiliert alles, was die Counter-Analyse für viele Kämpfe braucht, in kompakte Arrays.
+    Alle Pokémon und Attacken müssen bereits im Cache liegen (siehe prefetch.warmup).
+
+    Args:
+        owned_list: eigene Pokémon
+        fights: Kämpfe aus fight_data.json
+        level_aware: eigene Movesets pro Kampf auf das Level-Band begrenzen
+        chosen_movesets: nur die gespeicherten Movesets (None = global_infos.use_chosen_movesets)
+
+    Returns:
+        Dict mit den Arrays aus ARRAY_FIELDS sowie
+        pokemon_names, type_names, move_names, owned_names, band_levels, fights.
+    """
+    builder = _Builder()
+    owned_list = [name for name in owned_list if info_manager.get_pokemon_in_cache(name)]
+    owned_ids = [builder.pokemon(name) for name in owned_list]
+
+    # --- Kämpfe: ein Slot pro Gegner-Pokémon, Movesets dedupliziert ---
+    fight_offsets, fight_band, slot_pokemon, slot_moveset, slot_level, fight_infos = [0], [], [], [], [], []
+    band_levels: List[Optional[int]] = []
+    for fight in fights:
+        team = []
+        for pkm in fight.get("team", []):
+            name = info_manager.get_name_from_id(pkm["id"])
+            if name and info_manager.get_pokemon_in_cache(name):
+                team.append((name, pkm))
+        level = learnset_index.get_fight_level(fight.get("team", [])) if level_aware else None
+        if level not in band_levels:
+            band_levels.append(level)
+        fight_band.append(band_levels.index(level))
+
+        for name, pkm in team:
+            owner = builder.pokemon(name)
+            moves = tuple(pkm.get("moves", []))
+            attack_list = [[info_manager.get_attack_in_cache(move) for move in moves]]
+            slot_pokemon.append(owner)
+            slot_moveset.append(builder.moveset(owner, moves, attack_list))
+            slot_level.append(pkm.get("level") or 0)
+        fight_offsets.append(len(slot_pokemon))
+        fight_infos.append({
+            "trainer_name": fight.get("trainer_name"),
+            "location": fight.get("location"),
+            "edition": fight.get("edition"),
+            "variant": fight.get("variant"),
+            "level": max((p.get("level") or 0 for p in fight.get("team", [])), default=0),
+            "opponents": [name for name, _ in team],
+        })
+
+    # --- eigene Movesets und Utility pro Level-Band ---
+    owned_moveset = np.zeros((len(band_levels), len(owned_ids)), dtype=np.int32)
+    owned_utility = np.zeros((len(band_levels), len(owned_ids)))
+    for band, level in enumerate(band_levels):
+        for i, (name, owner) in enumerate(zip(owned_list, owned_ids)):
+            moves_list = info_manager.get_own_attacks_as_list(name, level, chosen_movesets)
+            owned_moveset[band, i] = builder.moveset(owner, ("owned", level), moves_list)
+            owned_utility[band, i] = feature_store.get_features(name, level, chosen_movesets)["utility"]
+
+    # --- Statuswerte und Typen ---
+    stats = np.array([[float((data.get("Statuswerte") or {}).get(stat, default))
+                       for stat, default in zip(STAT_NAMES, STAT_DEFAULTS)]
+                      for data in builder.pokemon_data]).reshape(len(builder.pokemon_data), len(STAT_NAMES))
+    type_ids = np.full((len(builder.pokemon_data), 2), -1, dtype=np.int32)
+    for p, data in enumerate(builder.pokemon_data):
+        for slot, type_name in enumerate((data.get("Typen") or [])[:2]):
+            type_ids[p, slot] = builder.type_id(type_name)
+
+    # --- Movesets als CSR-Arrays ---
+    move_offsets, move_power, move_type, move_accuracy, move_special, move_names, moveset_owner = [0], [], [], [], [], [], []
+    for owner, compiled in builder.movesets:
+        for name, power, m_type, accuracy, is_special in compiled:
+            move_names.append(name)
+            move_power.append(float(power))
+            # kein Typ -> eigene ID, die nie STAB bekommt und immer Effektivität 1.0 hat
+            move_type.append(builder.type_id(m_type) if m_type else -1)
+            move_accuracy.append(accuracy)
+            move_special.append(is_special)
+        move_offsets.append(len(move_names))
+        moveset_owner.append(owner)
+    no_type = len(builder.type_names)
+    move_type = [no_type if t == -1 else t for t in move_type]
+    move_spread = [SPREAD_ALL if name_index.hits_ally(name) else SPREAD_FOES if name_index.is_spread_move(name)
+                   else SINGLE_TARGET for name in move_names]
+
+    # --- Effektivität (Typ x Verteidiger), berechnet wie in damage_calc ---
+    effectiveness = np.ones((no_type + 1, len(builder.pokemon_data)))
+    for t, type_name in enumerate(builder.type_names):
+        for p, data in enumerate(builder.pokemon_data):
+            try:
+                effectiveness[t, p] = type_effectiveness.get_effectiveness(type_name, data.get("Typen"))
+            except Exception:
+                effectiveness[t, p] = 1.0
+
+    return {
+        "stats": stats,
+        "type_ids": type_ids,
+        "effectiveness": effectiveness,
+        "move_offsets": np.array(move_offsets, dtype=np.int64),
+        "move_power": np.array(move_power, dtype=float),
+        "move_type": np.array(move_type, dtype=np.int32),
+        "move_accuracy": np.array(move_accuracy, dtype=float),
+        "move_special": np.array(move_special, dtype=bool),
+        "move_spread": np.array(move_spread, dtype=np.int8),
+        "moveset_owner": np.array(moveset_owner, dtype=np.int32),
+        "owned_pokemon": np.array(owned_ids, dtype=np.int32),
+        "owned_moveset": owned_moveset,
+        "owned_utility": owned_utility,
+        "fight_offsets": np.array(fight_offsets, dtype=np.int64),
+        "fight_band": np.array(fight_band, dtype=np.int32),
+        "slot_pokemon": np.array(slot_pokemon, dtype=np.int32),
+        "slot_moveset": np.array(slot_moveset, dtype=np.int32),
+        "slot_level": np.array(slot_level, dtype=np.int32),
+        "pokemon_names": builder.pokemon_names,
+        "type_names": builder.type_names,
+        "move_names": move_names,
+        "owned_names": owned_list,
+        "band_levels": band_levels,
+        "fights": fight_infos,
+    }
+
+
+# Im Worker geöffnete Shared-Memory-Blöcke (müssen offen bleiben, solange die Views leben)
+_attached_blocks: List[shared_memory.SharedMemory] = []
+
+
+def to_shared(snapshot: Dict[str, Any]) -> Tuple[Dict[str, Any], List[shared_memory.SharedMemory]]:
+    """
+    Legt alle Arrays aus ARRAY_FIELDS in multiprocessing.shared_memory-Blöcke.
+
+    Returns:
+        (handle, blocks): handle ist klein und picklebar (Blocknamen, Shapes, Dtypes plus
+        die Python-Metadaten) und wird an die Worker gegeben; blocks gehören dem
+        Elternprozess und werden mit release() freigegeben.
+    """
+    handle = {key: value for key, value in snapshot.items() if key not in ARRAY_FIELDS}
+    handle["arrays"] = {}
+    blocks = []
+    try:
+        for field in ARRAY_FIELDS:
+            array = np.ascontiguousarray(snapshot[field])
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            handle["arrays"][field] = (block.name, array.shape, array.dtype.str)
+    except Exception:
+        release(blocks)
+        raise
+    return handle, blocks
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    try:
+        # ab Python 3.13: Worker sollen den Block nicht beim resource_tracker anmelden
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach(handle: Dict[str, Any]) -> Dict[str, Any]:
+    """Baut im Worker einen Snapshot aus schreibgeschützten Zero-Copy-Views auf die Blöcke."""
+    snapshot = {key: value for key, value in handle.items() if key != "arrays"}
+    for field, (name, shape, dtype) in handle["arrays"].items():
+        block = _open_block(name)
+        _attached_blocks.append(block)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        snapshot[field] = view
+    return snapshot
+
+
+def release(blocks: List[shared_memory.SharedMemory]):
+    """Gibt die Blöcke des Elternprozesses frei."""
+    for block in blocks:
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def shared_snapshot(snapshot: Dict[str, Any]):
+    """Snapshot für die Dauer des Blocks in Shared Memory; liefert das Handle für attach()."""
+    handle, blocks = to_shared(snapshot)
+    try:
+        yield handle
+    finally:
+        release(blocks)
+
+
+def damage_table(snapshot: Dict[str, Any], moveset: int, defenders: np.ndarray) -> np.ndarray:
+    """Erwarteter Schaden jeder Attacke eines Movesets gegen jeden Verteidiger (Attacken x Verteidiger)."""
+    return damage_against(snapshot, moveset, snapshot["stats"][defenders][:, [VERTEIDIGUNG, SP_VERTEIDIGUNG]],
+                          snapshot["effectiveness"][:, defenders])
+
+
+def damage_against(snapshot: Dict[str, Any], moveset: int, defense: np.ndarray, effectiveness: np.ndarray) -> np.ndarray:
+    """
+    Wie damage_table, nur gegen beliebige Ziele, die nicht im Snapshot stehen müssen
+    (z. B. Typ-Kombinationen): defense (Ziele x [Verteidigung, SpVerteidigung]) und
+    effectiveness (Typen des Snapshots x Ziele).
+    """
+    lo, hi = snapshot["move_offsets"][moveset], snapshot["move_offsets"][moveset + 1]
+    stats = snapshot["stats"]
+    attacker = snapshot["moveset_owner"][moveset]
+    power = snapshot["move_power"][lo:hi, None]
+    move_type = snapshot["move_type"][lo:hi]
+    accuracy = snapshot["move_accuracy"][lo:hi, None]
+    special = snapshot["move_special"][lo:hi, None]
+
+    attack_stat = np.where(special, stats[attacker, SP_ANGRIFF], stats[attacker, ANGRIFF])
+    defense_stat = np.maximum(np.where(special, defense[:, 1][None, :], defense[:, 0][None, :]), 1.0)
+    eff = effectiveness[move_type]
+    stab_bonus = np.where((move_type[:, None] == snapshot["type_ids"][attacker][None, :]).any(axis=1), 1.5, 1.0)[:, None]
+
+    # gleiche Operationsreihenfolge wie damage_calc -> bitgleiche Werte
+    raw_damage = power * (attack_stat / defense_stat) * eff * stab_bonus
+    return raw_damage * accuracy
+
+
+def best_damage(snapshot: Dict[str, Any], moveset: int, defenders: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vektorisierte Variante von damage_calc.compute_best_damage_compiled:
+    bester erwarteter Schaden eines Movesets gegen mehrere Verteidiger.
+
+    Returns:
+        (bester Schaden pro Verteidiger, globaler Index der besten Attacke oder -1)
+    """
+    lo, hi = snapshot["move_offsets"][moveset], snapshot["move_offsets"][moveset + 1]
+    if hi == lo or len(defenders) == 0:
+        return np.zeros(len(defenders)), np.full(len(defenders), -1)
+
+    expected_damage = damage_table(snapshot, moveset, defenders)
+
+    # argmax liefert den ersten Treffer -> bei Gleichstand gewinnt die erste Attacke
+    best_move = expected_damage.argmax(axis=0)
+    best = expected_damage[best_move, np.arange(len(defenders))]
+    has_move = best > 0.0
+    return np.where(has_move, best, 0.0), np.where(has_move, best_move + lo, -1)
+
+
+def fight_matrices(snapshot: Dict[str, Any], fight: int) -> Dict[str, np.ndarray]:
+    """
+    Schadensmatrizen eines Kampfes (eigene x Gegner-Slots) in beide Richtungen,
+    inklusive der Indizes der besten Attacken.
+    """
+    lo, hi = snapshot["fight_offsets"][fight], snapshot["fight_offsets"][fight + 1]
+    band = snapshot["fight_band"][fight]
+    slots = snapshot["slot_pokemon"][lo:hi]
+    owned = snapshot["owned_pokemon"]
+
+    raw_p2o = np.zeros((len(owned), hi - lo))
+    best_p2o = np.full((len(owned), hi - lo), -1)
+    for i in range(len(owned)):
+        raw_p2o[i], best_p2o[i] = best_damage(snapshot, snapshot["owned_moveset"][band, i], slots)
+
+    raw_o2p = np.zeros((len(owned), hi - lo))
+    best_o2p = np.full((len(owned), hi - lo), -1)
+    for j in range(hi - lo):
+        raw_o2p[:, j], best_o2p[:, j] = best_damage(snapshot, snapshot["slot_moveset"][lo + j], owned)
+
+    return {"raw_p2o": raw_p2o, "best_p2o": best_p2o, "raw_o2p": raw_o2p, "best_o2p": best_o2p,
+            "utility": snapshot["owned_utility"][band]}
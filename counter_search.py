@@ -0,0 +1,176 @@
+import argparse
+import bisect
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+import cache_files
+import compiled_snapshot
+import global_infos
+import incremental_analysis
+import info_manager
+import learnset_index
+import negative_cache
+import prefetch
+from compiled_snapshot import ANGRIFF, SP_ANGRIFF, SP_VERTEIDIGUNG, VERTEIDIGUNG
+
+# Schutz gegen Rundung: Schranke und exakter Wert werden in anderer Reihenfolge multipliziert
+BOUND_SLACK = 1.0 + 1e-9
+
+
+def get_dex_names() -> List[str]:
+    """Alle Pokémon aus pokemon_knowledge_cache.json."""
+    return list(cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {}) or {})
+
+
+def attacker_bounds(snapshot: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Günstige Kennzahlen pro Kandidat (snapshot["owned_pokemon"], Level-Band 0):
+    - max_power: höchste Stärke * Genauigkeit * STAB über alle Attacken
+    - max_attack: höherer der beiden Angriffswerte
+    - move_types: boolesche Matrix (Kandidaten x Typen) der vorhandenen Attackentypen
+    """
+    owned = snapshot["owned_pokemon"]
+    movesets = snapshot["owned_moveset"][0]
+    offsets = snapshot["move_offsets"]
+    n_types = snapshot["effectiveness"].shape[0]
+
+    max_power = np.zeros(len(owned))
+    move_types = np.zeros((len(owned), n_types), dtype=bool)
+    for i, (pokemon, moveset) in enumerate(zip(owned, movesets)):
+        lo, hi = offsets[moveset], offsets[moveset + 1]
+        if hi == lo:
+            continue
+        types = snapshot["move_type"][lo:hi]
+        stab = np.where(np.isin(types, snapshot["type_ids"][pokemon]), 1.5, 1.0)
+        max_power[i] = (snapshot["move_power"][lo:hi] * snapshot["move_accuracy"][lo:hi] * stab).max()
+        move_types[i, types] = True
+
+    stats = snapshot["stats"][owned]
+    return {"max_power": max_power, "max_attack": np.maximum(stats[:, ANGRIFF], stats[:, SP_ANGRIFF]),
+            "move_types": move_types}
+
+
+def damage_upper_bounds(snapshot: Dict[str, Any], bounds: Dict[str, np.ndarray], defender: int) -> np.ndarray:
+    """
+    Obere Schranke des besten erwarteten Schadens jedes Kandidaten gegen einen Verteidiger:
+    max_power * max_attack / schwächere Verteidigung * beste Effektivität der eigenen Attackentypen.
+    """
+    stats = snapshot["stats"][defender]
+    min_defense = max(min(stats[VERTEIDIGUNG], stats[SP_VERTEIDIGUNG]), 1.0)
+    best_eff = np.where(bounds["move_types"], snapshot["effectiveness"][:, defender][None, :], 0.0).max(axis=1)
+    return bounds["max_power"] * (bounds["max_attack"] / min_defense) * best_eff * BOUND_SLACK
+
+
+def incoming_damage(snapshot: Dict[str, Any]) -> np.ndarray:
+    """Exakter Schaden Gegner -> Kandidat (Kandidaten x Gegner-Slots); die Gegner haben nur wenige Attacken."""
+    owned = snapshot["owned_pokemon"]
+    slots = range(snapshot["fight_offsets"][0], snapshot["fight_offsets"][1])
+    incoming = np.zeros((len(owned), len(slots)))
+    for j, slot in enumerate(slots):
+        incoming[:, j] = compiled_snapshot.best_damage(snapshot, snapshot["slot_moveset"][slot], owned)[0]
+    return incoming
+
+
+def top_counters(snapshot: Dict[str, Any], k: int, weights: Sequence[float]) -> Dict[str, Any]:
+    """
+    Top-k Counter pro Gegner-Slot, ohne die volle Schadensmatrix zu berechnen.
+
+    Bewertet wird wie die Counter-Analyse, aber in Schadenspunkten statt min-max-normalisiert:
+    w_dmg * Schaden - w_surv * eingehender Schaden - w_expo * mittlerer eingehender Schaden.
+    Bei jeder gemeinsamen Normalisierung ergibt das dieselbe Reihenfolge wie der Counter-Score
+    ohne Utility (die bräuchte die Grenzen der vollen Matrix). Mit w_util != 0 kann die
+    Reihenfolge deshalb von der Counter-Analyse in main.py abweichen (Report: "Schadens-Score").
+
+    Der eingehende Schaden ist günstig und wird für alle Kandidaten exakt berechnet; der
+    eigene Schaden wird nur für Kandidaten ausgerechnet, deren Schranke noch über dem
+    k-besten exakten Score liegt (Besuch in Schranken-Reihenfolge).
+
+    Returns:
+        Dict mit "counters" (pro Slot: Liste von (Kandidat, Score, Schaden, Move-Index, incoming))
+        und "stats" (evaluated/total Paare)
+    """
+    w_dmg, w_surv, _, w_expo = weights
+    owned = snapshot["owned_pokemon"]
+    movesets = snapshot["owned_moveset"][0]
+    lo, hi = snapshot["fight_offsets"][0], snapshot["fight_offsets"][1]
+    bounds = attacker_bounds(snapshot)
+    incoming = incoming_damage(snapshot)
+    # Exposure in Schadenspunkten: Mittelwert über alle Gegner-Slots (wie scoring.exposure_scores)
+    defensive = -w_surv * incoming - w_expo * incoming.mean(axis=1, keepdims=True)
+
+    counters, evaluated = [], 0
+    for j, slot in enumerate(range(lo, hi)):
+        defender = snapshot["slot_pokemon"][slot]
+        upper = w_dmg * damage_upper_bounds(snapshot, bounds, defender) + defensive[:, j]
+        best: List[tuple] = []  # sortiert nach (-Score, Kandidat)
+        for i in np.argsort(-upper, kind="stable").tolist():
+            if len(best) >= k and -best[-1][0] > upper[i]:
+                break
+            damage, move = compiled_snapshot.best_damage(snapshot, movesets[i], np.array([defender]))
+            evaluated += 1
+            score = w_dmg * float(damage[0]) + float(defensive[i, j])
+            entry = (-score, i, float(damage[0]), int(move[0]), float(incoming[i, j]))
+            if len(best) < k or entry < best[-1]:
+                bisect.insort(best, entry)
+                del best[k:]
+        counters.append([(i, -neg_score, damage, move, inc) for neg_score, i, damage, move, inc in best])
+
+    return {"counters": counters, "stats": {"evaluated": evaluated, "total": int(len(owned) * (hi - lo))}}
+
+
+def print_report(snapshot: Dict[str, Any], result: Dict[str, Any], seconds: float):
+    names = snapshot["owned_names"]
+    move_names = snapshot["move_names"]
+    stats = result["stats"]
+    print(f"\n=== Top Counters aus {len(names)} Kandidaten (nur Schaden, ohne Utility) ===")
+    for opp_name, counters in zip(snapshot["fights"][0]["opponents"], result["counters"]):
+        print(f"\nGegner: {opp_name}")
+        for rank, (i, score, damage, move, incoming) in enumerate(counters, start=1):
+            print(f" {rank}. {names[i]} — Schadens-Score: {score:.3f}")
+            print(f"    - Top Move: {move_names[move] if move >= 0 else 'Unknown'} — gesch. Schaden: {damage:.3f}, "
+                  f"gesch. incoming: {incoming:.3f}")
+    share = stats["evaluated"] / stats["total"] if stats["total"] else 0.0
+    print(f"\n ~ {stats['evaluated']:,} von {stats['total']:,} Paaren exakt berechnet ({share:.1%}) "
+          f"in {seconds * 1000:.1f} ms")
+
+
+def run(candidates: List[str], k: int):
+    fights = info_manager.get_trainer_team_from_trainer_name(global_infos.opponent_trainer_name)
+    if not fights:
+        print(f"Kein Kampf gefunden: {global_infos.opponent_trainer_name}")
+        return
+    opponent_data = fights[0]
+    fight_level = None
+    if global_infos.level_aware_moves:
+        fight_level = learnset_index.get_fight_level(opponent_data["team"])
+    prefetch.print_warmup_report(prefetch.warmup(opponent_data["team"], candidates, fight_level))
+
+    with negative_cache.offline_mode():
+        start = time.perf_counter()
+        snapshot = compiled_snapshot.build_snapshot(candidates, [opponent_data], global_infos.level_aware_moves)
+        print(f" ~ Snapshot kompiliert ({time.perf_counter() - start:.2f}s)")
+
+        start = time.perf_counter()
+        result = top_counters(snapshot, k, incremental_analysis.get_weights())
+        seconds = time.perf_counter() - start
+    print_report(snapshot, result, seconds)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Top-Counter gegen das gegnerische Team aus einem großen Kandidaten-Pool.")
+    ap.add_argument("--dex", action="store_true",
+                    help="Alle Pokémon aus pokemon_knowledge_cache.json statt owned_pokemon_list durchsuchen.")
+    ap.add_argument("--top", type=int, default=3, help="Counter pro Gegner.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    candidates = get_dex_names() if args.dex else global_infos.owned_pokemon_list
+    run(candidates, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import info_manager
+import matchup_memo
+import move_table
+import name_index
+import type_effectiveness
+
+
+def compute_best_damage_for_pair(attacker_pkm, attacker_name, defender_pkm, attacker_moves_list, debug: bool = False):
+    """
+    Berechnet für einen Angreifer gegen einen Defender den besten *erwarteten Schaden*
+    über alle Moves, unter Einbeziehung von STAB und Genauigkeit.
+    Gibt am Ende den Rechenweg für den besten gefundenen Move aus.
+    """
+    if not attacker_moves_list:
+        # GEÄNDERT: Passender Rückgabewert für den Fehlerfall
+        return 0.0, None
+    compiled = move_table.compile_moveset(attacker_pkm, attacker_moves_list)
+    return compute_best_damage_compiled(attacker_pkm, attacker_name, defender_pkm, compiled, debug)
+
+def compute_best_damage_memoized(attacker_pkm, attacker_name, defender_pkm, compiled):
+    """Wie compute_best_damage_compiled, aber über das persistente Matchup-Memo."""
+    key = matchup_memo.matchup_key(compiled, attacker_pkm, defender_pkm)
+    cached = matchup_memo.get(key)
+    if cached is not None:
+        return cached
+    best_damage, best_move = compute_best_damage_compiled(attacker_pkm, attacker_name, defender_pkm, compiled)
+    matchup_memo.put(key, best_damage, best_move)
+    return best_damage, best_move
+
+def compute_best_damage_compiled(attacker_pkm, attacker_name, defender_pkm, compiled, debug: bool = False):
+    """
+    Kern von compute_best_damage_for_pair auf einem kompilierten Moveset
+    (siehe move_table.compile_moveset).
+    """
+    # GEÄNDERT: Wir optimieren jetzt für den erwarteten Schaden
+    best_expected_damage = 0.0
+    best_calculation_details = {}
+
+    # NEU: Typen des Angreifers für STAB-Berechnung einmalig holen
+    attacker_types = attacker_pkm.get("Typen", [])
+
+    for move_name, power, move_type, accuracy, is_special in compiled:
+        # NEU: STAB-Bonus bestimmen
+        stab_bonus = 1.5 if move_type in attacker_types else 1.0
+
+        if is_special:
+            attack_stat = attacker_pkm["Statuswerte"].get("SpAngriff", 0.0)
+            defense_stat = defender_pkm["Statuswerte"].get("SpVerteidigung", 1.0)
+        else:
+            attack_stat = attacker_pkm["Statuswerte"].get("Angriff", 0.0)
+            defense_stat = defender_pkm["Statuswerte"].get("Verteidigung", 1.0)
+        defense_stat = max(defense_stat, 1.0)
+
+        if move_type:
+            try:
+                eff = type_effectiveness.get_effectiveness(move_type, defender_pkm["Typen"])
+            except Exception:
+                eff = 1.0
+        else:
+            eff = 1.0
+
+        # GEÄNDERT: Formel erweitert um STAB
+        raw_damage = power * (attack_stat / defense_stat) * eff * stab_bonus
+        # NEU: Berechnung des erwarteten Schadens
+        expected_damage = raw_damage * accuracy
+
+        # GEÄNDERT: Vergleich basiert jetzt auf expected_damage
+        if expected_damage > best_expected_damage:
+            best_expected_damage = expected_damage
+            best_calculation_details = {
+                "move_name": move_name,
+                "power": power,
+                "attack_stat": attack_stat,
+                "defense_stat": defense_stat,
+                "effectiveness": eff,
+                "stab_bonus": stab_bonus, # NEU im Dictionary
+                "accuracy": accuracy,     # NEU im Dictionary
+                "raw_damage": raw_damage  # NEU zur Anzeige
+            }
+
+    if best_calculation_details:
+        defender_name = info_manager.get_name_from_id(defender_pkm.get("ID"))
+        details = best_calculation_details
+
+        # GEÄNDERT: Ausgabe erweitert
+        if debug:
+            print("\n--- Bester erwarteter Schaden ---")
+            print(f"Angreifer: {attacker_name}")
+            print(f"Verteidiger: {defender_name}")
+            print(f"Beste Attacke: {details['move_name']}")
+            print(f"Roher Schaden (vor Genauigkeit): {details['raw_damage']:.2f}")
+            print("-" * 20)
+            print(f"Formel: power * (att/def) * eff * STAB * accuracy")
+            print(f"Werte: {details['power']} * ({details['attack_stat']:.0f}/{details['defense_stat']:.0f}) * {details['effectiveness']} * {details['stab_bonus']} * {details['accuracy']}")
+            print(f"Erwarteter Schaden: {best_expected_damage:.2f}")
+            print("--------------------------------\n")
+    else:
+        # Sinnvollere Ausgabe, wenn keine Attacken gefunden wurden
+        if debug:
+            print(f"Keine effektiven Attacken für {attacker_name} gegen {info_manager.get_name_from_id(defender_pkm.get('ID'))} gefunden.")
+
+    # GEÄNDERT: Gib den besten Schaden und den Namen der Attacke zurück
+    return best_expected_damage, best_calculation_details.get('move_name')
+
+def compute_utility_score_for_attacker(attacker_name, attacker_moves_list):
+    """
+    Einfache Heuristik (0..1):
+    - hat Recovery (Move-Name ist in HEALING_MOVES) -> +0.25
+    - Anzahl Status-Moves (Kategorie == 'Status') -> +0.12 pro Move (max. +0.5)
+    Wichtig: Es wird **nur** auf Move-Namen geprüft (keine Effekt-/Beschreibungssuche).
+    """
+    status_count, has_recovery = compute_utility_inputs(attacker_moves_list)
+    return utility_score(status_count, has_recovery)
+
+def compute_utility_inputs(attacker_moves_list):
+    """(Anzahl Status-Moves, hat Recovery) eines Movesets, siehe compute_utility_score_for_attacker."""
+    status_count = 0
+    has_recovery = False
+
+    for attack_list in attacker_moves_list:
+        for move_meta in attack_list:
+            if not move_meta:
+                continue
+            move_name = (move_meta.get("Name") or "").strip()
+
+            # Recovery-Erkennung ausschliesslich über Move-Name (schreibweisen-unabhängig)
+            if name_index.is_healing_move(move_name):
+                has_recovery = True
+
+            # Status detection: prefer move_cache Kategorie, fallback auf move_meta
+            move_cache = info_manager.get_attack_in_cache(move_name) if move_name else None
+            cat = None
+            if move_cache and isinstance(move_cache, dict):
+                cat = move_cache.get("Kategorie")
+            if not cat:
+                cat = move_meta.get("Kategorie")
+            if cat and str(cat).lower().startswith("s"):  # 'Status'...
+                status_count += 1
+    return status_count, has_recovery
+
+def utility_score(status_count, has_recovery):
+    score = 0.0
+    if has_recovery:
+        score += 0.25
+    score += min(0.5, status_count * 0.12)  # cap bei 0.5
+    return min(1.0, score)
+
+def calculate_survival_score(own_pkm_data: dict, opponent_pkm_data: dict, incoming_damage: float, outgoing_damage: float, vmin: float, vmax: float, debug: bool = False) -> float:
+    """
+    Berechnet einen Survival-Score, der die Initiative und OHKO-Potenzial berücksichtigt.
+    Mit optionalem kompakten Debug-Output.
+
+    Args:
+        own_pkm_data: Das Daten-Dictionary des eigenen Pokémon.
+        opponent_pkm_data: Das Daten-Dictionary des gegnerischen Pokémon.
+        incoming_damage: Erwarteter Schaden vom Gegner.
+        outgoing_damage: Erwarteter Schaden am Gegner.
+        vmin, vmax: Normalisierungswerte.
+        debug: Ob Debug-Ausgabe erfolgen soll.
+
+    Returns:
+        Survival-Score zwischen 0.0 und 1.0.
+    """
+    # 1. Statuswerte extrahieren
+    my_hp = max(own_pkm_data.get("Statuswerte", {}).get("KP", 1.0), 1.0)
+    my_speed = own_pkm_data.get("Statuswerte", {}).get("Initiative", 0.0)
+    opponent_hp = max(opponent_pkm_data.get("Statuswerte", {}).get("KP", 1.0), 1.0)
+    opponent_speed = opponent_pkm_data.get("Statuswerte", {}).get("Initiative", 0.0)
+
+    # 2. Schaden berechnen
+    scaled_incoming_damage = ((vmax - vmin) * incoming_damage + vmin)
+    damage_percentage_if_hit = min(scaled_incoming_damage / my_hp, 1.0)
+    survival_if_hit = 1.0 - damage_percentage_if_hit
+    can_i_ohko_opponent = ((vmax - vmin) * outgoing_damage + vmin) >= opponent_hp
+
+    if debug:
+        print(f"[SurvivalScore] Own: HP={my_hp}, Speed={my_speed} | Opponent: HP={opponent_hp}, Speed={opponent_speed}")
+        print(f"[SurvivalScore] IncomingDamage(raw)={incoming_damage:.2f}, Scaled={scaled_incoming_damage:.2f}, Damage%={damage_percentage_if_hit:.2%}")
+        print(f"[SurvivalScore] SurvivalIfHit={survival_if_hit:.2f}, CanOHKO={can_i_ohko_opponent}")
+
+    # 3. Szenarien auswerten
+    if my_speed > opponent_speed:
+        result = 1.0 if can_i_ohko_opponent else survival_if_hit
+        if debug: print(f"[SurvivalScore] Szenario: Schneller → Score={result:.2f}")
+        return result
+    elif my_speed < opponent_speed:
+        if debug: print(f"[SurvivalScore] Szenario: Langsamer → Score={survival_if_hit:.2f}")
+        return survival_if_hit
+    else:
+        survival_if_win_tie = 1.0 if can_i_ohko_opponent else survival_if_hit
+        survival_if_lose_tie = survival_if_hit
+        result = 0.5 * survival_if_win_tie + 0.5 * survival_if_lose_tie
+        if debug:
+            print(f"[SurvivalScore] Szenario: Speed Tie → WinTie={survival_if_win_tie:.2f}, LoseTie={survival_if_lose_tie:.2f}, Score={result:.2f}")
+        return result
@@ -0,0 +1,212 @@
+import argparse
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+import compiled_snapshot
+import global_infos
+import learnset_index
+import main as counter_analysis
+import negative_cache
+from compiled_snapshot import ANGRIFF, INITIATIVE, KP, SP_ANGRIFF, SP_VERTEIDIGUNG, VERTEIDIGUNG
+
+# Annahmen für die Statuswerte auf Level (wesensneutral)
+DEFAULT_IV = 31
+DEFAULT_EV = 0
+# Level, wenn fight_data.json keins kennt
+DEFAULT_LEVEL = 50
+
+# Zufallswurf 85..100 % und Volltreffer (ab Gen 6: 1/24, Faktor 1.5)
+ROLLS = np.arange(85, 101)
+CRIT_CHANCE = 1.0 / 24.0
+CRIT_MULTIPLIER = 1.5
+# Wahrscheinlichkeit jedes der 32 Ausgänge eines Treffers (erst 16 ohne, dann 16 mit Volltreffer)
+OUTCOME_WEIGHTS = np.concatenate([np.full(len(ROLLS), (1.0 - CRIT_CHANCE) / len(ROLLS)),
+                                  np.full(len(ROLLS), CRIT_CHANCE / len(ROLLS))])
+
+# Teilgröße (Attacken) für die Zwei-Treffer-Faltung, begrenzt den Speicher
+_CHUNK = 256
+
+
+def level_stats(base: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """
+    Statuswerte auf Level aus den Basiswerten (Zeilen wie snapshot["stats"]):
+    KP = ⌊(2B + IV + ⌊EV/4⌋) * L / 100⌋ + L + 10, sonst ⌊(2B + IV + ⌊EV/4⌋) * L / 100⌋ + 5.
+    """
+    levels = np.asarray(levels, dtype=float)[:, None]
+    core = np.floor((2.0 * base + DEFAULT_IV + DEFAULT_EV // 4) * levels / 100.0)
+    stats = core + 5.0
+    stats[:, KP] = core[:, KP] + levels[:, 0] + 10.0
+    return stats
+
+
+def move_distributions(snapshot: Dict[str, Any], move_idx: np.ndarray, attacker_stats: np.ndarray,
+                       attacker_levels: np.ndarray, attackers: np.ndarray, defender_stats: np.ndarray,
+                       defenders: np.ndarray) -> np.ndarray:
+    """
+    Schaden jeder Attacke (Zeilen, mit Angreifer-Statuswerten/-Level) gegen jeden Verteidiger
+    (Spalten), für alle 32 Ausgänge eines Treffers (16 Würfe x ohne/mit Volltreffer).
+    Rechenweg wie im Spiel mit Abrunden nach jedem Schritt:
+    Basis -> Volltreffer -> Zufallswurf -> STAB -> Effektivität, mindestens 1 bei Effektivität > 0.
+
+    Returns:
+        (Attacken x Verteidiger x 32) Schadenswerte
+    """
+    special = snapshot["move_special"][move_idx]
+    move_type = snapshot["move_type"][move_idx]
+    power = snapshot["move_power"][move_idx][:, None]
+    attack = np.where(special, attacker_stats[:, SP_ANGRIFF], attacker_stats[:, ANGRIFF])[:, None]
+    defense = np.maximum(np.where(special[:, None], defender_stats[None, :, SP_VERTEIDIGUNG],
+                                  defender_stats[None, :, VERTEIDIGUNG]), 1.0)
+    eff = snapshot["effectiveness"][move_type][:, defenders]
+    stab = (move_type[:, None] == snapshot["type_ids"][attackers]).any(axis=1)[:, None]
+
+    base = np.floor(np.floor(np.floor(2.0 * attacker_levels / 5.0 + 2.0)[:, None] * power * attack / defense) / 50.0) + 2.0
+    crit = np.floor(base[..., None] * np.array([1.0, CRIT_MULTIPLIER]))                       # T x C x 2
+    rolled = np.floor(crit[..., None] * ROLLS / 100.0).reshape(*base.shape, -1)               # T x C x 32
+    rolled = np.where(stab[..., None], np.floor(rolled * 1.5), rolled)
+    damage = np.floor(rolled * eff[..., None])
+    damage = np.where(eff[..., None] > 0, np.maximum(damage, 1.0), 0.0)
+    return np.where(power[..., None] > 0, damage, 0.0)
+
+
+def ko_probabilities(damage: np.ndarray, accuracy: np.ndarray, hp: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    K.O.-Wahrscheinlichkeiten aus den Schadensverteilungen (T x C x 32), mit Genauigkeit:
+    - ko1: K.O. mit einem Angriff
+    - ko2: K.O. innerhalb von zwei Angriffen (Faltung der Verteilung mit sich selbst, Fehlschläge = 0 Schaden)
+    """
+    hit = accuracy[:, None, None] * OUTCOME_WEIGHTS                                          # T x 1 x 32
+    ko1 = (hit * (damage >= hp[None, :, None])).sum(axis=-1)
+
+    ko2 = np.empty(damage.shape[:2])
+    for lo in range(0, damage.shape[0], _CHUNK):
+        d = damage[lo:lo + _CHUNK]
+        acc = accuracy[lo:lo + _CHUNK]
+        # 33 Ausgänge pro Angriff: 32 Treffer + Fehlschlag
+        values = np.concatenate([d, np.zeros(d.shape[:2] + (1,))], axis=-1)
+        probs = np.concatenate([acc[:, None] * OUTCOME_WEIGHTS, (1.0 - acc)[:, None]], axis=-1)   # t x 33
+        enough = (values[..., :, None] + values[..., None, :]) >= hp[None, :, None, None]
+        ko2[lo:lo + _CHUNK] = np.einsum("ta,tcab,tb->tc", probs, enough, probs)
+    return {"ko1": ko1, "ko2": ko2}
+
+
+def pair_distributions(snapshot: Dict[str, Any], attackers: np.ndarray, movesets: np.ndarray,
+                       attacker_levels: np.ndarray, defenders: np.ndarray,
+                       defender_levels: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Für jedes Paar (Angreifer x Verteidiger) die beste Attacke samt Schadensverteilung und
+    K.O.-Wahrscheinlichkeiten, für alle Paare und Attacken in einem Durchgang.
+    Beste Attacke: höchste 1HKO-, dann 2HKO-Chance, dann höchster erwarteter Schaden;
+    bei Gleichstand die erste.
+
+    Returns:
+        Dict mit move (globaler Index oder -1), damage (R x C x 32), ko1, ko2, expected,
+        hp (KP der Verteidiger auf Level)
+    """
+    offsets = snapshot["move_offsets"]
+    lo, hi = offsets[movesets], offsets[movesets + 1]
+    counts = hi - lo
+    total = int(counts.sum())
+    move_row = np.repeat(np.arange(len(attackers)), counts)
+    move_idx = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+
+    attacker_stats = level_stats(snapshot["stats"][attackers], attacker_levels)
+    defender_stats = level_stats(snapshot["stats"][defenders], defender_levels)
+    hp = defender_stats[:, KP]
+
+    damage = move_distributions(snapshot, move_idx, attacker_stats[move_row], np.asarray(attacker_levels)[move_row],
+                                attackers[move_row], defender_stats, defenders)
+    accuracy = snapshot["move_accuracy"][move_idx]
+    ko = ko_probabilities(damage, accuracy, hp)
+    expected = accuracy[:, None] * (damage * OUTCOME_WEIGHTS).sum(axis=-1)
+
+    n_rows, n_cols = len(attackers), len(defenders)
+    result = {"move": np.full((n_rows, n_cols), -1), "damage": np.zeros((n_rows, n_cols, len(OUTCOME_WEIGHTS))),
+              "ko1": np.zeros((n_rows, n_cols)), "ko2": np.zeros((n_rows, n_cols)),
+              "expected": np.zeros((n_rows, n_cols)), "hp": hp}
+    if total == 0:
+        return result
+    has_moves = counts > 0
+    ends = np.cumsum(counts)[has_moves] - 1
+    for c in range(n_cols):
+        # Zeilen zusammenhängend, innerhalb einer Zeile aufsteigend nach Güte -> letzter Eintrag ist der beste
+        order = np.lexsort((-np.arange(total), expected[:, c], ko["ko2"][:, c], ko["ko1"][:, c], move_row))
+        best = order[ends]
+        result["move"][has_moves, c] = move_idx[best]
+        result["damage"][has_moves, c] = damage[best, c]
+        result["ko1"][has_moves, c] = ko["ko1"][best, c]
+        result["ko2"][has_moves, c] = ko["ko2"][best, c]
+        result["expected"][has_moves, c] = expected[best, c]
+    return result
+
+
+def fight_distributions(snapshot: Dict[str, Any], fight: int = 0, own_level: Optional[int] = None,
+                        rows: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Beide Richtungen eines Kampfes: eigene -> Gegner-Slots und Gegner-Slots -> eigene
+    (jeweils als eigene x Gegner-Slots). own_level=None: höchstes Gegner-Level des Kampfes.
+    rows: nur diese Zeilen von snapshot["owned_pokemon"] (None = alle).
+
+    Returns:
+        Dict mit outgoing, incoming (siehe pair_distributions; incoming["hp"] sind die eigenen KP),
+        own_level, slot_levels sowie own_speed/slot_speed (Initiative auf Level)
+    """
+    lo, hi = snapshot["fight_offsets"][fight], snapshot["fight_offsets"][fight + 1]
+    band = snapshot["fight_band"][fight]
+    rows = np.arange(len(snapshot["owned_pokemon"])) if rows is None else np.asarray(rows, dtype=int)
+    owned = snapshot["owned_pokemon"][rows]
+    slots = snapshot["slot_pokemon"][lo:hi]
+    slot_levels = np.where(snapshot["slot_level"][lo:hi] > 0, snapshot["slot_level"][lo:hi], DEFAULT_LEVEL)
+    own_level = own_level or (int(slot_levels.max()) if hi > lo else DEFAULT_LEVEL)
+    own_levels = np.full(len(owned), own_level)
+
+    outgoing = pair_distributions(snapshot, owned, snapshot["owned_moveset"][band][rows], own_levels, slots, slot_levels)
+    incoming = pair_distributions(snapshot, slots, snapshot["slot_moveset"][lo:hi], slot_levels, owned, own_levels)
+    incoming = {key: (np.swapaxes(value, 0, 1) if key != "hp" else value) for key, value in incoming.items()}
+    return {"outgoing": outgoing, "incoming": incoming, "own_level": own_level, "slot_levels": slot_levels,
+            "own_speed": level_stats(snapshot["stats"][owned], own_levels)[:, INITIATIVE],
+            "slot_speed": level_stats(snapshot["stats"][slots], slot_levels)[:, INITIATIVE]}
+
+
+def print_report(snapshot: Dict[str, Any], result: Dict[str, Any], top: int = 3):
+    names = snapshot["owned_names"]
+    move_names = snapshot["move_names"]
+    out, inc = result["outgoing"], result["incoming"]
+    print(f"\n=== K.O.-Chancen (eigene Pokémon auf Lv. {result['own_level']}) ===")
+    for j, opp_name in enumerate(snapshot["fights"][0]["opponents"]):
+        print(f"\nGegner: {opp_name} (Lv. {result['slot_levels'][j]}, {out['hp'][j]:.0f} KP)")
+        # sicherster eigener K.O., dann geringste Gefahr durch den Gegner
+        ranked = np.lexsort((inc["ko2"][:, j], -out["ko2"][:, j], -out["ko1"][:, j]))[:top]
+        for rank, i in enumerate(ranked.tolist(), start=1):
+            move = out["move"][i, j]
+            low, high = out["damage"][i, j].min(), out["damage"][i, j].max()
+            print(f" {rank}. {names[i]} — {move_names[move] if move >= 0 else 'Unknown'}: "
+                  f"{low:.0f}-{high:.0f} Schaden ({low / out['hp'][j]:.0%}-{high / out['hp'][j]:.0%}), "
+                  f"1HKO {out['ko1'][i, j]:.0%}, 2HKO {out['ko2'][i, j]:.0%}")
+            print(f"    - Gegner trifft mit 1HKO {inc['ko1'][i, j]:.0%}, 2HKO {inc['ko2'][i, j]:.0%}")
+
+
+def run(own_level: Optional[int] = None):
+    opponent_team, owned_list, _ = counter_analysis.prepare_fight()
+    fight = {"trainer_name": global_infos.opponent_trainer_name, "team": opponent_team}
+    with negative_cache.offline_mode():
+        snapshot = compiled_snapshot.build_snapshot(owned_list, [fight], global_infos.level_aware_moves)
+        result = fight_distributions(snapshot, 0, own_level or global_infos.own_pokemon_level
+                                     or learnset_index.get_fight_level(opponent_team))
+    print_report(snapshot, result)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Schadensverteilungen und K.O.-Chancen gegen das gegnerische Team.")
+    ap.add_argument("--level", type=int, help="Level der eigenen Pokémon (Standard: global_infos bzw. Kampf-Level).")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    run(args.level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import campaign
+import compiled_snapshot
+import global_infos
+import incremental_analysis
+import negative_cache
+import prefetch
+from compiled_snapshot import SINGLE_TARGET, SPREAD_ALL, SPREAD_FOES
+
+# Wie viele eigene Paare pro Gegner-Paar im Report landen
+DOUBLES_TOP = 5
+
+
+def opponent_pairs(n_slots: int) -> List[Tuple[int, int]]:
+    """Gegner-Paare in Einwechsel-Reihenfolge: (0, 1), (2, 3), ...; ein übriges Pokémon kommt zum vorletzten."""
+    pairs = [(j, j + 1) for j in range(0, n_slots - 1, 2)]
+    if n_slots % 2 and n_slots > 1:
+        pairs.append((n_slots - 2, n_slots - 1))
+    return pairs
+
+
+def _masked_max(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Maximum über die Attacken (Zeilen) mit mask, 0 ohne passende Attacke."""
+    return np.where(mask[:, None], values, 0.0).max(axis=0, initial=0.0)
+
+
+def own_features(snapshot: Dict[str, Any], fight: int, pair: Tuple[int, int]) -> Dict[str, np.ndarray]:
+    """
+    Angriffswerte jedes eigenen Pokémon gegen ein Gegner-Paar (x, y):
+    - single (N x 2): bester Einzelziel-Schaden auf x bzw. y
+    - reach (N x 2): bester Schaden auf x bzw. y inklusive Flächenattacken
+    - foe_spread (N): bester Gesamtschaden einer Flächenattacke, die nur die Gegner trifft
+    - ally_value (N x N): bester Gesamtschaden einer Flächenattacke, die auch den Partner
+      (Spalte) trifft, abzüglich des Schadens am Partner
+    """
+    lo = snapshot["fight_offsets"][fight]
+    band = snapshot["fight_band"][fight]
+    owned = snapshot["owned_pokemon"]
+    n = len(owned)
+    defenders = np.concatenate([snapshot["slot_pokemon"][[lo + pair[0], lo + pair[1]]], owned])
+    multiplier = global_infos.SPREAD_DAMAGE_MULTIPLIER
+
+    single, reach = np.zeros((n, 2)), np.zeros((n, 2))
+    foe_spread, ally_value = np.zeros(n), np.zeros((n, n))
+    offsets = snapshot["move_offsets"]
+    for i in range(n):
+        moveset = snapshot["owned_moveset"][band, i]
+        table = compiled_snapshot.damage_table(snapshot, moveset, defenders)
+        spread = snapshot["move_spread"][offsets[moveset]:offsets[moveset + 1]]
+        single[i] = _masked_max(table[:, :2], spread == SINGLE_TARGET)
+        reach[i] = np.maximum(single[i], _masked_max(multiplier * table[:, :2], spread != SINGLE_TARGET))
+        foe_spread[i] = _masked_max(multiplier * table[:, :2].sum(axis=1, keepdims=True), spread == SPREAD_FOES)[0]
+        ally = spread == SPREAD_ALL
+        if ally.any():
+            ally_damage = multiplier * table[ally, 2:]                                   # Attacken x N
+            ally_value[i] = np.maximum((multiplier * table[ally, :2].sum(axis=1))[:, None] - ally_damage, 0.0).max(axis=0)
+    np.fill_diagonal(ally_value, 0.0)
+    return {"single": single, "reach": reach, "foe_spread": foe_spread, "ally_value": ally_value}
+
+
+def opponent_threats(snapshot: Dict[str, Any], fight: int, pair: Tuple[int, int]) -> Dict[str, np.ndarray]:
+    """
+    Schaden der beiden Gegner: received (N x Attacken beider Gegner) pro eigenem Pokémon
+    und threat (N x N): Summe über beide Gegner des stärksten Angriffs auf das eigene Paar
+    (Einzelziel auf den schwächeren Partner oder Flächenattacke auf beide).
+    """
+    lo = snapshot["fight_offsets"][fight]
+    owned = snapshot["owned_pokemon"]
+    offsets = snapshot["move_offsets"]
+    multiplier = global_infos.SPREAD_DAMAGE_MULTIPLIER
+    threat = np.zeros((len(owned), len(owned)))
+    received = []
+    for j in pair:
+        moveset = snapshot["slot_moveset"][lo + j]
+        table = compiled_snapshot.damage_table(snapshot, moveset, owned)               # Attacken x N
+        spread = snapshot["move_spread"][offsets[moveset]:offsets[moveset + 1]] != SINGLE_TARGET
+        if not len(table):
+            continue
+        options = np.where(spread[:, None, None], multiplier * (table[:, :, None] + table[:, None, :]),
+                           np.maximum(table[:, :, None], table[:, None, :]))
+        threat += options.max(axis=0)
+        received.append(table.T)
+    return {"threat": threat, "received": np.hstack(received) if received else np.zeros((len(owned), 0))}
+
+
+def dominated(own: Dict[str, np.ndarray], opp: Dict[str, np.ndarray], k: int) -> np.ndarray:
+    """
+    Eigene Pokémon, die für die Top-k-Paare keine Rolle spielen: a' dominiert a, wenn a' mit
+    jedem Partner b mindestens so gut ist (Schaden pro Runde, Reichweite auf x und y, und
+    höchstens so viel eingesteckter Schaden von jeder Gegner-Attacke, mindestens so viel Wert
+    der partner-treffenden Flächenattacken jedes anderen eigenen Pokémon).
+    Dann ist (a', b) >= (a, b); wer k+1 Dominatoren hat, kann in keinem Top-k-Paar fehlen.
+    """
+    base = np.maximum(own["single"].max(axis=1), own["foe_spread"])
+    ally = own["ally_value"]
+    ally_lower = np.where(np.eye(len(base), dtype=bool), np.inf, ally).min(axis=1) if len(base) > 1 else np.zeros(len(base))
+    turn_upper = np.maximum(base, ally.max(axis=1, initial=0.0))
+    turn_lower = np.maximum(base, np.where(np.isfinite(ally_lower), ally_lower, 0.0))
+
+    # Spalte b von ally_value: was b mit diesem Partner aus Flächenattacken holt
+    higher_lower = np.column_stack([turn_lower, own["reach"], ally.T])                 # Dominator: mindestens
+    higher_upper = np.column_stack([turn_upper, own["reach"], ally.T])                 # Dominierter: höchstens
+    lower = opp["received"]
+
+    # [a', a]: a' dominiert a
+    better = (higher_lower[:, None, :] >= higher_upper[None, :, :]).all(axis=2) & \
+             (lower[:, None, :] <= lower[None, :, :]).all(axis=2)
+    strict = (higher_lower[:, None, :] > higher_upper[None, :, :]).any(axis=2) | \
+             (lower[:, None, :] < lower[None, :, :]).any(axis=2)
+    index = np.arange(len(base))
+    dominates = better & (strict | (index[:, None] < index[None, :]))
+    np.fill_diagonal(dominates, False)
+    return dominates.sum(axis=0) > k
+
+
+def pair_scores(own: Dict[str, np.ndarray], opp: Dict[str, np.ndarray], members: np.ndarray,
+                weights: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Scores aller Paare aus members (Matrix members x members, Diagonale -inf):
+    w_dmg * (Schaden pro Runde beider + Abdeckung) - w_surv * eingehender Schaden,
+    Abdeckung = schlechter abgedeckter Gegner (bester Schaden des Paares auf ihn).
+    """
+    w_dmg, w_surv = weights[0], weights[1]
+    sub = np.ix_(members, members)
+    base = np.maximum(own["single"][members].max(axis=1), own["foe_spread"][members])
+    turn = np.maximum(base[:, None], own["ally_value"][sub])                           # turn[a, b]: a mit Partner b
+    damage = turn + turn.T
+    reach = own["reach"][members]
+    coverage = np.maximum(reach[:, None, :], reach[None, :, :]).min(axis=2)
+    incoming = opp["threat"][sub]
+    score = w_dmg * (damage + coverage) - w_surv * incoming
+    np.fill_diagonal(score, -np.inf)
+    return {"score": score, "damage": damage, "coverage": coverage, "incoming": incoming}
+
+
+def rank_pairs(snapshot: Dict[str, Any], fight: int, pair: Tuple[int, int], weights: Sequence[float],
+               top: int = DOUBLES_TOP) -> Dict[str, Any]:
+    """Beste eigene Paare gegen ein Gegner-Paar, nach Dominanz-Pruning."""
+    own = own_features(snapshot, fight, pair)
+    opp = opponent_threats(snapshot, fight, pair)
+    members = np.flatnonzero(~dominated(own, opp, top))
+    scores = pair_scores(own, opp, members, weights)
+
+    upper = np.triu_indices(len(members), k=1)
+    order = np.lexsort((upper[1], upper[0], -scores["score"][upper]))[:top]
+    ranked = [{
+        "pair": (int(members[upper[0][r]]), int(members[upper[1][r]])),
+        **{key: float(value[upper[0][r], upper[1][r]]) for key, value in scores.items()},
+    } for r in order.tolist()]
+    n = len(snapshot["owned_pokemon"])
+    return {"opponents": pair, "ranked": ranked,
+            "stats": {"members": n, "survivors": len(members), "pairs": len(upper[0]), "total": n * (n - 1) // 2}}
+
+
+def print_report(snapshot: Dict[str, Any], fight: int, results: List[Dict[str, Any]], seconds: float):
+    info = snapshot["fights"][fight]
+    names = snapshot["owned_names"]
+    print(f"\n=== {info['trainer_name']} ({info['location']}, Lv. {info['level']}) — Doppelkampf ===")
+    for result in results:
+        x, y = (info["opponents"][j] for j in result["opponents"])
+        stats = result["stats"]
+        print(f"\nGegner: {x} + {y}  ({stats['survivors']}/{stats['members']} Pokémon nach Dominanz, "
+              f"{stats['pairs']:,} von {stats['total']:,} Paaren)")
+        for rank, entry in enumerate(result["ranked"], start=1):
+            a, b = entry["pair"]
+            print(f" {rank}. {names[a]} + {names[b]} — Score: {entry['score']:.1f} "
+                  f"(Schaden/Runde {entry['damage']:.1f}, Abdeckung {entry['coverage']:.1f}, "
+                  f"eingehend {entry['incoming']:.1f})")
+    print(f"\n ~ {seconds * 1000:.1f} ms")
+
+
+def select_doubles_fights(location: Optional[str] = None, edition: Optional[str] = None,
+                          trainer: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Kämpfe wie campaign.select_fights; ohne Trainer nur Doppel-/Multikämpfe."""
+    fights = campaign.select_fights(location, edition, trainer)
+    if trainer:
+        return fights
+    return [fight for fight in fights if fight.get("battle_type") in global_infos.DOUBLES_BATTLE_TYPES]
+
+
+def run(fights: List[Dict[str, Any]], owned_list: List[str], top: int = DOUBLES_TOP):
+    prefetch.print_warmup_report(campaign.warmup_campaign(fights, owned_list))
+    weights = incremental_analysis.get_weights()
+    with negative_cache.offline_mode():
+        snapshot = compiled_snapshot.build_snapshot(owned_list, fights, global_infos.level_aware_moves)
+        if len(snapshot["owned_pokemon"]) < 2:
+            print("Zu wenige eigene Pokémon für einen Doppelkampf.")
+            return
+        for fight, info in enumerate(snapshot["fights"]):
+            start = time.perf_counter()
+            results = [rank_pairs(snapshot, fight, pair, weights, top) for pair in opponent_pairs(len(info["opponents"]))]
+            if results:
+                print_report(snapshot, fight, results, time.perf_counter() - start)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Beste eigene Paare gegen Gegner-Paare in Doppel- und Multikämpfen.")
+    ap.add_argument("--trainer", help="Kämpfe, deren Trainername diesen Text enthält (sonst alle Doppelkämpfe).")
+    ap.add_argument("--location", help="Nur Kämpfe, deren Ort diesen Text enthält.")
+    ap.add_argument("--edition", help="Nur Kämpfe dieser Edition (z. B. SWSH).")
+    ap.add_argument("--top", type=int, default=DOUBLES_TOP, help="Paare pro Gegner-Paar.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    fights = select_doubles_fights(args.location, args.edition, args.trainer)
+    print(f" ~ {len(fights)} Kämpfe ausgewählt")
+    run(fights, global_infos.owned_pokemon_list, args.top)
+
+
+if __name__ == "__main__":
+    main()
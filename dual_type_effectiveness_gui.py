@@ -3,14 +3,14 @@ from tkinter import ttk
 import os
 
 import global_infos
-from type_effectiveness import load_type_effectiveness_data, get_type_matchups
+from global_infos import EFFECTIVENESS_GROUPS, EFFECTIVENESS_LABELS, TYPE_ICON_FILENAME_PATTERN, TYPE_ICON_FOLDER
+from type_effectiveness import effectiveness_groups
 
 class TypeEffectivenessApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Pokémon Typen-Effektivität")
 
-        self.type_chart = load_type_effectiveness_data()
         self.selected_types = []
 
         self.tk_images = {}
@@ -127,11 +127,9 @@ class TypeEffectivenessApp:
 
         defense = self.selected_types
 
-        matchups = get_type_matchups(self.type_chart, defense)
-
+        # Gruppen direkt aus den vorberechneten Bitmasken (type_effectiveness.get_type_masks)
         groups = {key: [] for key in EFFECTIVENESS_GROUPS}
-        for typ, value in matchups.items():
-            groups.setdefault(value, []).append(typ)
+        groups.update(effectiveness_groups(defense))
 
         for col_index, multiplier in enumerate(EFFECTIVENESS_GROUPS):
             typelist = groups.get(multiplier, [])
@@ -0,0 +1,209 @@
+import re
+from typing import Any, Dict, List, Optional
+
+import cache_files
+import global_infos
+import info_manager
+
+_LEVEL_PATTERN = re.compile(r"ab \[\[Level\]\](?:&amp;nbsp;|&nbsp;|\s)*(\d+)")
+_LINK_PATTERN = re.compile(r"\[\[([^\]|]+)(?:\|[^\]]*)?\]\]")
+
+_graph: Optional[Dict[str, Any]] = None
+_graph_cache: Optional[Dict[str, Any]] = None
+
+
+def _item_from_method(method: str) -> Optional[str]:
+    """
+    Item aus dem Methoden-Text: der erste Link im Abschnitt mit "anwenden" (Abschnitte sind
+    durch " * " getrennt). Nicht der letzte Link: in "[[Donnerstein]] außerhalb von [[Alola]]
+    anwenden" ist "Alola" kein Item.
+    """
+    for part in method.split(" * "):
+        if "anwenden" in part:
+            link = _LINK_PATTERN.search(part.split("anwenden")[0])
+            if link:
+                return link.group(1)
+    return None
+
+
+def parse_condition(stage: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bedingungen einer Entwicklungsstufe aus extract_entwicklungen. Das Level wird neu aus der
+    Methode gelesen: das gespeicherte "Level" trifft auch Zahlen wie "Gen. {{G|2" bei
+    Freundschafts-Entwicklungen.
+    """
+    method = stage.get("Methode") or ""
+    level = _LEVEL_PATTERN.search(method)
+    return {
+        "level": int(level.group(1)) if level else None,
+        "item": stage.get("Item") or _item_from_method(method),
+        "time": stage.get("Zeit"),
+        "friendship": "Freundschaft" in method,
+        "trade": "Tausch" in method,
+        "method": method,
+    }
+
+
+def _chain_edges(stages: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    Kanten (Vorstufe, Stufe, Bedingung) einer Entwicklungsreihe. Die Stufen stehen in
+    Reihenfolge; eine Stufe s entwickelt sich aus der letzten Stufe s-1 davor. Formen
+    (IDs mit Buchstaben, z. B. Gigadynamax "003g1" oder Mega "130m1") fallen weg.
+    """
+    edges = []
+    last_at_stage: Dict[int, Optional[str]] = {}
+    for stage in stages or []:
+        number, dex_id = stage.get("Stufe"), str(stage.get("ID") or "")
+        if not dex_id.isdigit():
+            last_at_stage[number] = None
+            continue
+        last_at_stage[number] = dex_id
+        parent = last_at_stage.get(number - 1) if number and number > 1 else None
+        if parent:
+            edges.append((parent, dex_id, parse_condition(stage)))
+    return edges
+
+
+def build_evolution_graph(pokemon_cache: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entwicklungs-Graph über alle Pokémon im Cache (Knoten sind Dex-IDs).
+
+    Returns:
+        Dict mit
+        - "successors":   ID -> [Bedingung + "id"] der direkten Entwicklungen
+        - "predecessors": ID -> IDs der direkten Vorstufen
+        - "descendants":  transitive Hülle, ID -> {Nachfahre: {"level", "path"}}; "level" ist das
+          höchste Level auf dem Weg (None ohne Level-Bedingung), bei mehreren Wegen der niedrigste
+        - "ancestors":    ID -> alle Vorstufen
+    """
+    successors: Dict[str, List[Dict[str, Any]]] = {}
+    predecessors: Dict[str, List[str]] = {}
+    for data in pokemon_cache.values():
+        for parent, child, condition in _chain_edges((data or {}).get("Entwicklungen")):
+            if any(edge["id"] == child for edge in successors.get(parent, [])):
+                continue
+            successors.setdefault(parent, []).append({"id": child, **condition})
+            predecessors.setdefault(child, []).append(parent)
+
+    descendants: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def visit(dex_id: str, seen: frozenset) -> Dict[str, Dict[str, Any]]:
+        if dex_id in descendants:
+            return descendants[dex_id]
+        reached: Dict[str, Dict[str, Any]] = {}
+        for edge in successors.get(dex_id, []):
+            if edge["id"] in seen:
+                continue
+            paths = [(edge["level"], [edge["id"]])]
+            for target, info in visit(edge["id"], seen | {edge["id"]}).items():
+                levels = [lvl for lvl in (edge["level"], info["level"]) if lvl is not None]
+                paths.append((max(levels) if levels else None, [edge["id"]] + info["path"]))
+            for level, path in paths:
+                old = reached.get(path[-1])
+                if old is None or (old["level"] or 0) > (level or 0):
+                    reached[path[-1]] = {"level": level, "path": path}
+        descendants[dex_id] = reached
+        return reached
+
+    for dex_id in list(successors):
+        visit(dex_id, frozenset([dex_id]))
+
+    ancestors: Dict[str, List[str]] = {}
+    for dex_id, reached in descendants.items():
+        for target in reached:
+            ancestors.setdefault(target, []).append(dex_id)
+
+    return {"successors": successors, "predecessors": predecessors, "descendants": descendants, "ancestors": ancestors}
+
+
+def get_evolution_graph() -> Dict[str, Any]:
+    """Der Graph zum aktuellen Pokémon-Cache (neu gebaut, sobald sich die Datei ändert)."""
+    global _graph, _graph_cache
+    cache = cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {}) or {}
+    if _graph is None or cache is not _graph_cache:
+        _graph = build_evolution_graph(cache)
+        _graph_cache = cache
+    return _graph
+
+
+def get_dex_id(pokemon_name: str) -> Optional[str]:
+    data = info_manager.get_pokemon_in_cache(pokemon_name) if info_manager.is_pokemon_in_cache(pokemon_name) else None
+    return str(data["ID"]) if data and data.get("ID") else None
+
+
+def get_evolutions(pokemon_name: str) -> List[Dict[str, Any]]:
+    """Direkte Entwicklungen mit ihren Bedingungen (plus "name")."""
+    dex_id = get_dex_id(pokemon_name)
+    return [{**edge, "name": info_manager.get_name_from_id(edge["id"])}
+            for edge in get_evolution_graph()["successors"].get(dex_id, [])]
+
+
+def get_pre_evolutions(pokemon_name: str) -> List[str]:
+    """Alle Vorstufen (Namen), die nächste zuerst."""
+    graph = get_evolution_graph()
+    dex_id = get_dex_id(pokemon_name)
+    ancestors = graph["ancestors"].get(dex_id, [])
+    ancestors = sorted(ancestors, key=lambda a: len(graph["descendants"][a][dex_id]["path"]))
+    return [info_manager.get_name_from_id(a) for a in ancestors]
+
+
+def reachable_evolutions(pokemon_name: str, max_level: Optional[int] = None,
+                         level_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Alle Entwicklungen (transitiv), die bis max_level erreichbar sind: Level-Bedingungen auf
+    dem Weg höchstens max_level (None = ohne Grenze). Entwicklungen per Item, Freundschaft
+    oder Tausch zählen als erreichbar, außer mit level_only.
+
+    Returns:
+        [{"name", "id", "level", "conditions"}], conditions = die Kanten entlang des Weges
+    """
+    graph = get_evolution_graph()
+    dex_id = get_dex_id(pokemon_name)
+    result = []
+    for target, info in graph["descendants"].get(dex_id, {}).items():
+        if max_level is not None and info["level"] is not None and info["level"] > max_level:
+            continue
+        conditions, parent = [], dex_id
+        for step in info["path"]:
+            conditions.append(next(edge for edge in graph["successors"][parent] if edge["id"] == step))
+            parent = step
+        if level_only and any(edge["level"] is None for edge in conditions):
+            continue
+        result.append({"name": info_manager.get_name_from_id(target), "id": target, "level": info["level"],
+                       "conditions": conditions})
+    return result
+
+
+def describe(conditions: List[Dict[str, Any]]) -> str:
+    """Kurzbeschreibung eines Entwicklungsweges, z. B. "Lv. 16 -> Feuerstein"."""
+    parts = []
+    for edge in conditions:
+        if edge["level"] is not None:
+            text = f"Lv. {edge['level']}"
+        elif edge["item"]:
+            text = edge["item"]
+        elif edge["trade"]:
+            text = "Tausch"
+        elif edge["friendship"]:
+            text = "Freundschaft"
+        else:
+            text = "Sonderbedingung"
+        parts.append(f"{text} ({edge['time']})" if edge["time"] else text)
+    return " -> ".join(parts)
+
+
+def evolution_candidates(owned_list: List[str], max_level: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Erreichbare Entwicklungen aller eigenen Pokémon, die nicht selbst schon im Besitz sind.
+
+    Returns:
+        Entwicklung -> {"base": eigenes Pokémon, "level", "conditions"} (erste Basis gewinnt)
+    """
+    owned = set(owned_list)
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for base in owned_list:
+        for evolution in reachable_evolutions(base, max_level):
+            name = evolution["name"]
+            if name and name not in owned and name not in candidates:
+                candidates[name] = {"base": base, "level": evolution["level"], "conditions": evolution["conditions"]}
+    return candidates
@@ -0,0 +1,186 @@
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import cache_files
+import global_infos
+import info_manager
+import move_table
+from damage_calc import compute_utility_inputs, utility_score
+
+# Bei jeder Änderung an den Features oder ihrer Berechnung erhöhen -> alle Einträge neu
+FEATURE_VERSION = 1
+
+_lock = threading.RLock()
+_entries: Optional[Dict[str, Dict[str, Any]]] = None
+_version: Optional[str] = None
+_dirty = False
+stats = {"hits": 0, "misses": 0}
+
+# Felder eines Attacken-Eintrags, aus denen die Features berechnet werden
+_ATTACK_FIELDS = ("Typ", "Kategorie", "Stärke", "Genauigkeit", "Priority")
+
+
+def get_version() -> str:
+    """Version des Stores: Feature-Version + Standard-Stärke + Heil-Attacken."""
+    healing = hashlib.sha1(json.dumps(sorted(global_infos.HEALING_MOVES), ensure_ascii=False).encode("utf-8"))
+    return f"{FEATURE_VERSION}-{global_infos.default_strength_move}-{healing.hexdigest()[:8]}"
+
+
+def _load() -> Dict[str, Dict[str, Any]]:
+    global _entries, _version
+    if _entries is None:
+        _version = get_version()
+        try:
+            with open(global_infos.FEATURE_STORE_FILE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        _entries = data.get("entries", {}) if data.get("version") == _version else {}
+    return _entries
+
+
+def save():
+    """Schreibt den Store, falls Einträge neu berechnet wurden."""
+    global _dirty
+    with _lock:
+        if not _dirty or _entries is None:
+            return
+        os.makedirs(os.path.dirname(global_infos.FEATURE_STORE_FILE_PATH), exist_ok=True)
+        with open(global_infos.FEATURE_STORE_FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"version": _version, "entries": _entries}, f, ensure_ascii=False)
+        _dirty = False
+
+
+atexit.register(save)
+
+
+def file_signatures(chosen: bool) -> List[Optional[List[int]]]:
+    """
+    Billige Gültigkeitsprüfung: mtime/Größe der Dateien, aus denen Learnsets und Attacken
+    stammen (plus die gespeicherten Movesets, falls genutzt).
+    """
+    paths = [global_infos.POKEMON_CACHE_FILE_PATH, global_infos.ATTACK_CACHE_FILE_PATH]
+    if chosen:
+        paths.append(global_infos.CHOSEN_MOVESETS_FILE_PATH)
+    return [list(signature) if signature else None for signature in map(cache_files.file_signature, paths)]
+
+
+def fingerprint(pokemon_data: Dict[str, Any], attack_lists: List[List[Any]]) -> str:
+    """
+    Hash über alles, was in die Features eingeht: Learnset-Einträge, deren Attacken-Daten
+    und Typen/Angriffswerte des Pokémon (Kategorie-Fallback in move_table).
+    """
+    stats_data = (pokemon_data or {}).get("Statuswerte") or {}
+    moves = []
+    for attack_list in attack_lists or []:
+        for move_meta in attack_list:
+            if not move_meta:
+                continue
+            attack = info_manager.get_attack_in_cache(move_meta.get("Name", "")) or {}
+            moves.append([move_meta.get("Name"), move_meta.get("Kategorie"), [attack.get(f) for f in _ATTACK_FIELDS]])
+    payload = json.dumps([(pokemon_data or {}).get("Typen"), [stats_data.get("Angriff"), stats_data.get("SpAngriff")],
+                          moves], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def compute_features(pokemon_data: Dict[str, Any], attack_lists: List[List[Any]]) -> Dict[str, Any]:
+    """
+    Abgeleitete Features eines Movesets:
+    - best_moves: stärkste Attacken pro (Typ, Kategorie) als kompilierte Attacken (move_table.strongest_moves)
+    - status_count, has_recovery, utility: wie damage_calc.compute_utility_score_for_attacker
+    - priority_moves: [Name, Priorität] aller Attacken mit Priorität > 0
+    """
+    compiled = move_table.compile_moveset(pokemon_data, attack_lists)
+    status_count, has_recovery = compute_utility_inputs(attack_lists)
+    priority_moves = {}
+    for attack_list in attack_lists or []:
+        for move_meta in attack_list:
+            name = (move_meta or {}).get("Name")
+            priority = move_table.parse_priority(info_manager.get_attack_in_cache(name)) if name else 0
+            if priority > 0:
+                priority_moves.setdefault(name, priority)
+    return {
+        "best_moves": [list(move) for move in move_table.strongest_moves(compiled)],
+        "status_count": status_count,
+        "has_recovery": has_recovery,
+        "priority_moves": [[name, priority] for name, priority in priority_moves.items()],
+        "utility": utility_score(status_count, has_recovery),
+    }
+
+
+def get_features(pokemon_name: str, max_level: Optional[int] = None, chosen: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Features eines eigenen Pokémon für sein Learnset bis max_level (bzw. das gespeicherte
+    Moveset, siehe info_manager.get_own_attacks_as_list). Gespeichert pro Pokémon und
+    Level-Band.
+
+    Solange sich die Cache-Dateien nicht geändert haben (file_signatures), gilt ein Eintrag
+    ohne weitere Prüfung. Sonst wird der Fingerprint über Learnset und Attacken-Daten
+    verglichen: gleich -> nur die Signaturen aktualisieren, verschieden -> neu berechnen.
+    """
+    chosen = bool(global_infos.use_chosen_movesets if chosen is None else chosen)
+    key = f"{pokemon_name}|{max_level}|{int(chosen)}"
+    files = file_signatures(chosen)
+    global _dirty
+    with _lock:
+        entry = _load().get(key)
+        if entry is not None and entry.get("files") == files:
+            stats["hits"] += 1
+            return entry["features"]
+
+    pokemon_data = info_manager.get_pokemon_in_cache(pokemon_name)
+    attack_lists = info_manager.get_own_attacks_as_list(pokemon_name, max_level, chosen)
+    current = fingerprint(pokemon_data, attack_lists)
+    with _lock:
+        if entry is not None and entry["fingerprint"] == current:
+            stats["hits"] += 1
+            entry["files"] = files
+            _dirty = True
+            return entry["features"]
+        stats["misses"] += 1
+        features = compute_features(pokemon_data, attack_lists)
+        _load()[key] = {"fingerprint": current, "files": files, "features": features}
+        _dirty = True
+        return features
+
+
+def best_moves(features: Dict[str, Any]) -> List[move_table.CompiledMove]:
+    """Die stärksten Attacken aus den Features als kompiliertes Moveset (für compute_best_damage_*)."""
+    return [tuple(move) for move in features["best_moves"]]
+
+
+def clear():
+    """Leert den Store (auch auf der Platte)."""
+    global _entries, _dirty
+    with _lock:
+        _load()
+        _entries = {}
+        _dirty = True
+        save()
+
+
+def print_stats():
+    print(f" ~ Feature-Store: {stats['hits']} Treffer, {stats['misses']} neu berechnet")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Persistente abgeleitete Features pro eigenem Pokémon.")
+    ap.add_argument("--clear", action="store_true", help="Alle Einträge löschen.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.clear:
+        clear()
+        print("Feature-Store geleert.")
+    print(f"Version: {get_version()}, Einträge: {len(_load())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import html
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import cache_files
+import global_infos
+import name_index
+from information_storage import id_to_name_generator
+
+# Felder, über die gesucht werden kann
+SEARCH_FIELDS = ("trainer_name", "trainer_class", "location", "edition")
+
+# Ranking-Stufen: exakter Treffer > Präfix > Teilstring > unscharfer Treffer (Trigramm-Ähnlichkeit)
+SCORE_EXACT = 3.0
+SCORE_PREFIX = 2.0
+SCORE_SUBSTRING = 1.0
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Kleinschreibung, HTML-Entities auflösen, Whitespace zusammenfassen."""
+    if not text:
+        return ""
+    text = html.unescape(str(text)).replace("\xa0", " ")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def trigrams(text: str, padded: bool = True) -> Set[str]:
+    """Zerlegt einen (normalisierten) Text in Trigramme. Mit padded werden Wortgrenzen mitgezählt."""
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def matches_starter(fight: Dict[str, Any], starter: Optional[str]) -> bool:
+    """
+    True, wenn der Kampf zum gewählten Starter passt. Kämpfe ohne Starter-Variante
+    passen immer; starter=None lässt alle Varianten durch.
+    """
+    if not starter:
+        return True
+    fight_starter = fight.get("starter")
+    return not fight_starter or fight_starter.lower() == starter.lower()
+
+
+def normalize_pokemon_id(poke_id: Any) -> str:
+    """'832', '0832' und 832 landen alle auf '0832' (Format aus id_to_name.json)."""
+    return id_to_name_generator.format_id_string(str(poke_id).strip())
+
+
+class FightIndex:
+    """
+    Einmal aufgebauter Index über alle Kämpfe aus fight_data.json.
+
+    Pro Suchfeld:
+    - exakter Index:     normalisierter Wert -> Kampf-Indizes
+    - Präfix-Index:      sortierte Liste der Werte (Suche per bisect)
+    - Trigramm-Index:    Trigramm -> Werte (für Teilstring- und unscharfe Suche)
+    Zusätzlich Sekundär-Indizes über Pokémon-IDs und Attacken in den Teams.
+
+    Der Index enthält alle Starter-Varianten eines Kampfes. Über den Parameter
+    `starter` der Abfragen wird die passende Variante erst beim Abfragen gewählt
+    (None = alle Varianten).
+    """
+
+    def __init__(self, fights: List[Dict[str, Any]]):
+        self.fights = fights
+
+        self._exact: Dict[str, Dict[str, List[int]]] = {f: defaultdict(list) for f in SEARCH_FIELDS}
+        self._sorted_values: Dict[str, List[str]] = {}
+        self._trigrams: Dict[str, Dict[str, Set[str]]] = {f: defaultdict(set) for f in SEARCH_FIELDS}
+        self._padded_trigrams: Dict[str, Dict[str, Set[str]]] = {f: {} for f in SEARCH_FIELDS}
+
+        self._by_pokemon_id: Dict[str, List[int]] = defaultdict(list)
+        self._by_move: Dict[str, List[int]] = defaultdict(list)
+
+        for fight_idx, fight in enumerate(fights):
+            for field in SEARCH_FIELDS:
+                value = normalize_search_text(fight.get(field))
+                if value:
+                    self._exact[field][value].append(fight_idx)
+
+            seen_ids = set()
+            seen_moves = set()
+            for pkm in fight.get("team", []):
+                if pkm.get("id"):
+                    seen_ids.add(normalize_pokemon_id(pkm["id"]))
+                for move_name in pkm.get("moves", []):
+                    if move_name:
+                        seen_moves.add(name_index.canonical_key(move_name))
+            for poke_id in seen_ids:
+                self._by_pokemon_id[poke_id].append(fight_idx)
+            for move_name in seen_moves:
+                self._by_move[move_name].append(fight_idx)
+
+        for field in SEARCH_FIELDS:
+            values = sorted(self._exact[field])
+            self._sorted_values[field] = values
+            for value in values:
+                for gram in trigrams(value, padded=False):
+                    self._trigrams[field][gram].add(value)
+                self._padded_trigrams[field][value] = trigrams(value)
+
+    # --- Hilfsfunktionen ---
+
+    def _fights_for_values(self, field: str, values: Iterable[str], starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        indices = set()
+        for value in values:
+            indices.update(self._exact[field].get(value, ()))
+        return self._select(sorted(indices), starter)
+
+    def _select(self, indices: Iterable[int], starter: Optional[str]) -> List[Dict[str, Any]]:
+        return [self.fights[i] for i in indices if matches_starter(self.fights[i], starter)]
+
+    def _matching_values(self, field: str, text: str) -> List[str]:
+        """Alle Werte eines Feldes, die text als Teilstring enthalten."""
+        if len(text) < 3:
+            return [v for v in self._sorted_values[field] if text in v]
+
+        postings = self._trigrams[field]
+        candidates: Optional[Set[str]] = None
+        # Kleinste Posting-Listen zuerst schneiden
+        for gram in sorted(trigrams(text, padded=False), key=lambda g: len(postings.get(g, ()))):
+            values = postings.get(gram)
+            if not values:
+                return []
+            candidates = set(values) if candidates is None else candidates & values
+            if not candidates:
+                return []
+        return [v for v in candidates if text in v]
+
+    def _prefix_values(self, field: str, prefix: str) -> List[str]:
+        values = self._sorted_values[field]
+        start = bisect_left(values, prefix)
+        end = bisect_left(values, prefix + "￿")
+        return values[start:end]
+
+    # --- Öffentliche Abfragen ---
+
+    def find_exact(self, field: str, value: str, starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kämpfe, deren Feld exakt (normalisiert) dem Wert entspricht."""
+        return self._fights_for_values(field, [normalize_search_text(value)], starter)
+
+    def find_prefix(self, field: str, prefix: str, starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kämpfe, deren Feld mit dem Präfix beginnt."""
+        prefix = normalize_search_text(prefix)
+        if not prefix:
+            return []
+        return self._fights_for_values(field, self._prefix_values(field, prefix), starter)
+
+    def find_substring(self, field: str, text: str, starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kämpfe, deren Feld den Text enthält (Reihenfolge wie in fight_data.json)."""
+        text = normalize_search_text(text)
+        if not text:
+            return []
+        return self._fights_for_values(field, self._matching_values(field, text), starter)
+
+    def variants_by_starter(self, trainer_name: str) -> Dict[Optional[str], List[Dict[str, Any]]]:
+        """
+        Alle Varianten der Kämpfe eines Trainers, gruppiert nach Starter
+        (z. B. zum Vergleich aller drei Starter). Schlüssel None = unabhängig vom Starter.
+        """
+        grouped: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+        for fight in self.find_substring("trainer_name", trainer_name):
+            grouped[fight.get("starter")].append(fight)
+        return dict(grouped)
+
+    def search(self, query: str, fields: Iterable[str] = SEARCH_FIELDS, limit: int = 10,
+               min_similarity: float = 0.3, starter: Optional[str] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Rangierte, unscharfe Suche über mehrere Felder.
+
+        Exakte Treffer vor Präfix- vor Teilstring-Treffern, danach unscharfe Treffer
+        nach Trigramm-Ähnlichkeit (Dice-Koeffizient, 0..1).
+
+        Returns:
+            Liste von (Score, Kampf), bester Treffer zuerst.
+        """
+        query = normalize_search_text(query)
+        if not query:
+            return []
+        query_grams = trigrams(query)
+
+        best_per_fight: Dict[int, float] = {}
+
+        def add(values: Iterable[str], field: str, score_fn):
+            for value in values:
+                score = score_fn(value)
+                for fight_idx in self._exact[field].get(value, ()):
+                    if score > best_per_fight.get(fight_idx, 0.0):
+                        best_per_fight[fight_idx] = score
+
+        for field in fields:
+            padded = self._padded_trigrams[field]
+
+            def similarity(value: str) -> float:
+                grams = padded[value]
+                return 2.0 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+            add(self._matching_values(field, query), field,
+                lambda v: (SCORE_EXACT if v == query else SCORE_PREFIX if v.startswith(query) else SCORE_SUBSTRING)
+                + similarity(v))
+
+            # Unscharfe Kandidaten: alle Werte, die mindestens ein Trigramm teilen
+            candidates = set()
+            postings = self._trigrams[field]
+            for gram in trigrams(query, padded=False):
+                candidates.update(postings.get(gram, ()))
+            fuzzy = [v for v in candidates if similarity(v) >= min_similarity]
+            add(fuzzy, field, similarity)
+
+        ranked = sorted(best_per_fight.items(), key=lambda item: (-item[1], item[0]))
+        ranked = [(score, self.fights[i]) for i, score in ranked if matches_starter(self.fights[i], starter)]
+        return ranked[:limit]
+
+    def fights_with_pokemon(self, poke_id: Any, starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Alle Kämpfe, in denen ein Pokémon mit dieser Dex-Nummer vorkommt."""
+        return self._select(self._by_pokemon_id.get(normalize_pokemon_id(poke_id), []), starter)
+
+    def fights_with_move(self, move_name: str, starter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Alle Kämpfe, in denen ein gegnerisches Pokémon diese Attacke nutzt."""
+        return self._select(self._by_move.get(name_index.canonical_key(move_name), []), starter)
+
+
+_index: Optional[FightIndex] = None
+_indexed_fights: Optional[List[Dict[str, Any]]] = None
+
+
+def get_fight_index(json_path: str = global_infos.FIGHT_DATA_FILE_PATH) -> FightIndex:
+    """
+    Liefert den Kampf-Index. Er wird nur einmal aufgebaut und erst neu erstellt,
+    wenn sich fight_data.json ändert.
+    """
+    global _index, _indexed_fights
+    fights = cache_files.load_json_cached(json_path, [])
+    if not isinstance(fights, list):
+        print("[WARN] JSON enthält keine Liste.")
+        fights = []
+    if _index is None or fights is not _indexed_fights:
+        _index = FightIndex(fights)
+        _indexed_fights = fights
+    return _index
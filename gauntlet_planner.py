@@ -0,0 +1,278 @@
+import argparse
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import campaign
+import compiled_snapshot
+import global_infos
+import incremental_analysis
+import negative_cache
+import prefetch
+import team_optimizer
+
+# Start-Kandidaten: die Teams der letzten Beam-Stufe pro Kampf
+GAUNTLET_BEAM_WIDTH = 32
+# Obergrenze der Team-Zustände (die DP-Übergänge wachsen quadratisch)
+MAX_STATES = 3000
+# Toleranz beim Festhalten des Worst-Case-Werts in der zweiten DP-Phase
+VALUE_EPS = 1e-9
+
+
+def group_gauntlets(fights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aufeinanderfolgende Kämpfe am selben Ort (Reihenfolge wie in fight_data.json)."""
+    groups: List[Dict[str, Any]] = []
+    for fight in fights:
+        if groups and groups[-1]["location"] == fight.get("location"):
+            groups[-1]["fights"].append(fight)
+        else:
+            groups.append({"location": fight.get("location"), "fights": [fight]})
+    return groups
+
+
+def build_problems(snapshot: Dict[str, Any], weights: List[float]) -> List[Dict[str, Any]]:
+    """
+    Ein Team-Problem (team_optimizer.make_problem) pro Kampf aus den Counter-Matrizen der
+    Kampagne; Kämpfe ohne bewertbare Gegner bekommen None.
+    """
+    problems = []
+    for fight, info in enumerate(snapshot["fights"]):
+        if not info["opponents"]:
+            problems.append(None)
+            continue
+        _, scores = campaign.fight_scores(snapshot, fight, weights)
+        problems.append(team_optimizer.make_problem(snapshot["owned_names"], info["opponents"],
+                                                    scores["counter_score"], scores["exposure"]))
+    return problems
+
+
+def team_mask(members: Sequence[int]) -> int:
+    mask = 0
+    for i in members:
+        mask |= 1 << int(i)
+    return mask
+
+
+def mask_members(mask: int) -> List[int]:
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def neighbours(mask: int, n: int) -> List[int]:
+    """Alle Teams, die sich durch genau einen Tausch ergeben."""
+    members = mask_members(mask)
+    outside = [i for i in range(n) if not mask >> i & 1]
+    return [mask ^ (1 << out) ^ (1 << into) for out in members for into in outside]
+
+
+def evaluate_states(problems: List[Dict[str, Any]], memo: Dict[int, np.ndarray], masks: List[int],
+                    weights: Sequence[float]) -> np.ndarray:
+    """
+    Team-Scores aller Zustände in allen Kämpfen (Kämpfe x Zustände). Werte sind pro
+    Team-Bitmaske memoisiert, neu berechnet werden nur unbekannte Teams (vektorisiert).
+    """
+    new = [mask for mask in masks if mask not in memo]
+    if new:
+        teams = np.array([mask_members(mask) for mask in new])
+        values = np.array([team_optimizer.team_values(problem, teams, weights) for problem in problems])
+        for s, mask in enumerate(new):
+            memo[mask] = values[:, s]
+    return np.array([memo[mask] for mask in masks]).T
+
+
+def transitions(masks: List[int], n: int, size: int, max_swaps: Optional[int]) -> np.ndarray:
+    """Erlaubte Wechsel (Zustände x Zustände): höchstens max_swaps Tausche (None = beliebig)."""
+    if max_swaps is None:
+        return np.ones((len(masks), len(masks)), dtype=bool)
+    members = np.array([[mask >> i & 1 for i in range(n)] for mask in masks], dtype=np.int32)
+    return members @ members.T >= size - max_swaps
+
+
+def _dp(values: np.ndarray, allowed: np.ndarray, combine) -> tuple:
+    """
+    Vorwärts-DP über die Kämpfe: best[s] = bester Wert eines Plans, der im aktuellen Kampf
+    Zustand s nutzt; combine verknüpft Vorgänger und aktuellen Kampf (np.minimum bzw. np.add).
+
+    Returns:
+        (Wert, Zustands-Index pro Kampf)
+    """
+    best = values[0].copy()
+    back = []
+    for k in range(1, len(values)):
+        previous = np.where(allowed, best[None, :], -np.inf)
+        arg = previous.argmax(axis=1)
+        back.append(arg)
+        best = combine(previous[np.arange(len(arg)), arg], values[k])
+    path = [int(best.argmax())]
+    value = float(best[path[0]])
+    for arg in reversed(back):
+        path.append(int(arg[path[-1]]))
+    return value, path[::-1]
+
+
+def solve(values: np.ndarray, allowed: np.ndarray) -> Dict[str, Any]:
+    """
+    Bester Plan in zwei Phasen: zuerst der höchste Worst-Case-Wert über alle Kämpfe (Max-Min),
+    dann unter allen Plänen, die ihn halten, die höchste Summe.
+    """
+    worst, _ = _dp(values, allowed, np.minimum)
+    feasible = np.where(values >= worst - VALUE_EPS, values, -np.inf)
+    total, path = _dp(feasible, allowed, np.add)
+    return {"worst": worst, "total": total, "path": path}
+
+
+def greedy_plan(values: np.ndarray, allowed: np.ndarray) -> List[int]:
+    """Vergleich: jeder Kampf einzeln das beste Team, das vom vorigen aus erreichbar ist."""
+    path = [int(values[0].argmax())]
+    for k in range(1, len(values)):
+        path.append(int(np.where(allowed[:, path[-1]], values[k], -np.inf).argmax()))
+    return path
+
+
+def plan_gauntlet(problems: List[Dict[str, Any]], size: int, weights: Sequence[float],
+                  max_swaps: Optional[int] = None, time_limit: Optional[float] = None,
+                  beam_width: int = GAUNTLET_BEAM_WIDTH, max_states: int = MAX_STATES) -> Dict[str, Any]:
+    """
+    Team-Plan über eine Folge von Kämpfen: pro Kampf ein Team, zwischen zwei Kämpfen höchstens
+    max_swaps Tausche. Maximiert wird der schlechteste Team-Score über alle Kämpfe.
+
+    Start-Zustände sind die Beam-Teams aller Kämpfe. Danach werden die Ein-Tausch-Nachbarn
+    der Teams an der engsten Stelle des Plans (und der Kämpfe davor/danach) ergänzt und die
+    DP wiederholt, bis sich nichts mehr verbessert oder time_limit erreicht ist.
+
+    Returns:
+        Dict mit "teams" (Mitglieder pro Kampf), "values" (Team-Score pro Kampf), "worst",
+        "greedy" (Worst-Case des Kampf-für-Kampf-Plans) und "stats"
+    """
+    max_swaps = global_infos.gauntlet_max_swaps if max_swaps is None else max_swaps
+    max_swaps = None if max_swaps < 0 else max_swaps
+    time_limit = global_infos.gauntlet_time_limit if time_limit is None else time_limit
+    start = time.perf_counter()
+    n = len(problems[0]["names"])
+    size = min(size, n)
+
+    masks: List[int] = []
+    for problem in problems:
+        masks.extend(team_mask(team) for team in team_optimizer.beam_teams(problem, size, weights, beam_width))
+    masks = list(dict.fromkeys(masks))
+    memo: Dict[int, np.ndarray] = {}
+    stats = {"rounds": 0, "timeout": False}
+
+    values = evaluate_states(problems, memo, masks, weights)
+    allowed = transitions(masks, n, size, max_swaps)
+    greedy = greedy_plan(values, allowed)
+    greedy_worst = float(min(values[k, s] for k, s in enumerate(greedy)))
+    plan = solve(values, allowed)
+    while True:
+        if time.perf_counter() - start > time_limit:
+            stats["timeout"] = True
+            break
+        plan_values = values[np.arange(len(problems)), plan["path"]]
+        bottleneck = int(plan_values.argmin())
+        focus = range(max(0, bottleneck - 1), min(len(problems), bottleneck + 2))
+        known = set(masks)
+        new = list(dict.fromkeys(mask for k in focus for mask in neighbours(masks[plan["path"][k]], n)
+                                 if mask not in known))[:max(0, max_states - len(masks))]
+        if not new:
+            break
+        masks.extend(new)
+        values = evaluate_states(problems, memo, masks, weights)
+        allowed = transitions(masks, n, size, max_swaps)
+        improved = solve(values, allowed)
+        stats["rounds"] += 1
+        better = improved["worst"] > plan["worst"] + VALUE_EPS or \
+            (improved["worst"] >= plan["worst"] - VALUE_EPS and improved["total"] > plan["total"] + VALUE_EPS)
+        plan = improved
+        if not better:
+            break
+
+    stats.update(states=len(masks), seconds=time.perf_counter() - start, max_swaps=max_swaps)
+    return {
+        "teams": [mask_members(masks[s]) for s in plan["path"]],
+        "values": [float(values[k, s]) for k, s in enumerate(plan["path"])],
+        "worst": plan["worst"],
+        "greedy": greedy_worst,
+        "stats": stats,
+    }
+
+
+def print_report(snapshot: Dict[str, Any], fights: List[int], problems: List[Dict[str, Any]], plan: Dict[str, Any]):
+    names = snapshot["owned_names"]
+    stats = plan["stats"]
+    swaps = "beliebig" if stats["max_swaps"] is None else stats["max_swaps"]
+    print(f"\n=== Gauntlet: {len(fights)} Kämpfe, {len(names)} eigene Pokémon, Tausche pro Kampf: {swaps} ===")
+    previous: List[int] = []
+    for fight, problem, team, value in zip(fights, problems, plan["teams"], plan["values"]):
+        info = snapshot["fights"][fight]
+        coverage = problem["scores"][team].max(axis=0)
+        weakest = int(coverage.argmin())
+        print(f"\n{info['trainer_name']} ({info['location']}, Lv. {info['level']}) — Team-Score: {value:.2f}")
+        print(f"   | Team: {', '.join(names[i] for i in team)}")
+        if previous:
+            out = [names[i] for i in previous if i not in team]
+            into = [names[i] for i in team if i not in previous]
+            if out:
+                print(f"   | Tausch: {', '.join(out)} -> {', '.join(into)}")
+        print(f"   | schwächste Abdeckung: {info['opponents'][weakest]} ({coverage[weakest]:.2f})")
+        previous = team
+
+    print("\n=== Plan ===")
+    print(f" - schlechtester Team-Score: {plan['worst']:.2f} (Kampf für Kampf: {plan['greedy']:.2f})")
+    print(f" - {stats['states']} Team-Zustände, {stats['rounds']} Verbesserungsrunden, {stats['seconds']:.2f}s"
+          f"{' (Zeitlimit erreicht)' if stats['timeout'] else ''}")
+
+
+def run(location: Optional[str] = None, edition: Optional[str] = None, trainer: Optional[str] = None,
+        size: int = global_infos.team_size, max_swaps: Optional[int] = None,
+        time_limit: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    fights = campaign.select_fights(location, edition, trainer)
+    owned_list = global_infos.owned_pokemon_list
+    print(f" ~ {len(fights)} Kämpfe ausgewählt")
+    if not fights:
+        return None
+
+    prefetch.print_warmup_report(campaign.warmup_campaign(fights, owned_list))
+    with negative_cache.offline_mode():
+        snapshot = compiled_snapshot.build_snapshot(owned_list, fights, global_infos.level_aware_moves)
+        problems = build_problems(snapshot, incremental_analysis.get_weights())
+    order = [fight for fight, problem in enumerate(problems) if problem is not None]
+    if not order or not snapshot["owned_names"]:
+        print("Keine bewertbaren Kämpfe.")
+        return None
+
+    plan = plan_gauntlet([problems[fight] for fight in order], size, team_optimizer.get_team_weights(),
+                         max_swaps, time_limit)
+    print_report(snapshot, order, [problems[fight] for fight in order], plan)
+    return plan
+
+
+def print_gauntlets(edition: Optional[str] = None):
+    for group in group_gauntlets(campaign.select_fights(edition=edition)):
+        trainers = ", ".join(fight.get("trainer_name") or "?" for fight in group["fights"])
+        print(f" {len(group['fights']):3d}  {group['location']}: {trainers}")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Team-Plan über eine Folge von Kämpfen (z. B. Arenen, Champ-Cup).")
+    ap.add_argument("--location", help="Nur Kämpfe, deren Ort diesen Text enthält.")
+    ap.add_argument("--edition", help="Nur Kämpfe dieser Edition (z. B. SWSH).")
+    ap.add_argument("--trainer", help="Nur Kämpfe, deren Trainername diesen Text enthält.")
+    ap.add_argument("--size", type=int, default=global_infos.team_size, help="Teamgröße.")
+    ap.add_argument("--max-swaps", type=int, help="Tausche zwischen zwei Kämpfen (-1 = beliebig), "
+                                                  "Standard: global_infos.gauntlet_max_swaps.")
+    ap.add_argument("--time-limit", type=float, help="Zeitlimit der Suche in Sekunden, "
+                                                     "Standard: global_infos.gauntlet_time_limit.")
+    ap.add_argument("--list", action="store_true", help="Kämpfe nach Ort gruppiert ausgeben.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        print_gauntlets(args.edition)
+        return
+    run(args.location, args.edition, args.trainer, args.size, args.max_swaps, args.time_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,19 @@ HEALING_MOVES = {
     "vitalglocke","heilung","aromakur","mutschub"  # "Heilblockade" ist kein Heil-Move, daher nicht enthalten
 }
 
+# Doppelkampf: Attacken, die beide Gegner treffen (Schaden x SPREAD_DAMAGE_MULTIPLIER) ...
+SPREAD_MOVES = {
+    "hitzewelle","blizzard","steinhagel","eissturm","schallwelle","zauberschein","elektronetz",
+    "standpauke","windschnitt","rasierblatt","sternschauer","pulverschnee","säure","windhose",
+    "käfertrutz"
+}
+# ... und solche, die zusätzlich den eigenen Partner treffen
+ALLY_SPREAD_MOVES = {
+    "erdbeben","surfer","dampfwalze","ladungsstoß","explosion","finale","blütenwirbel","flammensturm"
+}
+SPREAD_DAMAGE_MULTIPLIER = 0.75
+DOUBLES_BATTLE_TYPES = {"Doppelkampf", "Multikampf", "Multikampf-Partner", "Dyna-Kampf-Partner"}
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 POKEMON_CACHE_FILE_PATH = os.path.join(
     BASE_DIR, "information_storage", "pokemon_knowledge_cache.json"
@@ -25,6 +38,27 @@ ATTACK_CACHE_FILE_PATH = os.path.join(
     BASE_DIR, "information_storage", "attack_cache.json"
 )
 ATTACK_CACHE_FILE_PATH = os.path.abspath(ATTACK_CACHE_FILE_PATH)
+FIGHT_DATA_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "fight_data.json"
+)
+NEGATIVE_CACHE_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "negative_cache.json"
+)
+TYPE_CHART_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "pokemon_type_effectiveness.json"
+)
+MATCHUP_MEMO_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "matchup_memo.json"
+)
+ANALYSIS_STATE_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "analysis_state.json"
+)
+FEATURE_STORE_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "feature_store.json"
+)
+CHOSEN_MOVESETS_FILE_PATH = os.path.join(
+    BASE_DIR, "information_storage", "chosen_movesets.json"
+)
 
 EFFECTIVENESS_GROUPS = [0.0, 0.25, 0.5, 1.0, 2.0, 4.0]
 EFFECTIVENESS_LABELS = ["0×", "¼×", "½×", "1×", "2×", "4×"]
@@ -54,6 +88,30 @@ w_surv = 3.0
 w_util = 0.5
 w_expo = 1.0
 
+# Team-Optimierung (team_optimizer.py)
+team_size = 6
+team_w_mean = 0.25  # Gewicht der mittleren Abdeckung (neben der schlechtesten)
+team_w_expo = 10.0  # Strafe pro Exposure (0..1) eines Teammitglieds
+team_w_type = 5.0   # Strafe pro doppeltem Typ-Vorkommen im Team (wer beide Typen doppelt, zählt zweimal)
+
+# Gauntlet-Planer (gauntlet_planner.py): Tausche zwischen zwei Kämpfen (-1 = beliebig) und Zeitlimit in Sekunden
+gauntlet_max_swaps = 1
+gauntlet_time_limit = 5.0
+
+# Fang-Planer (catch_planner.py): Einfluss der Fangrate auf den Wert eines Kandidaten (0..1)
+catch_w_rate = 0.3
+
+# Nur Attacken werten, die unsere Pokémon auf dem Level des Kampfes kennen können
+# (LevelUp-Attacken bis zum höchsten Gegner-Level + alle TM/TP)
+level_aware_moves = False
+
+# Statt des ganzen Learnsets nur die 4 Attacken aus moveset_optimizer.py (--save) werten
+use_chosen_movesets = False
+
+# Level der eigenen Pokémon für die Schadensverteilung (damage_distribution.py);
+# None = höchstes Gegner-Level des Kampfes
+own_pokemon_level = None
+
 owned_pokemon_list = [
     "Vulnona", "Rexblisar", "Flunschlik", "Golgantes", "Strepoli", "Piondragi",
     "Intelleon", "Psiaugon", "Smogon", "Schalellos", "Olangaar", "Maritellit",
@@ -0,0 +1,252 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+import feature_store
+import global_infos
+import info_manager
+import learnset_index
+import matchup_memo
+import move_table
+import scoring
+from damage_calc import compute_best_damage_memoized
+
+# Erhöhen, sobald sich der Aufbau des Zustands ändert
+STATE_VERSION = 1
+
+# Felder, die pro eigenem Pokémon eine Zeile haben (own -> ...)
+_OWN_ROW_FIELDS = ("raw_p2o", "best_p2o", "damage_p2o", "utility", "exposure", "counter_raw", "counter_score")
+# Felder mit einer Spalte pro eigenem Pokémon (opp -> own -> ...)
+_OPP_ROW_FIELDS = ("raw_o2p", "best_o2p", "damage_o2p")
+
+
+def get_weights() -> List[float]:
+    return [global_infos.w_dmg, global_infos.w_surv, global_infos.w_util, global_infos.w_expo]
+
+
+def get_opponent_names(opponent_team: List[Dict[str, Any]]) -> List[str]:
+    return [info_manager.get_name_from_id(p["id"]) for p in opponent_team]
+
+
+def get_signature(opponent_team: List[Dict[str, Any]], fight_level: Optional[int]) -> str:
+    """
+    Alles, wovon die gespeicherten Matrizen außer der eigenen Pokémon-Liste abhängen.
+    Ändert sich etwas davon, wird komplett neu gerechnet.
+    """
+    team = [[p["id"], p.get("level"), p.get("moves")] for p in opponent_team]
+    # gespeicherte Movesets ändern die eigenen Zeilen, ohne dass sich die Pokémon-Liste ändert
+    chosen = learnset_index.get_chosen_movesets() if global_infos.use_chosen_movesets else None
+    return json.dumps([STATE_VERSION, matchup_memo.get_version(), fight_level, team, chosen], ensure_ascii=False)
+
+
+def empty_state(signature: str) -> Dict[str, Any]:
+    state = {"signature": signature, "weights": None, "vmin": None, "vmax": None, "cr_min": None, "cr_max": None}
+    for field in _OWN_ROW_FIELDS + _OPP_ROW_FIELDS:
+        state[field] = {}
+    return state
+
+
+def load_state() -> Optional[Dict[str, Any]]:
+    try:
+        with open(global_infos.ANALYSIS_STATE_FILE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_state(state: Dict[str, Any]):
+    with open(global_infos.ANALYSIS_STATE_FILE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+
+
+def _update_bounds(old_bounds: Tuple[Optional[float], Optional[float]], removed: Iterable[float],
+                   added: Iterable[float], all_values) -> Tuple[float, float]:
+    """
+    Neue (min, max) nach Entfernen/Hinzufügen von Werten. Nur wenn ein entfernter Wert
+    eine der alten Grenzen war (oder es keine gibt), wird über alle Werte neu gesucht.
+    """
+    lo, hi = old_bounds
+    if lo is None or any(v == lo or v == hi for v in removed):
+        values = list(all_values())
+        return min(values), max(values)
+    added = list(added)
+    return min([lo] + added), max([hi] + added)
+
+
+def _store_rows(target: Dict[str, Dict[str, float]], rows: List[str], cols: List[str], matrix: np.ndarray):
+    for name, values in zip(rows, matrix.tolist()):
+        target[name] = dict(zip(cols, values))
+
+
+def _store_columns(target: Dict[str, Dict[str, float]], rows: List[str], cols: List[str], matrix: np.ndarray):
+    for col, values in zip(cols, matrix.T.tolist()):
+        target.setdefault(col, {}).update(zip(rows, values))
+
+
+def _damage_values(state: Dict[str, Any]):
+    for row in state["raw_p2o"].values():
+        yield from row.values()
+    for row in state["raw_o2p"].values():
+        yield from row.values()
+
+
+def _counter_values(state: Dict[str, Any]):
+    for row in state["counter_raw"].values():
+        yield from row.values()
+
+
+def _remove_rows(state: Dict[str, Any], removed: List[str]) -> Tuple[List[float], List[float]]:
+    """Entfernt Zeilen/Spalten; liefert die entfernten Schadens- und Counter-Rohwerte."""
+    removed_damage, removed_counter = [], []
+    for own_name in removed:
+        removed_damage.extend(state["raw_p2o"].get(own_name, {}).values())
+        removed_counter.extend(state["counter_raw"].get(own_name, {}).values())
+        for field in _OWN_ROW_FIELDS:
+            state[field].pop(own_name, None)
+        for field in _OPP_ROW_FIELDS:
+            for row in state[field].values():
+                value = row.pop(own_name, None)
+                if field == "raw_o2p" and value is not None:
+                    removed_damage.append(value)
+    return removed_damage, removed_counter
+
+
+def _compute_rows(state: Dict[str, Any], added: List[str], opponent_team: List[Dict[str, Any]],
+                  fight_level: Optional[int]) -> List[float]:
+    """Schadenswerte beider Richtungen für die neuen eigenen Pokémon; liefert die neuen Rohwerte."""
+    new_values = []
+    if not added:
+        return new_values
+
+    opp_compiled = {}
+    for opp_fight_data_pkm in opponent_team:
+        opp_name = info_manager.get_name_from_id(opp_fight_data_pkm["id"])
+        attack_list = [[info_manager.get_attack_in_cache(move) for move in opp_fight_data_pkm["moves"]]]
+        opp_compiled[opp_name] = move_table.compile_moveset(info_manager.get_pokemon_in_cache(opp_name), attack_list)
+
+    with tqdm(total=len(added) * len(opponent_team) * 2, desc="Gesamtanalyse") as pbar:
+        for own_name in added:
+            own_pkm = info_manager.get_pokemon_in_cache(own_name)
+            # stärkste Attacke pro (Typ, Kategorie) reicht für den besten Schaden, siehe feature_store
+            features = feature_store.get_features(own_name, fight_level)
+            own_compiled = feature_store.best_moves(features)
+            state["utility"][own_name] = features["utility"]
+
+            state["raw_p2o"][own_name] = {}
+            state["best_p2o"][own_name] = {}
+            for opp_name in get_opponent_names(opponent_team):
+                opp_pkm = info_manager.get_pokemon_in_cache(opp_name)
+
+                best_raw, best_move = compute_best_damage_memoized(own_pkm, own_name, opp_pkm, own_compiled)
+                state["raw_p2o"][own_name][opp_name] = best_raw
+                state["best_p2o"][own_name][opp_name] = best_move
+                new_values.append(best_raw)
+                pbar.update(1)
+
+                best_raw, best_move = compute_best_damage_memoized(opp_pkm, opp_name, own_pkm, opp_compiled[opp_name])
+                state["raw_o2p"].setdefault(opp_name, {})[own_name] = best_raw
+                state["best_o2p"].setdefault(opp_name, {})[own_name] = best_move
+                new_values.append(best_raw)
+                pbar.update(1)
+
+    matchup_memo.save()
+    feature_store.save()
+    return new_values
+
+
+def update(state: Optional[Dict[str, Any]], opponent_team: List[Dict[str, Any]], owned_list: List[str],
+           fight_level: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Bringt den Analyse-Zustand des letzten Laufs auf den Stand von owned_list und den
+    aktuellen Gewichten:
+
+    - hinzugekommene Pokémon: nur deren Zeilen (beide Richtungen) werden berechnet
+    - entfernte Pokémon: deren Zeilen werden gelöscht
+    - vmin/vmax und cr_min/cr_max werden inkrementell nachgeführt; nur wenn sich eine
+      Grenze ändert, wird alles neu normalisiert
+    - reine Gewichtsänderungen rechnen keinen Schaden neu, nur die Counter-Scores
+
+    Ein leerer oder zu einem anderen Kampf gehörender Zustand führt zur vollen Berechnung.
+
+    Returns:
+        (neuer Zustand, Report über die durchgeführten Schritte)
+    """
+    signature = get_signature(opponent_team, fight_level)
+    if state is None or state.get("signature") != signature:
+        state = empty_state(signature)
+    opp_names = get_opponent_names(opponent_team)
+    owned_set = set(owned_list)
+
+    added = [name for name in dict.fromkeys(owned_list) if name not in state["raw_p2o"]]
+    removed = [name for name in state["raw_p2o"] if name not in owned_set]
+    report = {"added": added, "removed": removed, "renormalized": False, "weights_changed": False,
+              "counter_renormalized": False, "empty": False}
+
+    removed_damage, removed_counter = _remove_rows(state, removed)
+    new_damage = _compute_rows(state, added, opponent_team, fight_level)
+
+    # Falls keine Werte vorhanden (leere Pools) handle edge-case
+    if not state["raw_p2o"] or not opp_names:
+        report["empty"] = True
+        return state, report
+
+    unique_opps = list(dict.fromkeys(opp_names))
+    slots = [unique_opps.index(name) for name in opp_names]
+
+    # --- Normalisierung der Schadenswerte ---
+    old_bounds = (state["vmin"], state["vmax"])
+    vmin, vmax = _update_bounds(old_bounds, removed_damage, new_damage, lambda: _damage_values(state))
+    state["vmin"], state["vmax"] = vmin, vmax
+    report["renormalized"] = (vmin, vmax) != old_bounds
+    rows = list(state["raw_p2o"]) if report["renormalized"] else added
+
+    damage = scoring.normalize_damage(scoring.rows_to_matrix(state["raw_p2o"], rows, unique_opps), vmin, vmax)
+    incoming = scoring.normalize_damage(scoring.columns_to_matrix(state["raw_o2p"], rows, unique_opps), vmin, vmax)
+    _store_rows(state["damage_p2o"], rows, unique_opps, damage)
+    _store_columns(state["damage_o2p"], rows, unique_opps, incoming)
+    # exposure: Mittelwert über alle Gegner-Slots (doppelte Gegner zählen doppelt)
+    state["exposure"].update(zip(rows, scoring.exposure_scores(incoming[:, slots]).tolist()))
+
+    # --- Counter-Scores ---
+    weights = get_weights()
+    report["weights_changed"] = state["weights"] is not None and state["weights"] != weights
+    state["weights"] = weights
+    if report["renormalized"] or report["weights_changed"]:
+        rows = list(state["raw_p2o"])
+
+    counter_raw = scoring.counter_raw_scores(
+        scoring.rows_to_matrix(state["damage_p2o"], rows, unique_opps),
+        scoring.columns_to_matrix(state["damage_o2p"], rows, unique_opps),
+        np.array([state["utility"].get(name, 0.0) for name in rows]),
+        np.array([state["exposure"].get(name, 0.0) for name in rows]),
+        weights,
+    )
+    _store_rows(state["counter_raw"], rows, unique_opps, counter_raw)
+    new_counter = counter_raw.ravel().tolist()
+
+    if len(rows) == len(state["raw_p2o"]):
+        # alle Zeilen neu -> Grenzen komplett neu bestimmen
+        old_cr_bounds = (None, None)
+    else:
+        old_cr_bounds = (state["cr_min"], state["cr_max"])
+    cr_min, cr_max = _update_bounds(old_cr_bounds, removed_counter, new_counter, lambda: _counter_values(state))
+    report["counter_renormalized"] = (cr_min, cr_max) != (state["cr_min"], state["cr_max"])
+    state["cr_min"], state["cr_max"] = cr_min, cr_max
+    if report["counter_renormalized"]:
+        rows = list(state["raw_p2o"])
+        counter_raw = scoring.rows_to_matrix(state["counter_raw"], rows, unique_opps)
+
+    _store_rows(state["counter_score"], rows, unique_opps, scoring.normalize_counter(counter_raw, cr_min, cr_max))
+
+    return state, report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f" ~ Inkrementelle Analyse: +{len(report['added'])} / -{len(report['removed'])} Pokémon"
+          f"{', Gewichte geändert' if report['weights_changed'] else ''}")
+    if report["renormalized"]:
+        print("   | Schadens-Grenzen geändert -> alle Werte neu normalisiert")
+    if report["counter_renormalized"]:
+        print("   | Counter-Grenzen geändert -> alle Counter-Scores neu normalisiert")
@@ -1,8 +1,11 @@
-import json
 from typing import Any, Dict, List, Optional
 
 import attack_web_scraper
-from information_storage import id_to_name_generator, fight_to_json_generator
+import cache_files
+import fight_index
+import learnset_index
+import name_index
+from information_storage import id_to_name_generator
 import global_infos
 from pokemon_web_scraper import get_pokemon_from_wiki
 
@@ -31,13 +34,9 @@ def is_pokemon_in_cache(name: str) -> bool:
     Returns:
         True, wenn das Pokémon im Cache ist, sonst False.
     """
-    try:
-        with open(global_infos.POKEMON_CACHE_FILE_PATH, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        return name in cache_data
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Datei nicht gefunden oder leer/fehlerhaft -> Pokémon ist nicht im Cache.
-        return False
+    # Datei nicht gefunden oder leer/fehlerhaft -> Pokémon ist nicht im Cache.
+    cache_data = cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {})
+    return name_index.lookup(cache_data, name, global_infos.POKEMON_CACHE_FILE_PATH) is not None
 
 def get_pokemon_in_cache(name: str) -> Optional[Dict[str, Any]]:
     """
@@ -62,12 +61,30 @@ def get_attacks_of_pokemon(name: str) -> Optional[Dict[str, Any]]:
     ret = get_pokemon_in_cache(name).get("Attacken")
     return ret
 
-def get_attacks_of_pokemon_as_list(pokemon_name):
+def get_attacks_of_pokemon_as_list(pokemon_name, max_level: Optional[int] = None):
+    """
+    Gibt die Attacken eines Pokémon als Liste von Listen zurück (eine pro Attackenart).
+    Mit max_level werden nur LevelUp-Attacken bis zu diesem Level berücksichtigt
+    (TM/TP und die restlichen Arten bleiben vollständig).
+    """
+    if max_level is not None:
+        return learnset_index.get_attack_lists_at_level(pokemon_name, max_level)
     ret_list = list()
     for attack_type, attack_list in get_attacks_of_pokemon(pokemon_name).items():
         ret_list.append(attack_list)
     return ret_list
 
+def get_own_attacks_as_list(pokemon_name, max_level: Optional[int] = None, chosen: Optional[bool] = None):
+    """
+    Attacken eines eigenen Pokémon für die Analyse: wie get_attacks_of_pokemon_as_list, mit
+    global_infos.use_chosen_movesets (oder chosen=True) aber nur das gespeicherte Moveset
+    aus moveset_optimizer.py.
+    """
+    attack_lists = get_attacks_of_pokemon_as_list(pokemon_name, max_level)
+    if global_infos.use_chosen_movesets if chosen is None else chosen:
+        return learnset_index.filter_chosen_moves(pokemon_name, attack_lists)
+    return attack_lists
+
 def get_attacken_of_pokemon_structured(pokemon_name: str, max_level: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Überarbeitete Funktion, die strukturierte Attacken-Daten für ein Pokémon
@@ -83,34 +100,35 @@ def get_attacken_of_pokemon_structured(pokemon_name: str, max_level: Optional[in
     Returns:
         Eine Liste von Dictionaries, die jede erlernte Attacke detailliert beschreiben.
     """
-    pokemon_attacks_by_type = get_attacks_of_pokemon(pokemon_name)
-    if not pokemon_attacks_by_type:
+    entry = learnset_index.get_learnset_entry(pokemon_name)
+    if not entry or not entry["arts"]:
         print(f"Keine Attacken-Daten für {pokemon_name} im Cache gefunden.")
         return []
 
+    # Attacken-Cache nur einmal laden statt einmal pro Attacke
+    attack_cache = cache_files.load_json_cached(global_infos.ATTACK_CACHE_FILE_PATH, {})
+
     structured_attacks = []
 
     # Durchlaufe alle Attackenarten (LevelUp, TM, etc.)
-    for attack_art, attacks_list in pokemon_attacks_by_type.items():
+    for attack_art, attacks_list in entry["arts"].items():
+        if attack_art == "LevelUp":
+            # Level-Filter per bisect auf dem vorsortierten Index statt Zeile für Zeile
+            if max_level is not None:
+                attacks_list = learnset_index.get_levelup_moves_until(pokemon_name, max_level)
+            else:
+                attacks_list = entry["levelup"]
+
         for attack_entry in attacks_list:
+            if not isinstance(attack_entry, dict):
+                continue
             attack_name = attack_entry.get("Name")
             if not attack_name:
                 continue
 
-            # Spezielle Logik für LevelUp-Attacken
-            if attack_art == "LevelUp":
-                level_str = attack_entry.get("Level")
-                try:
-                    level_int = int(level_str)
-                except (ValueError, TypeError):
-                    level_int = 1 # Behandle 'Start' als Level 1
-
-                # Filtern nach max_level, wenn angegeben
-                if max_level is not None and level_int > max_level:
-                    continue
-
             # Hole die Detaildaten der Attacke aus dem Attacken-Cache
-            attack_details = get_attack_in_cache(attack_name)
+            attack_details = (name_index.lookup(attack_cache, attack_name, global_infos.ATTACK_CACHE_FILE_PATH)
+                              or get_attack_in_cache(attack_name))
 
             # Überspringen, wenn die Attacke nicht im Cache gefunden wird
             if not attack_details:
@@ -131,7 +149,7 @@ def get_attacken_of_pokemon_structured(pokemon_name: str, max_level: Optional[in
 
             # Füge das Level nur bei LevelUp-Attacken hinzu
             if attack_art == "LevelUp":
-                result['Level'] = level_str
+                result['Level'] = attack_entry.get("Level")
             else:
                 result['Level'] = None # Oder ein anderer Standardwert
 
@@ -152,23 +170,36 @@ def get_name_from_id(id: str):
     return id_to_name_generator.get_german_name_by_id(id)
 
 
-def get_trainer_team_from_trainer_name(trainer_name: str):
+def _resolve_starter(starter: Optional[str], all_starters: bool) -> Optional[str]:
+    if all_starters:
+        return None
+    return starter or global_infos.starter_pokemon
+
+
+def get_trainer_team_from_trainer_name(trainer_name: str, starter: Optional[str] = None, all_starters: bool = False):
     """
     Sucht in allen Kämpfen nach Trainerteams anhand eines (Teil-)Namens.
     Gibt eine Liste aller passenden Kämpfe zurück.
+    Die Suche läuft über den einmal aufgebauten Kampf-Index (siehe fight_index).
 
     - trainer_name: Suchstring oder exakter Name
     - None oder leerer String -> leere Liste
+    - starter: Starter, dessen Team-Variante gewählt wird (Standard: global_infos.starter_pokemon)
+    - all_starters: True -> Varianten aller Starter zurückgeben
     """
     if not trainer_name or not trainer_name.strip():
         return []  # Kein Name -> nichts gefunden
 
-    trainer_name = trainer_name.strip().lower()
-    matches = []
+    return fight_index.get_fight_index().find_substring(
+        "trainer_name", trainer_name, starter=_resolve_starter(starter, all_starters)
+    )
 
-    for fight in fight_to_json_generator.get_all_fights():
-        fight_name = fight.get("trainer_name", "")
-        if fight_name and trainer_name in fight_name.lower():
-            matches.append(fight)
 
-    return matches
+def search_fights(query: str, limit: int = 10, starter: Optional[str] = None, all_starters: bool = False):
+    """
+    Unscharfe Suche über Trainername, Trainerklasse, Ort und Edition.
+    Gibt eine nach Relevanz sortierte Liste von (Score, Kampf) zurück.
+    """
+    return fight_index.get_fight_index().search(
+        query, limit=limit, starter=_resolve_starter(starter, all_starters)
+    )
@@ -1,115 +1,167 @@
+import html
 import json
 import re
 import os
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
 
 import global_infos
 
 # Speicherorte
-RAW_FILE = Path("information_storage/raw_fight_data.txt")
-OUTPUT_FILE = Path("information_storage/fight_data.json")
+RAW_FILE = Path(global_infos.BASE_DIR) / "information_storage" / "raw_fight_data.txt"
+OUTPUT_FILE = Path(global_infos.FIGHT_DATA_FILE_PATH)
 
-def parse_fights(raw_text):
-    fights = []
-    fight_blocks = re.findall(r"(\{\{Team/Kopf.*?\</div\>)", raw_text, re.S)
+# Vorkompilierte Muster (werden pro Zeile/Block wiederverwendet statt pro Feld neu gebaut)
+LOCATION_PATTERN = re.compile(r"^===\s*Trainer\s*\(([^)]+)\)\s*===")
+HEADER_PATTERN = re.compile(r"\{\{Team/Kopf\|([^}]*)\}\}")
+TOGGLER_PATTERN = re.compile(r"toggler(\d+)=(.*?)\|")
+TOGGLERWAHL_PATTERN = re.compile(r"togglerwahl=([^|}]*)")
+TEAM_LINE_PATTERN = re.compile(r"\{\{Team/Zeile([^}]*)\}\}")
+PARAM_PATTERN = re.compile(r"\|([^|=\n]*)=([^|\n]*)")
+WIKI_LINK_PATTERN = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]+)\]\]")
+
+
+def iter_fights(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Liest die Rohdaten in einem einzigen Durchlauf und liefert jeden Kampf,
+    sobald sein Block (von {{Team/Kopf bis </div>) vollständig ist.
 
+    :param lines: Zeilen der Rohdatei (ohne Zeilenumbruch), z. B. ein geöffnetes File
+    """
     current_location = None
-    # Zeilenweise durchgehen, um Orte zu erkennen
-    lines = raw_text.splitlines()
-    block_index = 0
+    block_lines: List[str] = []
+    in_block = False
 
-    while block_index < len(lines):
-        line = lines[block_index]
+    for line in lines:
+        if in_block:
+            block_lines.append(line)
+            if "</div>" in line:
+                yield from parse_fight_block("\n".join(block_lines), current_location)
+                block_lines = []
+                in_block = False
+            continue
 
         # Ortserkennung: === Trainer (XYZ) ===
-        location_match = re.match(r"^===\s*Trainer\s*\(([^)]+)\)\s*===", line)
+        location_match = LOCATION_PATTERN.match(line)
         if location_match:
             current_location = location_match.group(1).strip()
 
         # Kampfblock-Erkennung
         if line.startswith("{{Team/Kopf"):
-            # Finde kompletten Block
-            block_lines = []
-            while block_index < len(lines):
-                block_lines.append(lines[block_index])
-                if "</div>" in lines[block_index]:
-                    break
-                block_index += 1
-            block_text = "\n".join(block_lines)
+            block_lines = [line]
+            if "</div>" in line:
+                yield from parse_fight_block(line, current_location)
+                block_lines = []
+            else:
+                in_block = True
+
+    # Unvollständiger Block am Dateiende
+    if in_block:
+        yield from parse_fight_block("\n".join(block_lines), current_location)
 
-            fights.extend(parse_fight_block(block_text, current_location))
 
-        block_index += 1
+def iter_fights_from_file(path: Path = RAW_FILE) -> Iterator[Dict[str, Any]]:
+    """Streamt die Kämpfe direkt aus der Rohdatei, ohne sie komplett einzulesen."""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_fights(line.rstrip("\n") for line in f)
 
-    return fights
+
+def parse_fights(raw_text):
+    return list(iter_fights(raw_text.splitlines()))
 
 
 def parse_fight_block(block, location):
+    """
+    Zerlegt einen Kampfblock in Kämpfe. Bei Togglern (Starter-Wahl, Spielfortschritt,
+    gewählter Turm) wird jede Variante genau einmal ausgegeben und markiert:
+    - "variant": Beschriftung des Togglers (None ohne Toggler)
+    - "starter": Starter-Pokémon, für das das Team gilt (None = gilt für alle Starter)
+    Die Auswahl des passenden Starters passiert erst bei der Abfrage (siehe fight_index).
+    """
     local_fights = []
 
-    header_match = re.search(r"\{\{Team/Kopf\|([^}]*)\}\}", block)
+    header_match = HEADER_PATTERN.search(block)
     header_content = header_match.group(1) if header_match else ""
 
-    togglers = re.findall(r"toggler(\d+)=(.*?)\|", header_content + "|")
-    togglerwahl_match = re.search(r"togglerwahl=([^|}]*)", header_content)
+    togglers = TOGGLER_PATTERN.findall(header_content + "|")
+    togglerwahl_match = TOGGLERWAHL_PATTERN.search(header_content)
     togglerwahl = togglerwahl_match.group(1).strip() if togglerwahl_match else None
 
-    team_lines = re.findall(r"\{\{Team/Zeile([^}]*)\}\}", block)
+    # Jede Team-Zeile wird genau einmal in ein Parameter-Dict zerlegt
+    team_lines = [parse_team_line(line) for line in TEAM_LINE_PATTERN.findall(block)]
 
     if togglers:
-        if togglerwahl and togglerwahl.lower() == "spielfortschritt":
-            for idx, label in togglers:
-                lines_for_group = [line for line in team_lines if f"togglershow{idx}=ja" in line]
-                if lines_for_group:
-                    fight = build_fight_from_lines(lines_for_group)
-                    fight["location"] = location
-                    local_fights.append(fight)
-        else:
-            starter_team_index = None
-            for idx, starter_name in togglers:
-                if starter_name.lower() == global_infos.starter_pokemon.lower():
-                    starter_team_index = idx
-                    break
-            if starter_team_index:
-                lines_for_group = [line for line in team_lines if f"togglershow{starter_team_index}=ja" in line]
-                if lines_for_group:
-                    fight = build_fight_from_lines(lines_for_group)
-                    fight["location"] = location
-                    local_fights.append(fight)
+        starter_names = {name.lower(): name for name in global_infos.starter_pokemon_list}
+        is_progress_toggle = bool(togglerwahl and togglerwahl.lower() == "spielfortschritt")
+        for idx, label in togglers:
+            lines_for_group = [params for params in team_lines if params.get(f"togglershow{idx}") == "ja"]
+            if not lines_for_group:
+                continue
+            variant = clean_toggler_label(label)
+            fight = build_fight_from_lines(lines_for_group)
+            fight["location"] = location
+            fight["variant"] = variant
+            fight["starter"] = None if is_progress_toggle else starter_names.get(variant.lower())
+            local_fights.append(fight)
     else:
         if team_lines:
             fight = build_fight_from_lines(team_lines)
             fight["location"] = location
+            fight["variant"] = None
+            fight["starter"] = None
             local_fights.append(fight)
 
     return local_fights
 
 
+def clean_toggler_label(label: str) -> str:
+    """'Turm&nbsp;des&nbsp;Wassers' -> 'Turm des Wassers'"""
+    return html.unescape(label).replace("\xa0", " ").strip()
+
+
+def parse_team_line(line: str) -> Dict[str, str]:
+    """
+    Zerlegt den Inhalt einer {{Team/Zeile ...}} in ein Dict Parameter -> Wert.
+    Es zählt das erste Vorkommen eines Parameters, und
+    Werte enden am nächsten '|' oder Zeilenumbruch.
+    """
+    params: Dict[str, str] = {}
+    for key, value in PARAM_PATTERN.findall(line):
+        if key not in params:
+            params[key] = value.strip()
+    return params
+
+
 def build_fight_from_lines(lines):
+    """
+    Baut einen Kampf aus den (bereits zerlegten) Team-Zeilen.
+
+    :param lines: Liste von Parameter-Dicts (siehe parse_team_line)
+    """
     fight_info = {}
     first_line = lines[0]
-    fight_info["edition"] = get_field(first_line, "Edition")
-    fight_info["trainer_class"] = get_field(first_line, "Trainerklasse")
-    fight_info["trainer_name"] = get_field(first_line, "Trainername")
-    fight_info["name"] = clean_wiki_links(get_field(first_line, "Name"))
-    fight_info["reward_info"] = get_field(first_line, "GewinnZusatz")
-    fight_info["hint"] = get_field(first_line, "Hinweis")
-    fight_info["battle_type"] = get_field(first_line, "Kampfart")  # NEU
+    fight_info["edition"] = first_line.get("Edition")
+    fight_info["trainer_class"] = first_line.get("Trainerklasse")
+    fight_info["trainer_name"] = first_line.get("Trainername")
+    fight_info["name"] = clean_wiki_links(first_line.get("Name"))
+    fight_info["reward_info"] = first_line.get("GewinnZusatz")
+    fight_info["hint"] = first_line.get("Hinweis")
+    fight_info["battle_type"] = first_line.get("Kampfart")  # NEU
 
     pokemons = []
-    for line in lines:
+    for params in lines:
         for i in range(1, 7):
-            if f"id{i}=" in line:
+            if f"id{i}" in params:
                 poke = {
-                    "ball": get_field(line, f"Ball{i}"),
-                    "id": get_field(line, f"id{i}"),
-                    "level": int(get_field(line, f"lvl{i}") or 0),
-                    "gender": get_field(line, f"geschlecht{i}"),
-                    "ability": get_field(line, f"fähigkeit{i}"),
+                    "ball": params.get(f"Ball{i}"),
+                    "id": params.get(f"id{i}"),
+                    "level": int(params.get(f"lvl{i}") or 0),
+                    "gender": params.get(f"geschlecht{i}"),
+                    "ability": params.get(f"fähigkeit{i}"),
                     "moves": [
-                        get_field(line, f"atk{i}_{j}")
+                        params[f"atk{i}_{j}"]
                         for j in range(1, 5)
-                        if get_field(line, f"atk{i}_{j}")
+                        if params.get(f"atk{i}_{j}")
                     ]
                 }
                 pokemons.append(poke)
@@ -118,16 +170,28 @@ def build_fight_from_lines(lines):
     return fight_info
 
 
-def get_field(text, field):
-    match = re.search(rf"\|{re.escape(field)}=([^|\n]*)", text)
-    return match.group(1).strip() if match else None
-
 def clean_wiki_links(value):
     if not value:
         return value
-    return re.sub(r"\[\[(?:[^|\]]*\|)?([^\]]+)\]\]", r"\1", value)
+    return WIKI_LINK_PATTERN.sub(r"\1", value)
 
-def get_all_fights(json_path: str = "information_storage/fight_data.json"):
+def write_fights_json(fights: Iterable[Dict[str, Any]], path: Path = OUTPUT_FILE) -> int:
+    """
+    Schreibt Kämpfe inkrementell als JSON-Liste, sobald sie geparst sind.
+    Das Ergebnis ist byte-identisch zu json.dumps(liste, ensure_ascii=False, indent=2).
+
+    :return: Anzahl geschriebener Kämpfe
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for fight in fights:
+            f.write("[\n  " if count == 0 else ",\n  ")
+            f.write(json.dumps(fight, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
+
+def get_all_fights(json_path: str = global_infos.FIGHT_DATA_FILE_PATH):
     """
     Lädt alle Kämpfe aus der angegebenen JSON-Datei.
     Erwartet, dass die Datei eine Liste von Fight-Objekten enthält.
@@ -154,10 +218,8 @@ def get_all_fights(json_path: str = "information_storage/fight_data.json"):
         return []
 
 def main():
-    raw_text = RAW_FILE.read_text(encoding="utf-8")
-    fights = parse_fights(raw_text)
-    OUTPUT_FILE.write_text(json.dumps(fights, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Gespeichert: {OUTPUT_FILE} ({len(fights)} Kämpfe)")
+    count = write_fights_json(iter_fights_from_file(RAW_FILE), OUTPUT_FILE)
+    print(f"Gespeichert: {OUTPUT_FILE} ({count} Kämpfe)")
 
 if __name__ == "__main__":
     main()
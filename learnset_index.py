@@ -0,0 +1,168 @@
+import json
+import os
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+
+import cache_files
+import global_infos
+import name_index
+from pokemon_web_scraper import get_pokemon_from_wiki
+
+# Attackenarten, die unabhängig vom Level verfügbar sind (TM / TP = Technische Platte bzw. TR)
+MACHINE_ARTS = ("TM", "TP")
+
+_index: Dict[str, Dict[str, Any]] = {}
+_indexed_cache: Optional[Dict[str, Any]] = None
+
+
+def _level_of(entry: Dict[str, Any]) -> int:
+    try:
+        return int(entry.get("Level"))
+    except (ValueError, TypeError):
+        return 1  # 'Start' bzw. fehlendes Level zählt als Level 1
+
+
+def build_learnset_entry(pokemon_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Baut den Index-Eintrag für ein einzelnes Pokémon.
+
+    Returns:
+        Dict mit
+        - "levels":   aufsteigend sortierte Level der LevelUp-Attacken
+        - "levelup":  die LevelUp-Einträge, parallel zu "levels"
+        - "machines": alle TM/TP-Einträge (ab Level 1 verfügbar)
+        - "arts":     alle Attackenarten in Original-Reihenfolge (Art -> Einträge)
+    """
+    attacken = (pokemon_data or {}).get("Attacken") or {}
+
+    levelup = [e for e in attacken.get("LevelUp", []) if isinstance(e, dict) and e.get("Name")]
+    # sorted() ist stabil -> gleiche Level behalten die Reihenfolge aus dem Cache
+    levelup = sorted(levelup, key=_level_of)
+
+    machines = []
+    for art in MACHINE_ARTS:
+        machines.extend(e for e in attacken.get(art, []) if isinstance(e, dict) and e.get("Name"))
+
+    return {
+        "levels": [_level_of(e) for e in levelup],
+        "levelup": levelup,
+        "machines": machines,
+        "arts": attacken,
+    }
+
+
+def _get_index() -> Dict[str, Dict[str, Any]]:
+    """Baut den Index neu, sobald sich die Cache-Datei geändert hat."""
+    global _index, _indexed_cache
+    cache = cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {})
+    if cache is not _indexed_cache:
+        _index = {name: build_learnset_entry(data) for name, data in cache.items()}
+        _indexed_cache = cache
+    return _index
+
+
+def get_learnset_entry(pokemon_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Liefert den Index-Eintrag eines Pokémon. Fehlt es im Cache,
+    wird es (wie bisher) über den Wiki-Scraper geholt.
+    """
+    index = _get_index()
+    entry = index.get(pokemon_name)
+    if entry is None:
+        entry = index.get(name_index.resolve_pokemon_name(pokemon_name))
+    if entry is None:
+        pokemon_data = get_pokemon_from_wiki(pokemon_name)
+        if not pokemon_data:
+            return None
+        entry = build_learnset_entry(pokemon_data)
+        index[pokemon_name] = entry
+    return entry
+
+
+def get_levelup_moves_until(pokemon_name: str, level: int) -> List[Dict[str, Any]]:
+    """Alle LevelUp-Einträge bis einschließlich level (Slice per bisect)."""
+    entry = get_learnset_entry(pokemon_name)
+    if not entry:
+        return []
+    cutoff = bisect_right(entry["levels"], level)
+    return entry["levelup"][:cutoff]
+
+
+def get_moves_available_at_level(pokemon_name: str, level: int, include_machines: bool = True) -> List[Dict[str, Any]]:
+    """
+    Alle Attacken, die ein Pokémon auf Level `level` kennen kann:
+    LevelUp-Attacken bis zu diesem Level plus (optional) alle TM/TP-Attacken.
+    """
+    entry = get_learnset_entry(pokemon_name)
+    if not entry:
+        return []
+    moves = get_levelup_moves_until(pokemon_name, level)
+    if include_machines:
+        moves = moves + entry["machines"]
+    return moves
+
+
+def get_attack_lists_at_level(pokemon_name: str, level: Optional[int]) -> List[List[Any]]:
+    """
+    Wie info_manager.get_attacks_of_pokemon_as_list (eine Liste pro Attackenart),
+    nur dass die LevelUp-Liste bei `level` abgeschnitten wird.
+    Bei level=None wird das komplette Learnset geliefert.
+    """
+    entry = get_learnset_entry(pokemon_name)
+    if not entry:
+        return []
+
+    ret_list = []
+    for art, attack_list in entry["arts"].items():
+        if art == "LevelUp" and level is not None:
+            ret_list.append(get_levelup_moves_until(pokemon_name, level))
+        else:
+            ret_list.append(attack_list)
+    return ret_list
+
+
+def get_fight_level(opponent_team: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Level-Band eines Kampfes: das höchste Level im gegnerischen Team
+    (unsere Pokémon sollten ungefähr auf diesem Level sein).
+    """
+    levels = [p.get("level") or 0 for p in opponent_team]
+    level = max(levels, default=0)
+    return level if level > 0 else None
+
+
+def get_chosen_movesets() -> Dict[str, List[str]]:
+    """Gespeicherte Movesets aus moveset_optimizer.py (Pokémon -> Attackennamen)."""
+    return cache_files.load_json_cached(global_infos.CHOSEN_MOVESETS_FILE_PATH, {}) or {}
+
+
+def save_chosen_movesets(movesets: Dict[str, List[str]]):
+    """Übernimmt die Movesets in CHOSEN_MOVESETS_FILE_PATH; andere Pokémon bleiben erhalten."""
+    merged = dict(get_chosen_movesets())
+    merged.update(movesets)
+    os.makedirs(os.path.dirname(global_infos.CHOSEN_MOVESETS_FILE_PATH), exist_ok=True)
+    with open(global_infos.CHOSEN_MOVESETS_FILE_PATH, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+    cache_files.forget(global_infos.CHOSEN_MOVESETS_FILE_PATH)
+
+
+def filter_chosen_moves(pokemon_name: str, attack_lists: List[List[Any]]) -> List[List[Any]]:
+    """
+    Schränkt Attackenlisten auf das gespeicherte Moveset des Pokémon ein (jede Attacke einmal,
+    Schreibweise egal). Ohne gespeichertes Moveset bleiben die Listen unverändert.
+    """
+    chosen = get_chosen_movesets().get(pokemon_name)
+    if not chosen:
+        return attack_lists
+    keys = {name_index.canonical_key(move) for move in chosen}
+    seen = set()
+    filtered = []
+    for attack_list in attack_lists:
+        kept = []
+        for entry in attack_list:
+            key = name_index.canonical_key(entry.get("Name")) if isinstance(entry, dict) else None
+            if key in keys and key not in seen:
+                seen.add(key)
+                kept.append(entry)
+        filtered.append(kept)
+    return filtered
@@ -1,69 +1,27 @@
+import argparse
+import time
+
+import campaign
+import compiled_snapshot
+import evolution_index
+import feature_store
 import global_infos
+import incremental_analysis
 import info_manager
+import learnset_index
+import matchup_memo
+import move_table
+import negative_cache
+import prefetch
+import scoring
 import type_effectiveness
-from tqdm import tqdm # Importiere die tqdm-Bibliothek
-import math
 
 # Status moves zählen wir, wenn die Move-Kategorie "Status" ist (so vorhanden)
 MAX_TOP_PER_OPP = 3
 
-# Hinweis: falls es unterschiedliche Schreibweisen in deinem Cache gibt (z. B. 'Giga-Lichtblick' vs 'Giga Lichtblick'),
-# kannst du noch zusätzliche Varianten hinzufügen oder beim Vergleich non-alphanumerische Zeichen entfernen.
-
-
-def _parse_power(own_move_name, own_move):
-    """
-    Extrahiere eine numerische Power aus own_move (falls vorhanden),
-    sonst weiche auf bekannte Sonderfälle oder Standardwert aus.
-    """
-    if own_move is None:
-        return global_infos.default_strength_move
-
-    if own_move.get("Kategorie") == "Status":
-        return 0 # todo how do you wanna handle status moves
-
-    strength = own_move.get("Stärke")
-    if strength == "K.O.":
-        return 255
-    if strength and isinstance(strength, str) and strength.isdigit():
-        return int(strength)
-    # Sonderfälle (deine bisherigen Zuordnungen)
-    if own_move_name == "Schleuder":
-        return 30
-    if own_move_name in ["Strauchler", "Rammboss"]:
-        return 60
-    if own_move_name == "Dreschflegel":
-        return 40
-
-    # Default für unbekannte
-    return global_infos.default_strength_move
-
-def _parse_accuracy(move_name: str, move_data: dict) -> float:
-    """
-    Ermittelt die Genauigkeit einer Attacke als Float-Wert (z.B. 95 -> 0.95).
-    Behandelt spezielle Fälle und Standardwerte.
-    """
-    # Wenn keine Move-Daten vorhanden sind, nehmen wir einen sicheren Standardwert an.
-    if not move_data:
-        return 0.7  # Allgemeiner Standardwert
-
-    accuracy_str = move_data.get("Genauigkeit")
-
-    if accuracy_str and accuracy_str.isdigit():
-        return int(accuracy_str) / 100.0
-
-    # Spezielle Fälle aus deinem alten Code
-    if move_name == "Eiseskälte":
-        return 0.3 # Genauigkeit für OHKO-Moves ist 30%
-
-    # Wenn die Genauigkeit nicht numerisch oder nicht vorhanden ist (z.B. "---"),
-    # bedeutet das oft, dass die Attacke immer trifft (z.B. Aero-Ass).
-    # Wir nehmen hier 1.0 (100%) an.
-    if not accuracy_str or accuracy_str == '---':
-        return 1.0
+# Hinweis: unterschiedliche Schreibweisen (z. B. 'Giga-Lichtblick' vs 'Giga Lichtblick') werden über
+# name_index.canonical_key auf denselben Cache-Eintrag abgebildet.
 
-    # Fallback für andere nicht-numerische Werte
-    return 0.85 # Sicherer Standardwert, wenn etwas Unerwartetes passiert
 
 def _infer_category_from_base(atk_stats):
     """
@@ -74,168 +32,6 @@ def _infer_category_from_base(atk_stats):
     spatk = atk_stats.get("SpAngriff", 0)
     return "physisch" if atk >= spatk else "speziell"
 
-def determine_move_category(move_meta, move_in_cache, attacker_pkm):
-    """
-    Bestimme die Kategorie eines Moves (pro Move!).
-    Priorität:
-      1) move_meta (die Liste, die du von get_attacks_of_pokemon_as_list bekommst), falls dort 'Kategorie' existiert
-      2) move_in_cache (vollständige Move-Daten) falls dort 'Kategorie' existiert
-      3) Fallback: schätze anhand der Base-Stats des Angreifers (wie vorher)
-    Rückgabe: string 'physisch' oder 'speziell' (dein Code nutzt diese Strings)
-    """
-    # 1) move_meta hat manchmal schon Kategorie-Info (z. B. "Schaufler" Eintrag)
-    if move_meta and isinstance(move_meta, dict):
-        cat = move_meta.get("Kategorie")
-        if cat:
-            return cat
-
-    # 2) move_in_cache ist detaillierter (falls vorhanden)
-    if move_in_cache and isinstance(move_in_cache, dict):
-        cat = move_in_cache.get("Kategorie")
-        if cat:
-            return cat
-
-    # 3) Fallback auf Basiswerte des Angreifers (wie bisher)
-    atk = attacker_pkm["Statuswerte"].get("Angriff", 0)
-    spatk = attacker_pkm["Statuswerte"].get("SpAngriff", 0)
-    return "physisch" if atk >= spatk else "speziell"
-
-def compute_best_damage_for_pair(attacker_pkm, attacker_name, defender_pkm, attacker_moves_list, debug: bool = False):
-    """
-    Berechnet für einen Angreifer gegen einen Defender den besten *erwarteten Schaden*
-    über alle Moves, unter Einbeziehung von STAB und Genauigkeit.
-    Gibt am Ende den Rechenweg für den besten gefundenen Move aus.
-    """
-    # GEÄNDERT: Wir optimieren jetzt für den erwarteten Schaden
-    best_expected_damage = 0.0
-    best_calculation_details = {}
-
-    if not attacker_moves_list:
-        # GEÄNDERT: Passender Rückgabewert für den Fehlerfall
-        return 0.0, None
-
-    # NEU: Typen des Angreifers für STAB-Berechnung einmalig holen
-    attacker_types = attacker_pkm.get("Typen", [])
-
-    for attack_list in attacker_moves_list:
-        for move_meta in attack_list:
-            if not move_meta:
-                continue
-            move_name = move_meta.get("Name", "")
-            move_in_cache = info_manager.get_attack_in_cache(move_name)
-
-            if move_in_cache:
-                power = _parse_power(move_name, move_in_cache)
-                move_type = move_in_cache.get("Typ")
-            else:
-                print(f"Move not in Cache whilst computing damage - Name: {move_name}")
-                power = global_infos.default_strength_move
-                move_type = None
-
-            # NEU: Genauigkeit der Attacke bestimmen
-            accuracy = _parse_accuracy(move_name, move_in_cache)
-
-            # NEU: STAB-Bonus bestimmen
-            stab_bonus = 1.5 if move_type in attacker_types else 1.0
-
-            category = determine_move_category(move_meta, move_in_cache, attacker_pkm)
-
-            if category.lower().startswith("s"):
-                attack_stat = attacker_pkm["Statuswerte"].get("SpAngriff", 0.0)
-                defense_stat = defender_pkm["Statuswerte"].get("SpVerteidigung", 1.0)
-            else:
-                attack_stat = attacker_pkm["Statuswerte"].get("Angriff", 0.0)
-                defense_stat = defender_pkm["Statuswerte"].get("Verteidigung", 1.0)
-            defense_stat = max(defense_stat, 1.0)
-
-            if move_type:
-                try:
-                    eff = type_effectiveness.get_effectiveness(move_type, defender_pkm["Typen"])
-                except Exception:
-                    eff = 1.0
-            else:
-                eff = 1.0
-
-            # GEÄNDERT: Formel erweitert um STAB
-            raw_damage = power * (attack_stat / defense_stat) * eff * stab_bonus
-            # NEU: Berechnung des erwarteten Schadens
-            expected_damage = raw_damage * accuracy
-
-            # GEÄNDERT: Vergleich basiert jetzt auf expected_damage
-            if expected_damage > best_expected_damage:
-                best_expected_damage = expected_damage
-                best_calculation_details = {
-                    "move_name": move_name,
-                    "power": power,
-                    "attack_stat": attack_stat,
-                    "defense_stat": defense_stat,
-                    "effectiveness": eff,
-                    "stab_bonus": stab_bonus, # NEU im Dictionary
-                    "accuracy": accuracy,     # NEU im Dictionary
-                    "raw_damage": raw_damage  # NEU zur Anzeige
-                }
-
-    if best_calculation_details:
-        defender_name = info_manager.get_name_from_id(defender_pkm.get("ID"))
-        details = best_calculation_details
-
-        # GEÄNDERT: Ausgabe erweitert
-        if debug:
-            print("\n--- Bester erwarteter Schaden ---")
-            print(f"Angreifer: {attacker_name}")
-            print(f"Verteidiger: {defender_name}")
-            print(f"Beste Attacke: {details['move_name']}")
-            print(f"Roher Schaden (vor Genauigkeit): {details['raw_damage']:.2f}")
-            print("-" * 20)
-            print(f"Formel: power * (att/def) * eff * STAB * accuracy")
-            print(f"Werte: {details['power']} * ({details['attack_stat']:.0f}/{details['defense_stat']:.0f}) * {details['effectiveness']} * {details['stab_bonus']} * {details['accuracy']}")
-            print(f"Erwarteter Schaden: {best_expected_damage:.2f}")
-            print("--------------------------------\n")
-    else:
-        # Sinnvollere Ausgabe, wenn keine Attacken gefunden wurden
-        if debug:
-            print(f"Keine effektiven Attacken für {attacker_name} gegen {info_manager.get_name_from_id(defender_pkm.get('ID'))} gefunden.")
-
-    # GEÄNDERT: Gib den besten Schaden und den Namen der Attacke zurück
-    return best_expected_damage, best_calculation_details.get('move_name')
-
-def compute_utility_score_for_attacker(attacker_name, attacker_moves_list):
-    """
-    Einfache Heuristik (0..1):
-    - hat Recovery (Move-Name ist in HEALING_MOVES) -> +0.25
-    - Anzahl Status-Moves (Kategorie == 'Status') -> +0.12 pro Move (max. +0.5)
-    Wichtig: Es wird **nur** auf Move-Namen geprüft (keine Effekt-/Beschreibungssuche).
-    """
-    score = 0.0
-    status_count = 0
-    has_recovery = False
-
-    for attack_list in attacker_moves_list:
-        for move_meta in attack_list:
-            if not move_meta:
-                continue
-            move_name = (move_meta.get("Name") or "").strip()
-            move_name_norm = move_name.lower()
-
-            # Recovery-Erkennung ausschliesslich über Move-Name
-            if move_name_norm in global_infos.HEALING_MOVES:
-                has_recovery = True
-
-            # Status detection: prefer move_cache Kategorie, fallback auf move_meta
-            move_cache = info_manager.get_attack_in_cache(move_name) if move_name else None
-            cat = None
-            if move_cache and isinstance(move_cache, dict):
-                cat = move_cache.get("Kategorie")
-            if not cat:
-                cat = move_meta.get("Kategorie")
-            if cat and str(cat).lower().startswith("s"):  # 'Status'...
-                status_count += 1
-
-    if has_recovery:
-        score += 0.25
-    score += min(0.5, status_count * 0.12)  # cap bei 0.5
-    return min(1.0, score)
-
 def get_farbigen_wert_string(wert: float) -> str:
     """
     Nimmt einen Float-Wert zwischen 0.0 und 1.0 und gibt ihn als
@@ -283,58 +79,32 @@ def get_farbigen_wert_string(wert: float) -> str:
 
     return f"\033[38;2;{r};{g};{b}m{wert_str}\033[0m"
 
-def calculate_survival_score(own_pkm_data: dict, opponent_pkm_data: dict, incoming_damage: float, outgoing_damage: float, vmin: float, vmax: float, debug: bool = False) -> float:
-    """
-    Berechnet einen Survival-Score, der die Initiative und OHKO-Potenzial berücksichtigt.
-    Mit optionalem kompakten Debug-Output.
+def main(full=False, evolutions=False):
+    print("Analyse Start")
 
-    Args:
-        own_pkm_data: Das Daten-Dictionary des eigenen Pokémon.
-        opponent_pkm_data: Das Daten-Dictionary des gegnerischen Pokémon.
-        incoming_damage: Erwarteter Schaden vom Gegner.
-        outgoing_damage: Erwarteter Schaden am Gegner.
-        vmin, vmax: Normalisierungswerte.
-        debug: Ob Debug-Ausgabe erfolgen soll.
+    opponent_team, owned_list, fight_level = prepare_fight()
+    candidates = prepare_evolutions(opponent_team, owned_list) if evolutions else {}
 
-    Returns:
-        Survival-Score zwischen 0.0 und 1.0.
+    # Die Bewertung selbst läuft garantiert ohne Netzwerkzugriffe
+    with negative_cache.offline_mode():
+        analyse(opponent_team, owned_list, fight_level, full)
+        if evolutions:
+            print_evolution_counters(opponent_team, owned_list, candidates)
+
+    if negative_cache.get_top_unresolved(only_this_run=True):
+        print()
+        negative_cache.print_report(only_this_run=True)
+
+    print("Analyse Ende")
+
+def prepare_fight():
     """
-    # 1. Statuswerte extrahieren
-    my_hp = max(own_pkm_data.get("Statuswerte", {}).get("KP", 1.0), 1.0)
-    my_speed = own_pkm_data.get("Statuswerte", {}).get("Initiative", 0.0)
-    opponent_hp = max(opponent_pkm_data.get("Statuswerte", {}).get("KP", 1.0), 1.0)
-    opponent_speed = opponent_pkm_data.get("Statuswerte", {}).get("Initiative", 0.0)
-
-    # 2. Schaden berechnen
-    scaled_incoming_damage = ((vmax - vmin) * incoming_damage + vmin)
-    damage_percentage_if_hit = min(scaled_incoming_damage / my_hp, 1.0)
-    survival_if_hit = 1.0 - damage_percentage_if_hit
-    can_i_ohko_opponent = ((vmax - vmin) * outgoing_damage + vmin) >= opponent_hp
-
-    if debug:
-        print(f"[SurvivalScore] Own: HP={my_hp}, Speed={my_speed} | Opponent: HP={opponent_hp}, Speed={opponent_speed}")
-        print(f"[SurvivalScore] IncomingDamage(raw)={incoming_damage:.2f}, Scaled={scaled_incoming_damage:.2f}, Damage%={damage_percentage_if_hit:.2%}")
-        print(f"[SurvivalScore] SurvivalIfHit={survival_if_hit:.2f}, CanOHKO={can_i_ohko_opponent}")
-
-    # 3. Szenarien auswerten
-    if my_speed > opponent_speed:
-        result = 1.0 if can_i_ohko_opponent else survival_if_hit
-        if debug: print(f"[SurvivalScore] Szenario: Schneller → Score={result:.2f}")
-        return result
-    elif my_speed < opponent_speed:
-        if debug: print(f"[SurvivalScore] Szenario: Langsamer → Score={survival_if_hit:.2f}")
-        return survival_if_hit
-    else:
-        survival_if_win_tie = 1.0 if can_i_ohko_opponent else survival_if_hit
-        survival_if_lose_tie = survival_if_hit
-        result = 0.5 * survival_if_win_tie + 0.5 * survival_if_lose_tie
-        if debug:
-            print(f"[SurvivalScore] Szenario: Speed Tie → WinTie={survival_if_win_tie:.2f}, LoseTie={survival_if_lose_tie:.2f}, Score={result:.2f}")
-        return result
-
-def main():
-    print("Analyse Start")
+    Lädt das gegnerische Team (global_infos.opponent_trainer_name) und die eigenen Pokémon
+    und holt per Warmup alle fehlenden Daten.
 
+    Returns:
+        (opponent_team, owned_list, fight_level) – nur Pokémon, die im Cache sind
+    """
     opponent_data = info_manager.get_trainer_team_from_trainer_name(global_infos.opponent_trainer_name)[0]
     opponent_team = opponent_data["team"]
     print(" ~ Fetched Opponent Data")
@@ -344,220 +114,172 @@ def main():
     owned_list = global_infos.owned_pokemon_list
     print(" ~ Fetched Own Pokemon")
 
-    # Wir berechnen beide Richtungen -> Fortschrittsbar entsprechend anpassen
-    total_iterations = len(owned_list) * len(opponent_team) * 2
-
-    # Dictionaries: nested mapping attacker_name -> defender_name -> raw_value
-    raw_player_to_opponent = {}
-    raw_opponent_to_player = {}
-    # Neue Maps: attacker_name -> defender_name -> best_move_name
-    best_move_player_to_opponent = {}
-    best_move_opponent_to_player = {}
-    print(" ~ Initialized Mapping Dictionaries")
-
-    # Preload move-lists for all Pokémon (schneller repeated access)
-    moves_cache = {}
-    for own_pkm_name in owned_list:
-        moves_cache[own_pkm_name] = info_manager.get_attacks_of_pokemon_as_list(own_pkm_name)
-    print(" ~ Stored All Own Moves")
-    opp_moves_cache = {}
-    for opp_fight_data_pkm in opponent_team:
-        opp_name = info_manager.get_name_from_id(opp_fight_data_pkm["id"])
-        pkm_attack_list = [[]]
-        for move_name in opp_fight_data_pkm["moves"]:
-            pkm_attack_list[0].append(info_manager.get_attack_in_cache(move_name))
-        opp_moves_cache[opp_name] = pkm_attack_list
-    print(" ~ Stored All Opponent Moves")
-
-    with tqdm(total=total_iterations, desc="Gesamtanalyse") as pbar:
-        # Spieler -> Gegner
-        for own_pkm_name in owned_list:
-            own_pkm = info_manager.get_pokemon_in_cache(own_pkm_name)
-            attacker_moves_list = moves_cache.get(own_pkm_name, [])
-            raw_player_to_opponent.setdefault(own_pkm_name, {})
-            best_move_player_to_opponent.setdefault(own_pkm_name, {})
-            for opp_fight_data_pkm in opponent_team:
-                opp_name = info_manager.get_name_from_id(opp_fight_data_pkm["id"])
-                opp_pkm = info_manager.get_pokemon_in_cache(opp_name)
-
-                best_raw, best_move = compute_best_damage_for_pair(own_pkm, own_pkm_name, opp_pkm, attacker_moves_list)
-                raw_player_to_opponent[own_pkm_name][opp_name] = best_raw
-                best_move_player_to_opponent[own_pkm_name][opp_name] = best_move
-
-                pbar.update(1)
-
-        # Gegner -> Spieler
-        for opp_fight_data_pkm in opponent_team:
-            opp_name = info_manager.get_name_from_id(opp_fight_data_pkm["id"])
-            opp_pkm = info_manager.get_pokemon_in_cache(opp_name)
-            attacker_moves_list = opp_moves_cache.get(opp_name, [])
-            raw_opponent_to_player.setdefault(opp_name, {})
-            best_move_opponent_to_player.setdefault(opp_name, {})
-            for own_pkm_name in owned_list:
-                own_pkm = info_manager.get_pokemon_in_cache(own_pkm_name)
-
-                best_raw, best_move = compute_best_damage_for_pair(opp_pkm, opp_name, own_pkm, attacker_moves_list)
-                raw_opponent_to_player[opp_name][own_pkm_name] = best_raw
-                best_move_opponent_to_player[opp_name][own_pkm_name] = best_move
-
-                pbar.update(1)
-
-    # -> Normalisierung (Min-Max über alle raw Werte beider Tabellen)
-    all_raw_values = []
-    for a in raw_player_to_opponent.values():
-        all_raw_values.extend(a.values())
-    for a in raw_opponent_to_player.values():
-        all_raw_values.extend(a.values())
+    # Level-Band des Kampfes: nur Attacken, die bis zu diesem Level erlernbar sind
+    fight_level = None
+    if global_infos.level_aware_moves:
+        fight_level = learnset_index.get_fight_level(opponent_team)
+        print(f" ~ Level-Band des Kampfes: Lv. {fight_level}")
 
-    # Falls keine Werte vorhanden (leere Pools) handle edge-case
-    if not all_raw_values:
-        print("Keine raw-Werte gefunden. Abbruch.")
+    # Warmup: alle benötigten Pokémon/Attacken vorab (parallel) holen
+    warmup_stats = prefetch.warmup(opponent_team, owned_list, fight_level)
+    prefetch.print_warmup_report(warmup_stats)
+
+    # Was nach dem Warmup nicht im Cache ist, kann nicht bewertet werden
+    owned_list = [name for name in owned_list if info_manager.is_pokemon_in_cache(name)]
+    opponent_team = [p for p in opponent_team if info_manager.is_pokemon_in_cache(info_manager.get_name_from_id(p["id"]) or "")]
+    return opponent_team, owned_list, fight_level
+
+def prepare_evolutions(opponent_team, owned_list):
+    """
+    Erreichbare Entwicklungen der eigenen Pokémon bis zum Level des Kampfes (siehe
+    evolution_index), per Warmup geholt; nur was danach im Cache ist, wird bewertet.
+    """
+    level = learnset_index.get_fight_level(opponent_team)
+    candidates = evolution_index.evolution_candidates(owned_list, level)
+    print(f" ~ {len(candidates)} erreichbare Entwicklungen bis Lv. {level}")
+    fight_level = level if global_infos.level_aware_moves else None
+    prefetch.print_warmup_report(prefetch.warmup(opponent_team, list(candidates), fight_level))
+    return {name: info for name, info in candidates.items() if info_manager.is_pokemon_in_cache(name)}
+
+def print_evolution_counters(opponent_team, owned_list, candidates):
+    """
+    Top-Counter pro Gegner, wenn die eigenen Pokémon sich vorher entwickeln: eigene Pokémon
+    und ihre erreichbaren Entwicklungen werden zusammen über den kompilierten Snapshot
+    bewertet (Scores normalisiert über alle Kandidaten).
+    """
+    fight = {"trainer_name": global_infos.opponent_trainer_name, "team": opponent_team}
+    start = time.perf_counter()
+    snapshot = compiled_snapshot.build_snapshot(list(owned_list) + list(candidates), [fight], global_infos.level_aware_moves)
+    result = campaign.analyse_fight(snapshot, 0, incremental_analysis.get_weights(), MAX_TOP_PER_OPP)
+    seconds = time.perf_counter() - start
+
+    print("\n=== Top Counters inkl. Entwicklungen (Top {}) ===".format(MAX_TOP_PER_OPP))
+    for counter in result["counters"]:
+        print("\nGegner: {}".format(counter["opponent"]))
+        for i, entry in enumerate(counter["top"], start=1):
+            evolution = candidates.get(entry["pokemon"])
+            origin = (f" (Entwicklung von {evolution['base']}: {evolution_index.describe(evolution['conditions'])})"
+                      if evolution else "")
+            print(f" {i}. {entry['pokemon']}{origin} — Score: {entry['score']:.3f}, Top Move: {entry['move'] or 'Unknown'}")
+    print(f"\n ~ {len(snapshot['owned_names'])} Kandidaten in {seconds * 1000:.1f} ms bewertet")
+
+def analyse(opponent_team, owned_list, fight_level=None, full=False):
+    """
+    Counter-Analyse eigener Pokémon gegen ein gegnerisches Team.
+    Erwartet, dass alle benötigten Daten bereits im Cache liegen (siehe prefetch.warmup).
+    Setzt auf dem Zustand des letzten Laufs auf (siehe incremental_analysis);
+    mit full=True wird alles neu berechnet.
+    """
+    state = update_analysis_state(opponent_team, owned_list, fight_level, full)
+    if state is None:
         return
+    print_top_counters(state, opponent_team, owned_list)
+    print_type_coverage(opponent_team, owned_list, fight_level)
 
-    vmin = min(all_raw_values)
-    vmax = max(all_raw_values)
-    print(" ~ Got min & max from raw values")
-
-    damage_player_to_opponent = {}
-    damage_opponent_to_player = {}
-
-    if math.isclose(vmin, vmax):
-        # Edge-Case: alle Werte identisch => setze 0.5
-        for atk, d in raw_player_to_opponent.items():
-            damage_player_to_opponent[atk] = {defn: 0.5 for defn in d}
-        for atk, d in raw_opponent_to_player.items():
-            damage_opponent_to_player[atk] = {defn: 0.5 for defn in d}
-    else:
-        span = vmax - vmin
-        for atk, d in raw_player_to_opponent.items():
-            damage_player_to_opponent[atk] = {defn: (val - vmin) / span for defn, val in d.items()}
-        for atk, d in raw_opponent_to_player.items():
-            damage_opponent_to_player[atk] = {defn: (val - vmin) / span for defn, val in d.items()}
-
-    print(" ~ Normalized Raw Values")
-
-    # Ausgabe: (optional) print normalized damage scores in ähnlichem Format wie vorher
-    # print("=== Normalized damage player -> opponent (0..1) ===")
-    # for own_name, mapping in damage_player_to_opponent.items():
-    #     for opp_name, score in mapping.items():
-    #         print([own_name, opp_name, round(score, 4)])
-    #
-    # print("=== Normalized damage opponent -> player (0..1) ===")
-    # for opp_name, mapping in damage_opponent_to_player.items():
-    #     for own_name, score in mapping.items():
-    #         print([opp_name, own_name, round(score, 4)])
-
-    # ---------------------------
-    # -> Compute CounterScore & Candidate Selection
-    # ---------------------------
-
-    # Precompute utility_scores and exposure (avg incoming damage)
-    utility_scores = {}
-    exposure_scores = {}  # exposure per own_pkm = avg damage_opponent_to_player over all opponents
-
-    # Ensure move lists caches exist (moves_cache already built earlier)
-    for own_name in owned_list:
-        attacker_moves_list = moves_cache.get(own_name, [])
-        utility_scores[own_name] = compute_utility_score_for_attacker(own_name, attacker_moves_list)
-
-        # exposure: average of damage_opponent_to_player[*][own_name]
-        incoming = []
-        for opp_b in opponent_team:
-            opp_name = info_manager.get_name_from_id(opp_b["id"])
-            val = damage_opponent_to_player.get(opp_name, {}).get(own_name)
-            if val is not None:
-                incoming.append(val)
-        exposure_scores[own_name] = (sum(incoming)/len(incoming)) if incoming else 0.0
-
-    print(" ~ Calculated Utility and Exposure Scores")
-
-    # Build raw counter scores (attacker -> defender)
-    counter_raw = {}  # counter_raw[own][opp] = raw_score
-    all_counter_raw_values = []
-
-    for own_name in owned_list:
-        counter_raw.setdefault(own_name, {})
-        for opp_b in opponent_team:
-            opp_name = info_manager.get_name_from_id(opp_b["id"])
-
-            dmg_score = damage_player_to_opponent.get(own_name, {}).get(opp_name, 0.0)  # 0..1
-            incoming_vs_own_from_opp = damage_opponent_to_player.get(opp_name, {}).get(own_name, 0.0)  # 0..1
-            survival_estimate = 1.0 - incoming_vs_own_from_opp  # higher = better survive switch
-            util = utility_scores.get(own_name, 0.0)
-            exposure = exposure_scores.get(own_name, 0.0)
-
-            raw_score = (global_infos.w_dmg * dmg_score) + (global_infos.w_surv * survival_estimate) + (global_infos.w_util * util) - (global_infos.w_expo * exposure)
-            # keep raw
-            counter_raw[own_name][opp_name] = raw_score
-            all_counter_raw_values.append(raw_score)
-
-    print(" ~ Calculated Counter Scores; Added Weights into Full Score")
-
-    # Normalize counter_raw to 0..100 for readability
-    counter_score = {}
-    if all_counter_raw_values:
-        cr_min = min(all_counter_raw_values)
-        cr_max = max(all_counter_raw_values)
-        if math.isclose(cr_min, cr_max):
-            # edge: all equal -> 50
-            for own_name, mapping in counter_raw.items():
-                counter_score[own_name] = {opp: 50.0 for opp in mapping}
-        else:
-            span = cr_max - cr_min
-            for own_name, mapping in counter_raw.items():
-                counter_score.setdefault(own_name, {})
-                for opp_name, raw_val in mapping.items():
-                    norm01 = (raw_val - cr_min) / span
-                    counter_score[own_name][opp_name] = round(norm01 * 100.0, 2)
-    else:
-        # nothing computed
-        for own_name in owned_list:
-            counter_score[own_name] = {info_manager.get_name_from_id(o["id"]): 50.0 for o in opponent_team}
-
-    print(" ~ Normalized Counter Scores")
-
-        # Candidate selection per opponent: rank own pokemon by counter_score(P,G)
-    print("\n=== Top Counters pro Gegner (Top {}) ===".format(MAX_TOP_PER_OPP))
-    for opp_b in opponent_team:
-        opp_name = info_manager.get_name_from_id(opp_b["id"])
-        ranked = []
-        for own_name in owned_list:
-            score = counter_score.get(own_name, {}).get(opp_name, 0.0)
-            dmg_score = damage_player_to_opponent.get(own_name, {}).get(opp_name, 0.0)
-            incoming = damage_opponent_to_player.get(opp_name, {}).get(own_name, 0.0)
-            survival = calculate_survival_score(
-                info_manager.get_pokemon_in_cache(own_name),
-                info_manager.get_pokemon_in_cache(opp_name),
-                incoming, dmg_score, vmin, vmax
-            )
-            util = utility_scores.get(own_name, 0.0)
-            exposure = exposure_scores.get(own_name, 0.0)
+def update_analysis_state(opponent_team, owned_list, fight_level=None, full=False):
+    """Aktualisiert (und speichert) den Analyse-Zustand; None, wenn es nichts zu bewerten gibt."""
+    state = None if full else incremental_analysis.load_state()
+    state, report = incremental_analysis.update(state, opponent_team, owned_list, fight_level)
+    incremental_analysis.print_report(report)
+    matchup_memo.print_stats()
+    feature_store.print_stats()
 
+    # Falls keine Werte vorhanden (leere Pools) handle edge-case
+    if report["empty"]:
+        print("Keine raw-Werte gefunden. Abbruch.")
+        return None
+    incremental_analysis.save_state(state)
+    return state
+
+def print_top_counters(state, opponent_team, owned_list):
+    """Top-Counter pro Gegner aus dem Analyse-Zustand (Ranking nach Counter-Score)."""
+    vmin, vmax = state["vmin"], state["vmax"]
+    opp_names = incremental_analysis.get_opponent_names(opponent_team)
+    own_pkms = [info_manager.get_pokemon_in_cache(name) for name in owned_list]
+    opp_pkms = [info_manager.get_pokemon_in_cache(name) for name in opp_names]
+
+    # Matrizen eigene x Gegner-Slots
+    scores = scoring.rows_to_matrix(state["counter_score"], owned_list, opp_names)
+    damage = scoring.rows_to_matrix(state["damage_p2o"], owned_list, opp_names)
+    incoming = scoring.columns_to_matrix(state["damage_o2p"], owned_list, opp_names)
+    survival = scoring.survival_scores(
+        incoming, damage,
+        scoring.stat_vector(own_pkms, "KP", 1.0), scoring.stat_vector(own_pkms, "Initiative", 0.0),
+        scoring.stat_vector(opp_pkms, "KP", 1.0), scoring.stat_vector(opp_pkms, "Initiative", 0.0),
+        vmin, vmax
+    )
+    utility = [state["utility"].get(name, 0.0) for name in owned_list]
+    exposure = [state["exposure"].get(name, 0.0) for name in owned_list]
+
+    # Candidate selection per opponent: rank own pokemon by counter_score(P,G)
+    print("\n=== Top Counters pro Gegner (Top {}) ===".format(MAX_TOP_PER_OPP))
+    for j, opp_name in enumerate(opp_names):
+        print("\nGegner: {}".format(opp_name))
+        for i, row in enumerate(scoring.top_k(scores[:, j], MAX_TOP_PER_OPP).tolist(), start=1):
+            own_name = owned_list[row]
+            score = float(scores[row, j])
+            dmg_score = float(damage[row, j])
+            incoming_score = float(incoming[row, j])
             contribs = {
                 "Schaden": global_infos.w_dmg * dmg_score,
-                "Überlebens-Einschätzung": global_infos.w_surv * survival,
-                "Utility": global_infos.w_util * util,
-                "Exposure-Penalty": -global_infos.w_expo * exposure
+                "Überlebens-Einschätzung": global_infos.w_surv * float(survival[row, j]),
+                "Utility": global_infos.w_util * utility[row],
+                "Exposure-Penalty": -global_infos.w_expo * exposure[row]
             }
+            own_best_move = state["best_p2o"].get(own_name, {}).get(opp_name) or "Unknown"
+            opp_best_move = state["best_o2p"].get(opp_name, {}).get(own_name) or "Unknown"
 
-            own_best_move = best_move_player_to_opponent.get(own_name, {}).get(opp_name) or "Unknown"
-            opp_best_move = best_move_opponent_to_player.get(opp_name, {}).get(own_name) or "Unknown"
-
-            ranked.append((own_name, score, contribs, dmg_score, survival, util, exposure, own_best_move, opp_best_move, incoming))
-        ranked.sort(key=lambda x: x[1], reverse=True)
-
-        print("\nGegner: {}".format(opp_name))
-        for i, (own_name, score, contribs, dmg_score, survival, util, exposure, own_best_move, opp_best_move, incoming) in enumerate(ranked[:MAX_TOP_PER_OPP], start=1):
             print(f" {i}. {own_name} — Gesamt-Score: {score:.3f}")
             print(f"    - Top Move (eigener): {own_best_move} — gesch. Schaden : {((vmax - vmin) * dmg_score + vmin):.3f}")
-            print(f"    - Top Move (Gegner): {opp_best_move} — gesch. incoming : {((vmax - vmin) * incoming + vmin):.3f}")
+            print(f"    - Top Move (Gegner): {opp_best_move} — gesch. incoming : {((vmax - vmin) * incoming_score + vmin):.3f}")
             print(f"    - Rohwerte:")
             print(f"        Schaden-Score: {get_farbigen_wert_string(dmg_score)} (Gewichtung: {contribs['Schaden']:.3f})")
-            print(f"        Survival-Score: {get_farbigen_wert_string(survival)} (Gewichtung: {contribs['Überlebens-Einschätzung']:.3f})")
-            print(f"        Utility-Score: {get_farbigen_wert_string(util)} (Gewichtung: {contribs['Utility']:.3f})")
-            print(f"        Exposure-Score: {get_farbigen_wert_string(exposure)} (Gewichtung: {contribs['Exposure-Penalty']:.3f})")
+            print(f"        Survival-Score: {get_farbigen_wert_string(float(survival[row, j]))} (Gewichtung: {contribs['Überlebens-Einschätzung']:.3f})")
+            print(f"        Utility-Score: {get_farbigen_wert_string(utility[row])} (Gewichtung: {contribs['Utility']:.3f})")
+            print(f"        Exposure-Score: {get_farbigen_wert_string(exposure[row])} (Gewichtung: {contribs['Exposure-Penalty']:.3f})")
 
-    print("Analyse Ende")
+def _damaging_move_types(compiled):
+    """Typen der Schadensattacken (Stärke > 0) eines kompilierten Movesets."""
+    return {move_type for _, power, move_type, _, _ in compiled if power > 0 and move_type}
+
+def print_type_coverage(opponent_team, owned_list, fight_level=None):
+    """
+    Typ-Abdeckung gegen das gegnerische Team über die Bitmasken aus type_effectiveness:
+    wer trifft welchen Gegner sehr effektiv, und wer resistiert alle seine Schadensattacken.
+    """
+    own_pkms = {name: info_manager.get_pokemon_in_cache(name) for name in owned_list}
+    super_effective = {name: type_effectiveness.super_effective_mask(
+        _damaging_move_types(feature_store.best_moves(feature_store.get_features(name, fight_level)))) for name in owned_list}
+    resists = {name: type_effectiveness.resist_mask(pkm.get("Typen") or []) for name, pkm in own_pkms.items()}
+
+    print("\n=== Typ-Abdeckung ===")
+    for opp_pkm_data in opponent_team:
+        opp_name = info_manager.get_name_from_id(opp_pkm_data["id"])
+        opp_pkm = info_manager.get_pokemon_in_cache(opp_name)
+        opp_types = opp_pkm.get("Typen") or []
+        combo = type_effectiveness.combo_bit(opp_types)
+        attack_list = [[info_manager.get_attack_in_cache(move) for move in opp_pkm_data["moves"]]]
+        attack_types = type_effectiveness.types_mask(_damaging_move_types(move_table.compile_moveset(opp_pkm, attack_list)))
+
+        hitters = [name for name in owned_list if super_effective[name] & combo]
+        walls = [name for name in owned_list if attack_types and attack_types & ~resists[name] == 0]
+        print(f"\nGegner: {opp_name} ({'/'.join(opp_types)})")
+        print(f" - trifft sehr effektiv: {', '.join(hitters) or 'niemand'}")
+        print(f" - resistiert alle Attacken ({', '.join(type_effectiveness.mask_to_types(attack_types)) or '-'}): "
+              f"{', '.join(walls) or 'niemand'}")
+
+def parse_args():
+    """Parst die Kommandozeilenargumente."""
+    ap = argparse.ArgumentParser(description="Counter-Analyse gegen das Team aus global_infos.opponent_trainer_name.")
+    ap.add_argument("--retry-missing", action="store_true",
+                    help="Pokémon/Attacken erneut scrapen, die als nicht auflösbar bekannt sind.")
+    ap.add_argument("--full", action="store_true",
+                    help="Zustand des letzten Laufs ignorieren und alles neu berechnen.")
+    ap.add_argument("--evolutions", action="store_true",
+                    help="Erreichbare Entwicklungen der eigenen Pokémon als zusätzliche Kandidaten werten.")
+    return ap.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    negative_cache.retry_missing = args.retry_missing
+    main(args.full, args.evolutions)
@@ -0,0 +1,123 @@
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import global_infos
+import move_table
+import type_effectiveness
+
+# Bei jeder Änderung an der Schadensformel oder an den Parse-Regeln in move_table erhöhen,
+# damit alte Einträge verworfen werden.
+DAMAGE_MODEL_VERSION = 1
+
+_lock = threading.RLock()
+_entries: Optional[Dict[str, List[Any]]] = None
+_version: Optional[str] = None
+_dirty = False
+stats = {"hits": 0, "misses": 0}
+
+
+def get_version() -> str:
+    """Version des Memos: Schadensmodell + Standard-Stärke + Inhalt der Type Chart."""
+    return f"{DAMAGE_MODEL_VERSION}-{global_infos.default_strength_move}-{type_effectiveness.get_type_chart_version()}"
+
+
+def _load() -> Dict[str, List[Any]]:
+    global _entries, _version
+    if _entries is None:
+        _version = get_version()
+        try:
+            with open(global_infos.MATCHUP_MEMO_FILE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        # Andere Version (Type Chart / Schadensmodell geändert) -> komplett neu berechnen
+        _entries = data.get("entries", {}) if data.get("version") == _version else {}
+    return _entries
+
+
+def save():
+    """Schreibt das Memo, falls neue Einträge hinzugekommen sind."""
+    global _dirty
+    with _lock:
+        if not _dirty or _entries is None:
+            return
+        os.makedirs(os.path.dirname(global_infos.MATCHUP_MEMO_FILE_PATH), exist_ok=True)
+        with open(global_infos.MATCHUP_MEMO_FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"version": _version, "entries": _entries}, f, ensure_ascii=False)
+        _dirty = False
+
+
+atexit.register(save)
+
+
+def matchup_key(compiled: List[move_table.CompiledMove], attacker_pkm: Dict[str, Any], defender_pkm: Dict[str, Any]) -> str:
+    """
+    Schlüssel eines Matchups. Enthält genau das, was die Schadensformel liest:
+    kompiliertes Moveset, Angreifer-Typen (STAB) und -Angriffswerte,
+    Verteidiger-Typen und -Verteidigungswerte.
+    """
+    attacker_stats = attacker_pkm.get("Statuswerte", {})
+    defender_stats = defender_pkm.get("Statuswerte", {})
+    payload = json.dumps([
+        move_table.moveset_hash(compiled),
+        attacker_pkm.get("Typen", []),
+        [attacker_stats.get("Angriff", 0.0), attacker_stats.get("SpAngriff", 0.0)],
+        defender_pkm.get("Typen"),
+        [defender_stats.get("Verteidigung", 1.0), defender_stats.get("SpVerteidigung", 1.0)],
+    ], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> Optional[Tuple[float, Optional[str]]]:
+    """(bester erwarteter Schaden, beste Attacke) oder None, wenn das Matchup unbekannt ist."""
+    with _lock:
+        entry = _load().get(key)
+        if entry is None:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        return entry[0], entry[1]
+
+
+def put(key: str, best_damage: float, best_move: Optional[str]):
+    global _dirty
+    with _lock:
+        _load()[key] = [best_damage, best_move]
+        _dirty = True
+
+
+def clear():
+    """Leert das Memo (auch auf der Platte)."""
+    global _entries, _dirty
+    with _lock:
+        _load()
+        _entries = {}
+        _dirty = True
+        save()
+
+
+def print_stats():
+    print(f" ~ Matchup-Memo: {stats['hits']} Treffer, {stats['misses']} neu berechnet")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Persistentes Memo der besten Schadenswerte pro Matchup.")
+    ap.add_argument("--clear", action="store_true", help="Alle Einträge löschen.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.clear:
+        clear()
+        print("Matchup-Memo geleert.")
+    print(f"Version: {get_version()}, Einträge: {len(_load())}")
+
+
+if __name__ == "__main__":
+    main()
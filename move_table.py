@@ -0,0 +1,162 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import global_infos
+import info_manager
+
+# Eine kompilierte Attacke: (Name, Stärke, Typ, Genauigkeit, ist_speziell)
+CompiledMove = Tuple[str, int, Optional[str], float, bool]
+
+_PRIORITY_PATTERN = re.compile(r"\s*([+-]?\d+)")
+# Relativer Abstand, ab dem zwei Attacken einer Gruppe sicher nicht gleich stark sind
+# (die Schadensformel rundet in anderer Reihenfolge als Stärke * Genauigkeit)
+STRENGTH_TOLERANCE = 1e-9
+
+
+def parse_power(own_move_name, own_move):
+    """
+    Extrahiere eine numerische Power aus own_move (falls vorhanden),
+    sonst weiche auf bekannte Sonderfälle oder Standardwert aus.
+    """
+    if own_move is None:
+        return global_infos.default_strength_move
+
+    if own_move.get("Kategorie") == "Status":
+        return 0 # todo how do you wanna handle status moves
+
+    strength = own_move.get("Stärke")
+    if strength == "K.O.":
+        return 255
+    if strength and isinstance(strength, str) and strength.isdigit():
+        return int(strength)
+    # Sonderfälle (deine bisherigen Zuordnungen)
+    if own_move_name == "Schleuder":
+        return 30
+    if own_move_name in ["Strauchler", "Rammboss"]:
+        return 60
+    if own_move_name == "Dreschflegel":
+        return 40
+
+    # Default für unbekannte
+    return global_infos.default_strength_move
+
+def parse_accuracy(move_name: str, move_data: dict) -> float:
+    """
+    Ermittelt die Genauigkeit einer Attacke als Float-Wert (z.B. 95 -> 0.95).
+    Behandelt spezielle Fälle und Standardwerte.
+    """
+    # Wenn keine Move-Daten vorhanden sind, nehmen wir einen sicheren Standardwert an.
+    if not move_data:
+        return 0.7  # Allgemeiner Standardwert
+
+    accuracy_str = move_data.get("Genauigkeit")
+
+    if accuracy_str and accuracy_str.isdigit():
+        return int(accuracy_str) / 100.0
+
+    # Spezielle Fälle aus deinem alten Code
+    if move_name == "Eiseskälte":
+        return 0.3 # Genauigkeit für OHKO-Moves ist 30%
+
+    # Wenn die Genauigkeit nicht numerisch oder nicht vorhanden ist (z.B. "---"),
+    # bedeutet das oft, dass die Attacke immer trifft (z.B. Aero-Ass).
+    # Wir nehmen hier 1.0 (100%) an.
+    if not accuracy_str or accuracy_str == '---':
+        return 1.0
+
+    # Fallback für andere nicht-numerische Werte
+    return 0.85 # Sicherer Standardwert, wenn etwas Unerwartetes passiert
+
+def parse_priority(move_data: dict) -> int:
+    """
+    Priorität einer Attacke aus dem Cache. Der Wiki-Text listet ältere Generationen zuerst
+    ("+1 (Gen. 3–4) <br /> +3 (ab Gen. 5)"), es zählt der letzte Wert; fehlt er -> 0.
+    """
+    text = (move_data or {}).get("Priority")
+    if not text:
+        return 0
+    match = _PRIORITY_PATTERN.match(re.split(r"(?:&lt;|<)br\s*/?>", str(text))[-1])
+    return int(match.group(1)) if match else 0
+
+def determine_move_category(move_meta, move_in_cache, attacker_pkm):
+    """
+    Bestimme die Kategorie eines Moves (pro Move!).
+    Priorität:
+      1) move_meta (die Liste, die du von get_attacks_of_pokemon_as_list bekommst), falls dort 'Kategorie' existiert
+      2) move_in_cache (vollständige Move-Daten) falls dort 'Kategorie' existiert
+      3) Fallback: schätze anhand der Base-Stats des Angreifers (wie vorher)
+    Rückgabe: string 'physisch' oder 'speziell' (dein Code nutzt diese Strings)
+    """
+    # 1) move_meta hat manchmal schon Kategorie-Info (z. B. "Schaufler" Eintrag)
+    if move_meta and isinstance(move_meta, dict):
+        cat = move_meta.get("Kategorie")
+        if cat:
+            return cat
+
+    # 2) move_in_cache ist detaillierter (falls vorhanden)
+    if move_in_cache and isinstance(move_in_cache, dict):
+        cat = move_in_cache.get("Kategorie")
+        if cat:
+            return cat
+
+    # 3) Fallback auf Basiswerte des Angreifers (wie bisher)
+    atk = attacker_pkm["Statuswerte"].get("Angriff", 0)
+    spatk = attacker_pkm["Statuswerte"].get("SpAngriff", 0)
+    return "physisch" if atk >= spatk else "speziell"
+
+
+def compile_move(move_meta: Dict[str, Any], attacker_pkm: Dict[str, Any]) -> CompiledMove:
+    """Löst eine Attacke (Eintrag aus einer Attackenliste) in die Werte der Schadensformel auf."""
+    move_name = move_meta.get("Name", "")
+    move_in_cache = info_manager.get_attack_in_cache(move_name)
+
+    if move_in_cache:
+        power = parse_power(move_name, move_in_cache)
+        move_type = move_in_cache.get("Typ")
+    else:
+        print(f"Move not in Cache whilst computing damage - Name: {move_name}")
+        power = global_infos.default_strength_move
+        move_type = None
+
+    accuracy = parse_accuracy(move_name, move_in_cache)
+    category = determine_move_category(move_meta, move_in_cache, attacker_pkm)
+    return move_name, power, move_type, accuracy, category.lower().startswith("s")
+
+
+def compile_moveset(attacker_pkm: Dict[str, Any], attacker_moves_list: List[List[Any]]) -> List[CompiledMove]:
+    """
+    Kompiliert alle Attacken eines Angreifers (Liste von Attackenlisten, wie
+    get_attacks_of_pokemon_as_list) in der Original-Reihenfolge; leere Einträge entfallen.
+    Das Ergebnis hängt nur noch von Attacken-Cache und Angreifer-Basiswerten ab.
+    """
+    compiled = []
+    for attack_list in attacker_moves_list or []:
+        for move_meta in attack_list:
+            if not move_meta:
+                continue
+            compiled.append(compile_move(move_meta, attacker_pkm))
+    return compiled
+
+
+def moveset_hash(compiled: List[CompiledMove]) -> str:
+    """Stabiler Hash eines kompilierten Movesets (Reihenfolge zählt, sie entscheidet Gleichstände)."""
+    payload = json.dumps(compiled, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def strongest_moves(compiled: List[CompiledMove]) -> List[CompiledMove]:
+    """
+    Die stärksten Attacken pro (Typ, Kategorie) nach Stärke * Genauigkeit, in Original-Reihenfolge.
+    Innerhalb einer Gruppe sind Angriffswert, Effektivität und STAB gleich, die beste Attacke
+    gegen jeden Verteidiger (bei Gleichstand die erste) ist also immer darunter.
+    Attacken ohne Schaden fallen weg.
+    """
+    best: Dict[Tuple[Optional[str], bool], float] = {}
+    for _, power, move_type, accuracy, is_special in compiled:
+        if power * accuracy > 0:
+            key = (move_type, is_special)
+            best[key] = max(best.get(key, 0.0), power * accuracy)
+    return [move for move in compiled if move[1] * move[3] > 0
+            and move[1] * move[3] >= best[(move[2], move[4])] * (1.0 - STRENGTH_TOLERANCE)]
@@ -0,0 +1,273 @@
+import argparse
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import cache_files
+import campaign
+import compiled_snapshot
+import global_infos
+import info_manager
+import learnset_index
+import negative_cache
+import prefetch
+import type_effectiveness
+from compiled_snapshot import SP_VERTEIDIGUNG, VERTEIDIGUNG
+
+# Attacken, die ein Pokémon gleichzeitig kennen kann
+MOVESET_SIZE = 4
+# Ein Ziel gilt als abgedeckt, wenn eine Attacke des Movesets mindestens diesen Anteil
+# des besten erwarteten Schadens des ganzen Learnsets auf das Ziel macht
+COVER_SHARE = 0.75
+# Schutz gegen Rundung beim Vergleich von Schranke und bestem Moveset
+SCORE_EPS = 1e-12
+
+
+def pokemon_targets(snapshot: Dict[str, Any], fights: Sequence[int]) -> Dict[str, Any]:
+    """
+    Ziele aus den Gegner-Slots der Kämpfe. Ein Pokémon, das in mehreren Slots vorkommt,
+    ist ein Ziel mit entsprechendem Gewicht.
+    """
+    offsets = snapshot["fight_offsets"]
+    slots = np.concatenate([snapshot["slot_pokemon"][offsets[f]:offsets[f + 1]] for f in fights] or [np.zeros(0, int)])
+    pokemon, counts = np.unique(slots, return_counts=True)
+    return {
+        "names": [snapshot["pokemon_names"][p] for p in pokemon],
+        "weights": counts.astype(float),
+        "defense": snapshot["stats"][pokemon][:, [VERTEIDIGUNG, SP_VERTEIDIGUNG]],
+        "effectiveness": snapshot["effectiveness"][:, pokemon],
+    }
+
+
+def combo_targets(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Die 171 Typ-Kombinationen der Type Chart als Ziele. Verteidigungswerte sind die
+    Mittelwerte der Dex-Pokémon mit dieser Kombination (ohne solche: Mittel über den Dex),
+    das Gewicht ist ihre Anzahl.
+    """
+    keys = type_effectiveness.get_type_masks()["combos"]
+    index = {key: c for c, key in enumerate(keys)}
+    sums, counts, dex_defense = np.zeros((len(keys), 2)), np.zeros(len(keys)), []
+    for data in (cache_files.load_json_cached(global_infos.POKEMON_CACHE_FILE_PATH, {}) or {}).values():
+        stats = data.get("Statuswerte") or {}
+        defense = [float(stats.get("Verteidigung", 1.0)), float(stats.get("SpVerteidigung", 1.0))]
+        dex_defense.append(defense)
+        types = (data.get("Typen") or [])[:2]
+        c = index.get(type_effectiveness.combo_key(types)) if types else None
+        if c is not None:
+            sums[c] += defense
+            counts[c] += 1
+    fallback = np.mean(dex_defense, axis=0) if dex_defense else np.ones(2)
+    defense = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1.0)[:, None], fallback[None, :])
+
+    # Zeilen wie snapshot["effectiveness"]: alle Typen des Snapshots plus "kein Typ" (immer 1.0)
+    effectiveness = np.ones((len(snapshot["type_names"]) + 1, len(keys)))
+    for t, type_name in enumerate(snapshot["type_names"]):
+        for c, key in enumerate(keys):
+            try:
+                effectiveness[t, c] = type_effectiveness.get_effectiveness(type_name, type_effectiveness.combo_types(key))
+            except ValueError:
+                effectiveness[t, c] = 1.0
+    return {"names": keys, "weights": counts, "defense": defense, "effectiveness": effectiveness}
+
+
+def coverage_masks(covered: np.ndarray) -> List[int]:
+    """Boolesche Matrix (Attacken x Ziele) -> ein Python-int-Bitset pro Attacke (Bit t = Ziel t)."""
+    packed = np.packbits(covered, axis=1, bitorder="little")
+    return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+
+def prune_dominated(share: np.ndarray) -> np.ndarray:
+    """
+    Kandidaten für die Suche: Attacken ohne Schaden fallen weg, ebenso jede Attacke, die von
+    einer anderen auf jedem Ziel mindestens erreicht wird (bei Gleichstand bleibt die erste).
+    Ein optimales Moveset ohne dominierte Attacken existiert immer.
+    """
+    useful = np.flatnonzero(share.max(axis=1, initial=0.0) > 0.0)
+    values = share[useful]
+    ge = (values[:, None, :] >= values[None, :, :]).all(axis=2)        # [a, b]: a >= b überall
+    gt = (values[:, None, :] > values[None, :, :]).any(axis=2)
+    index = np.arange(len(useful))
+    dominates = ge & (gt | (index[:, None] < index[None, :]))
+    np.fill_diagonal(dominates, False)
+    return useful[~dominates.any(axis=0)]
+
+
+def best_moveset(damage: np.ndarray, weights: np.ndarray, size: int = MOVESET_SIZE,
+                 cover_share: float = COVER_SHARE) -> Dict[str, Any]:
+    """
+    Bestes Moveset aus einem Learnset (Branch-and-Bound über die Attacken-Teilmengen).
+
+    Args:
+        damage: erwarteter Schaden (Attacken x Ziele)
+        weights: Gewicht pro Ziel
+        size: Attacken im Moveset
+
+    Bewertet wird lexikografisch: zuerst die Zahl der abgedeckten Ziele (Popcount über das
+    OR der Bitsets), dann die Schadens-Abdeckung = gewichtetes Mittel über die Ziele des
+    besten Anteils am Learnset-Maximum. Schranke eines Teil-Movesets: jede weitere Attacke
+    bringt höchstens so viele neue Bits bzw. so viel Schadensgewinn wie die besten noch
+    möglichen Kandidaten einzeln (Abdeckung ist submodular); zusätzlich höchstens alle Bits
+    der übrigen Kandidaten.
+
+    Returns:
+        Dict mit moves (Zeilen von damage), covered, targets, coverage und
+        stats {moves, candidates, nodes, pruned}
+    """
+    best = damage.max(axis=0, initial=0.0)
+    share = np.divide(damage, best[None, :], out=np.zeros_like(damage, dtype=float), where=best[None, :] > 0.0)
+    reachable = best > 0.0
+    total = float(weights[reachable].sum())
+    weights = np.where(reachable, weights, 0.0) / total if total > 0.0 else np.zeros(len(weights))
+
+    candidates = prune_dominated(share)
+    values = share[candidates] * weights[None, :]
+    masks = coverage_masks(share[candidates] >= cover_share)
+    # starke Kandidaten zuerst: frühe gute Movesets und enge Schranken
+    order = sorted(range(len(candidates)), key=lambda c: (-masks[c].bit_count(), -values[c].sum()))
+    candidates, values, masks = candidates[order], values[order], [masks[c] for c in order]
+    n = len(candidates)
+
+    suffix_union = [0] * (n + 1)
+    for c in range(n - 1, -1, -1):
+        suffix_union[c] = suffix_union[c + 1] | masks[c]
+    max_covered, max_value = suffix_union[0].bit_count(), float(values.max(axis=0, initial=0.0).sum())
+
+    stats = {"moves": int(len(damage)), "candidates": n, "nodes": 0, "pruned": 0}
+    best_moves: List[int] = []
+    best_key = (-1, -math.inf)
+
+    def search(start: int, chosen: List[int], mask: int, coverage: np.ndarray):
+        nonlocal best_moves, best_key
+        stats["nodes"] += 1
+        key = (mask.bit_count(), float(coverage.sum()))
+        if key[0] > best_key[0] or (key[0] == best_key[0] and key[1] > best_key[1] + SCORE_EPS):
+            best_moves, best_key = list(chosen), key
+        remaining = size - len(chosen)
+        if remaining == 0 or start == n or best_key[0] == max_covered and best_key[1] >= max_value - SCORE_EPS:
+            return
+
+        new_bits = sorted((m & ~mask).bit_count() for m in masks[start:])
+        covered_bound = min((mask | suffix_union[start]).bit_count(), key[0] + sum(new_bits[-remaining:]))
+        gains = np.sort(np.maximum(values[start:] - coverage[None, :], 0.0).sum(axis=1))
+        value_bound = key[1] + float(gains[-remaining:].sum())
+        if covered_bound < best_key[0] or (covered_bound == best_key[0] and value_bound <= best_key[1] + SCORE_EPS):
+            stats["pruned"] += 1
+            return
+
+        for c in range(start, n):
+            chosen.append(c)
+            search(c + 1, chosen, mask | masks[c], np.maximum(coverage, values[c]))
+            chosen.pop()
+
+    search(0, [], 0, np.zeros(damage.shape[1]))
+    return {
+        "moves": [int(candidates[c]) for c in best_moves],
+        "covered": best_key[0] if best_moves else 0,
+        "targets": int(damage.shape[1]),
+        "coverage": max(best_key[1], 0.0),
+        "stats": stats,
+    }
+
+
+def _pool_band(snapshot: Dict[str, Any]) -> int:
+    """Level-Band mit dem niedrigsten Level: diese Attacken kennt das Pokémon in jedem der Kämpfe."""
+    levels = snapshot["band_levels"]
+    return min(range(len(levels)), key=lambda b: math.inf if levels[b] is None else levels[b])
+
+
+def optimize_movesets(snapshot: Dict[str, Any], targets: Dict[str, Any], size: int = MOVESET_SIZE,
+                      cover_share: float = COVER_SHARE) -> List[Dict[str, Any]]:
+    """
+    Bestes Moveset für jedes eigene Pokémon des Snapshots gegen die Ziele.
+    Die gewählten Attacken sind eindeutig (nach Name); ist das Learnset nach dem Pruning
+    kleiner als size, wird mit den übrigen Attacken in Learnset-Reihenfolge aufgefüllt.
+    """
+    band = _pool_band(snapshot)
+    move_names = snapshot["move_names"]
+    results = []
+    for i, name in enumerate(snapshot["owned_names"]):
+        moveset = snapshot["owned_moveset"][band, i]
+        lo = snapshot["move_offsets"][moveset]
+        start = time.perf_counter()
+        damage = compiled_snapshot.damage_against(snapshot, moveset, targets["defense"], targets["effectiveness"])
+        result = best_moveset(damage, targets["weights"], size, cover_share)
+        result["seconds"] = time.perf_counter() - start
+
+        chosen = list(dict.fromkeys(move_names[lo + m] for m in result["moves"]))
+        for m in range(len(damage)):
+            if len(chosen) >= size:
+                break
+            if move_names[lo + m] not in chosen:
+                chosen.append(move_names[lo + m])
+        result["name"] = name
+        result["move_names"] = chosen
+        results.append(result)
+    return results
+
+
+def print_report(results: List[Dict[str, Any]], target_label: str):
+    print(f"\n=== Movesets ({MOVESET_SIZE} Attacken) gegen {target_label} ===")
+    for result in results:
+        stats = result["stats"]
+        print(f"\n{result['name']}: {', '.join(result['move_names']) or '-'}")
+        print(f"    - abgedeckt: {result['covered']}/{result['targets']} Ziele, "
+              f"Schadens-Abdeckung: {result['coverage']:.1%} des ganzen Learnsets")
+        print(f"    - {stats['moves']} Attacken, {stats['candidates']} nach Pruning, {stats['nodes']:,} Knoten "
+              f"in {result['seconds'] * 1000:.1f} ms")
+
+
+def select_targets(trainer: Optional[str], location: Optional[str], edition: Optional[str],
+                   dex: bool) -> Tuple[List[Dict[str, Any]], str]:
+    """Kämpfe, gegen die optimiert wird, und eine Beschreibung für den Report."""
+    if dex:
+        return [{"trainer_name": None, "team": []}], "alle Typ-Kombinationen des Dex"
+    if location or edition:
+        fights = campaign.select_fights(location, edition, trainer)
+        return fights, f"{len(fights)} Kämpfe"
+    trainer = trainer or global_infos.opponent_trainer_name
+    return info_manager.get_trainer_team_from_trainer_name(trainer)[:1], trainer
+
+
+def run(trainer: Optional[str] = None, location: Optional[str] = None, edition: Optional[str] = None,
+        dex: bool = False, save: bool = False):
+    fights, target_label = select_targets(trainer, location, edition, dex)
+    if not fights:
+        print("Keine passenden Kämpfe gefunden.")
+        return
+    owned_list = global_infos.owned_pokemon_list
+    prefetch.print_warmup_report(campaign.warmup_campaign(fights, owned_list))
+
+    with negative_cache.offline_mode():
+        # Suche immer über das ganze Learnset, nicht über schon gespeicherte Movesets
+        snapshot = compiled_snapshot.build_snapshot(owned_list, fights, global_infos.level_aware_moves, chosen_movesets=False)
+        targets = combo_targets(snapshot) if dex else pokemon_targets(snapshot, range(len(fights)))
+        results = optimize_movesets(snapshot, targets)
+    print_report(results, target_label)
+
+    if save:
+        learnset_index.save_chosen_movesets({result["name"]: result["move_names"] for result in results})
+        print(f"\nMovesets gespeichert: {global_infos.CHOSEN_MOVESETS_FILE_PATH} "
+              f"(Analyse nutzt sie mit global_infos.use_chosen_movesets = True)")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Beste 4 Attacken pro eigenem Pokémon gegen einen Trainer, "
+                                             "einen Teil der Kampagne oder alle Typ-Kombinationen.")
+    ap.add_argument("--trainer", help="Trainername (Standard: global_infos.opponent_trainer_name).")
+    ap.add_argument("--location", help="Alle Kämpfe, deren Ort diesen Text enthält.")
+    ap.add_argument("--edition", help="Alle Kämpfe dieser Edition (z. B. SWSH).")
+    ap.add_argument("--dex", action="store_true", help="Gegen alle 171 Typ-Kombinationen (gewichtet nach dem Dex).")
+    ap.add_argument("--save", action="store_true", help="Movesets für die Counter-Analyse speichern.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    run(args.trainer, args.location, args.edition, args.dex, args.save)
+
+
+if __name__ == "__main__":
+    main()
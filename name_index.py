@@ -0,0 +1,100 @@
+import html
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+import cache_files
+import global_infos
+
+# Umlaute werden ausgeschrieben, damit 'Milchgetränk' und 'Milchgetraenk' gleich sind
+_TRANSLITERATION = str.maketrans({
+    "ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss",
+    "♀": "weiblich", "♂": "maennlich",
+})
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def canonical_key(name: Optional[str]) -> str:
+    """
+    Kanonischer Schlüssel für Pokémon- und Attackennamen.
+    Normalisiert Groß-/Kleinschreibung, HTML-Entities, Umlaute/Akzente sowie
+    Bindestriche, Leerzeichen und Unterstriche:
+        'Giga-Lichtblick', 'Giga Lichtblick', 'giga_lichtblick' -> 'gigalichtblick'
+    """
+    if not name:
+        return ""
+    text = html.unescape(html.unescape(str(name))).lower().translate(_TRANSLITERATION)
+    # Akzente entfernen (é -> e)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _NON_ALNUM.sub("", text)
+
+
+class CanonicalIndex:
+    """Bildet kanonische Schlüssel auf die tatsächlichen Schlüssel eines Caches ab."""
+
+    def __init__(self, names):
+        self._by_key: Dict[str, str] = {}
+        for name in names:
+            # Bei Kollisionen gewinnt der erste Eintrag
+            self._by_key.setdefault(canonical_key(name), name)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Der Cache-Schlüssel, der zu name gehört, oder None."""
+        return self._by_key.get(canonical_key(name))
+
+
+_indexes: Dict[str, tuple] = {}
+
+
+def get_index(path: str) -> CanonicalIndex:
+    """Index über die Schlüssel einer JSON-Cache-Datei; wird bei Dateiänderung neu gebaut."""
+    cache = cache_files.load_json_cached(path, {})
+    cached = _indexes.get(path)
+    if cached is None or cached[0] is not cache:
+        cached = (cache, CanonicalIndex(cache if isinstance(cache, dict) else []))
+        _indexes[path] = cached
+    return cached[1]
+
+
+def lookup(cache: Dict[str, Any], name: str, path: str) -> Optional[Any]:
+    """
+    Sucht name im Cache: erst exakt, dann über den kanonischen Schlüssel.
+    cache muss der Inhalt der Datei unter path sein.
+    """
+    if name in cache:
+        return cache[name]
+    resolved = get_index(path).resolve(name)
+    return cache.get(resolved) if resolved is not None else None
+
+
+def resolve_attack_name(name: str) -> str:
+    """Schreibweise der Attacke, wie sie im Attacken-Cache steht (sonst unverändert)."""
+    return get_index(global_infos.ATTACK_CACHE_FILE_PATH).resolve(name) or name
+
+
+def resolve_pokemon_name(name: str) -> str:
+    """Schreibweise des Pokémon, wie sie im Pokémon-Cache steht (sonst unverändert)."""
+    return get_index(global_infos.POKEMON_CACHE_FILE_PATH).resolve(name) or name
+
+
+_HEALING_KEYS = frozenset(canonical_key(name) for name in global_infos.HEALING_MOVES)
+
+
+def is_healing_move(name: str) -> bool:
+    """True, wenn die Attacke (in beliebiger Schreibweise) in global_infos.HEALING_MOVES steht."""
+    return canonical_key(name) in _HEALING_KEYS
+
+
+_SPREAD_KEYS = frozenset(canonical_key(name) for name in global_infos.SPREAD_MOVES)
+_ALLY_SPREAD_KEYS = frozenset(canonical_key(name) for name in global_infos.ALLY_SPREAD_MOVES)
+
+
+def is_spread_move(name: str) -> bool:
+    """True, wenn die Attacke im Doppelkampf mehrere Ziele trifft (SPREAD_MOVES oder ALLY_SPREAD_MOVES)."""
+    key = canonical_key(name)
+    return key in _SPREAD_KEYS or key in _ALLY_SPREAD_KEYS
+
+
+def hits_ally(name: str) -> bool:
+    """True, wenn die Attacke im Doppelkampf auch den eigenen Partner trifft (ALLY_SPREAD_MOVES)."""
+    return canonical_key(name) in _ALLY_SPREAD_KEYS
@@ -0,0 +1,207 @@
+import argparse
+import atexit
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+
+import global_infos
+import name_index
+
+# Arten von Einträgen
+KIND_ATTACK = "attack"
+KIND_POKEMON = "pokemon"
+
+# Gründe, warum ein Titel nicht aufgelöst werden konnte
+REASON_NOT_FOUND = "not_found"        # Seite existiert nicht (HTTP 404)
+REASON_NO_WIKITEXT = "no_wikitext"    # Seite geladen, aber keine Textarea / kein Wikitext
+REASON_HTTP_ERROR = "http_error"      # anderer HTTP-Fehlerstatus
+REASON_NETWORK = "network_error"      # Timeout, Verbindungsfehler, ...
+REASON_OFFLINE = "offline"            # nicht im Cache, Netzwerkzugriff ist gerade gesperrt
+
+# Wie lange ein negativer Eintrag gilt (Sekunden). Netzwerkfehler sind meist
+# vorübergehend und werden deshalb nur kurz gemerkt.
+TTL_BY_REASON = {
+    REASON_NOT_FOUND: 30 * 24 * 3600,
+    REASON_NO_WIKITEXT: 30 * 24 * 3600,
+    REASON_HTTP_ERROR: 24 * 3600,
+    REASON_NETWORK: 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# Wird über --retry-missing gesetzt: bekannte Fehlschläge ignorieren und erneut scrapen
+retry_missing = False
+
+# Offline-Modus (siehe offline_mode): alles, was nicht im Cache ist, gilt als fehlend
+offline = False
+
+_lock = threading.RLock()
+_entries: Optional[Dict[str, Dict[str, Any]]] = None
+_dirty = False
+_blocked_this_run: Dict[str, int] = {}
+
+
+def _key(kind: str, name: str) -> str:
+    # Kanonischer Name, damit 'Giga Lichtblick' und 'Giga-Lichtblick' ein Eintrag sind
+    return f"{kind}:{name_index.canonical_key(name)}"
+
+
+def _load() -> Dict[str, Dict[str, Any]]:
+    global _entries
+    if _entries is None:
+        try:
+            with open(global_infos.NEGATIVE_CACHE_FILE_PATH, "r", encoding="utf-8") as f:
+                _entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _entries = {}
+    return _entries
+
+
+def save():
+    """Schreibt den negativen Cache, falls sich etwas geändert hat."""
+    global _dirty
+    with _lock:
+        if not _dirty or _entries is None:
+            return
+        with open(global_infos.NEGATIVE_CACHE_FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump(_entries, f, indent=4, ensure_ascii=False)
+        _dirty = False
+
+
+atexit.register(save)
+
+
+def reason_from_exception(error: Exception) -> str:
+    """Ordnet eine Exception beim Abrufen einem Reason-Code zu."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = getattr(error.response, "status_code", None)
+        return REASON_NOT_FOUND if status == 404 else REASON_HTTP_ERROR
+    return REASON_NETWORK
+
+
+def remember_missing(kind: str, name: str, reason: str):
+    """Merkt sich, dass ein Titel nicht aufgelöst werden konnte."""
+    global _dirty
+    with _lock:
+        entries = _load()
+        previous = entries.get(_key(kind, name), {})
+        entries[_key(kind, name)] = {
+            "kind": kind,
+            "name": name,
+            "reason": reason,
+            "timestamp": time.time(),
+            "hits": previous.get("hits", 0),
+        }
+        # gespeichert wird gesammelt (prefetch.warmup bzw. beim Beenden), nicht pro Fehlschlag
+        _dirty = True
+
+
+def forget_missing(kind: str, name: str):
+    """Entfernt einen Eintrag (z. B. nachdem der Titel doch aufgelöst werden konnte)."""
+    global _dirty
+    with _lock:
+        entries = _load()
+        if entries.pop(_key(kind, name), None) is not None:
+            _dirty = True
+
+
+def is_known_missing(kind: str, name: str, count_hit: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Prüft, ob ein Titel als nicht auflösbar bekannt ist (und der Eintrag noch gilt).
+    Mit retry_missing wird None geliefert, im Offline-Modus gilt jeder Titel als fehlend.
+
+    Args:
+        count_hit: Anfrage im Trefferzähler für den Report mitzählen.
+
+    Returns:
+        Den Eintrag (mit "reason") oder None.
+    """
+    global _dirty
+    if offline:
+        return {"kind": kind, "name": name, "reason": REASON_OFFLINE}
+    if retry_missing:
+        return None
+    with _lock:
+        entry = _load().get(_key(kind, name))
+        if not entry:
+            return None
+        ttl = TTL_BY_REASON.get(entry.get("reason"), DEFAULT_TTL)
+        if time.time() - entry.get("timestamp", 0) > ttl:
+            return None
+
+        if count_hit:
+            # Trefferzähler für den Report; wird gesammelt beim Beenden gespeichert
+            entry["hits"] = entry.get("hits", 0) + 1
+            _dirty = True
+            _blocked_this_run[_key(kind, name)] = _blocked_this_run.get(_key(kind, name), 0) + 1
+        return entry
+
+
+@contextmanager
+def offline_mode():
+    """
+    Sperrt innerhalb des Blocks jeden Netzwerkzugriff der Scraper:
+    Titel, die nicht im Cache sind, werden sofort als fehlend behandelt.
+    """
+    global offline
+    previous = offline
+    offline = True
+    try:
+        yield
+    finally:
+        offline = previous
+
+
+def get_top_unresolved(top: int = 20, only_this_run: bool = False) -> List[Dict[str, Any]]:
+    """Die am häufigsten angefragten, nicht auflösbaren Titel."""
+    entries = _load()
+    if only_this_run:
+        selected = [entries[k] for k in _blocked_this_run if k in entries]
+    else:
+        selected = list(entries.values())
+    return sorted(selected, key=lambda e: e.get("hits", 0), reverse=True)[:top]
+
+
+def print_report(top: int = 20, only_this_run: bool = False):
+    entries = get_top_unresolved(top, only_this_run)
+    if not entries:
+        print("Keine nicht auflösbaren Namen bekannt.")
+        return
+    print(f"=== Nicht auflösbare Namen (Top {len(entries)}) ===")
+    for entry in entries:
+        age_days = (time.time() - entry.get("timestamp", 0)) / 86400
+        print(f" {entry.get('hits', 0):5d}x  [{entry['kind']}] {entry['name']} — {entry['reason']} (vor {age_days:.1f} Tagen)")
+
+
+def clear(kind: Optional[str] = None):
+    """Leert den negativen Cache (optional nur eine Art)."""
+    global _dirty
+    entries = _load()
+    for key in [k for k, e in entries.items() if kind is None or e.get("kind") == kind]:
+        del entries[key]
+    _dirty = True
+    save()
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Negativer Cache für nicht auflösbare Pokémon- und Attackennamen.")
+    ap.add_argument("--report", action="store_true", help="Die häufigsten nicht auflösbaren Namen anzeigen.")
+    ap.add_argument("--top", type=int, default=20, help="Anzahl Einträge im Report.")
+    ap.add_argument("--clear", choices=["all", KIND_ATTACK, KIND_POKEMON], help="Einträge löschen.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.clear:
+        clear(None if args.clear == "all" else args.clear)
+        print(f"Negativer Cache geleert ({args.clear}).")
+    if args.report or not args.clear:
+        print_report(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,10 @@ import json
 import os
 from typing import List, Optional, Dict, Tuple, Any, Set
 
+import cache_files
 import global_infos
+import name_index
+import negative_cache
 
 
 def fetch_raw_wikitext(pokemon_name: str) -> Optional[str]:
@@ -34,8 +37,10 @@ def fetch_raw_wikitext(pokemon_name: str) -> Optional[str]:
             return wikitext
 
         print(f"❌ Kein Wikitext für {pokemon_name} gefunden.")
+        negative_cache.remember_missing(negative_cache.KIND_POKEMON, pokemon_name, negative_cache.REASON_NO_WIKITEXT)
     except Exception as e:
         print(f"❌ Fehler beim Abrufen von {pokemon_name}: {e}")
+        negative_cache.remember_missing(negative_cache.KIND_POKEMON, pokemon_name, negative_cache.reason_from_exception(e))
     return None
 
 
@@ -514,22 +519,44 @@ def save_to_cache_if_missing(pokemon_name: str, data: Dict, filename: str = glob
     return cache[pokemon_name]
 
 
-def get_pokemon_from_wiki(pokemon_name: str):
+def save_many_to_cache_if_missing(entries: Dict[str, Dict], filename: str = global_infos.POKEMON_CACHE_FILE_PATH):
     """
-    Holt Pokémon-Daten aus dem Wiki.
-    Speichert sie nur, falls nicht bereits im Cache vorhanden.
+    Wie save_to_cache_if_missing, aber für mehrere Pokémon mit einem einzigen Schreibvorgang.
     """
-    filename = global_infos.POKEMON_CACHE_FILE_PATH
-
     if os.path.exists(filename):
         with open(filename, "r", encoding="utf-8") as f:
             cache = json.load(f)
     else:
         cache = {}
 
-    if pokemon_name not in cache:
-        entry = build_pokemon_entry(pokemon_name)
-        if entry:
-            return save_to_cache_if_missing(pokemon_name, entry)
+    new_names = [name for name in entries if name not in cache]
+    if new_names:
+        for name in new_names:
+            cache[name] = entries[name]
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=4, ensure_ascii=False)
+        print(f"✅ {len(new_names)} Pokémon wurden neu im Cache gespeichert.")
+
+
+def get_pokemon_from_wiki(pokemon_name: str):
+    """
+    Holt Pokémon-Daten aus dem Wiki.
+    Speichert sie nur, falls nicht bereits im Cache vorhanden.
+    Namen, die bereits als nicht auflösbar bekannt sind (negativer Cache),
+    werden nicht erneut abgefragt. Der Cache-Zugriff läuft über den kanonischen
+    Namen (siehe name_index).
+    """
+    filename = global_infos.POKEMON_CACHE_FILE_PATH
+
+    cache = cache_files.load_json_cached(filename, {})
+    cached_entry = name_index.lookup(cache, pokemon_name, filename)
+    if cached_entry is not None:
+        return cached_entry
+
+    if negative_cache.is_known_missing(negative_cache.KIND_POKEMON, pokemon_name):
         return None
-    return cache[pokemon_name]
\ No newline at end of file
+    entry = build_pokemon_entry(pokemon_name)
+    if entry:
+        negative_cache.forget_missing(negative_cache.KIND_POKEMON, pokemon_name)
+        return save_to_cache_if_missing(pokemon_name, entry)
+    return None
\ No newline at end of file
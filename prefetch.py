@@ -0,0 +1,147 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import attack_web_scraper
+import cache_files
+import global_infos
+import learnset_index
+import name_index
+import negative_cache
+import pokemon_web_scraper
+from information_storage import id_to_name_generator
+
+# Anzahl paralleler HTTP-Anfragen beim Warmup
+PREFETCH_WORKERS = 8
+
+
+def _is_cached(path: str, name: str) -> bool:
+    cache = cache_files.load_json_cached(path, {})
+    return isinstance(cache, dict) and name_index.lookup(cache, name, path) is not None
+
+
+def _missing(names: Iterable[str], path: str, kind: str) -> List[str]:
+    """Namen, die weder im Cache noch als bekannt fehlend im negativen Cache stehen."""
+    result = []
+    seen = set()
+    for name in names:
+        key = name_index.canonical_key(name)
+        if not name or key in seen:
+            continue
+        seen.add(key)
+        if _is_cached(path, name) or negative_cache.is_known_missing(kind, name, count_hit=False):
+            continue
+        result.append(name)
+    return result
+
+
+def _fetch_concurrently(names: List[str], build_fn, workers: int) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Führt build_fn (reiner Netzwerk-/Parse-Teil, ohne Speichern) parallel für alle Namen aus."""
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(names))) as pool:
+        return dict(zip(names, pool.map(build_fn, names)))
+
+
+def get_opponent_names(opponent_team: List[Dict[str, Any]]) -> List[str]:
+    """Dex-Nummern des gegnerischen Teams -> deutsche Namen (ohne Netzwerk)."""
+    names = []
+    for pkm in opponent_team:
+        name = id_to_name_generator.get_german_name_by_id(pkm["id"])
+        if name:
+            names.append(name)
+    return names
+
+
+def get_opponent_moves(opponent_team: List[Dict[str, Any]]) -> Set[str]:
+    return {move for pkm in opponent_team for move in pkm.get("moves", []) if move}
+
+
+def get_owned_moves(owned_list: List[str], fight_level: Optional[int] = None) -> Set[str]:
+    """Alle Attacken aus den (ggf. auf das Level-Band begrenzten) Learnsets der eigenen Pokémon."""
+    moves = set()
+    for name in owned_list:
+        for attack_list in learnset_index.get_attack_lists_at_level(name, fight_level):
+            for move_meta in attack_list:
+                if isinstance(move_meta, dict) and move_meta.get("Name"):
+                    moves.add(move_meta["Name"])
+    return moves
+
+
+def warmup(opponent_team: List[Dict[str, Any]], owned_list: List[str], fight_level: Optional[int] = None,
+           workers: int = PREFETCH_WORKERS) -> Dict[str, Any]:
+    """
+    Berechnet die komplette Abhängigkeits-Hülle einer Analyse und holt alles Fehlende
+    parallel, bevor die Bewertung startet:
+
+    1) Gegner-IDs -> Namen -> Pokémon-Seiten, eigene Pokémon-Seiten und die Gegner-Attacken
+    2) eigene Learnsets -> deren Attacken
+
+    Gescrapt wird parallel, gespeichert wird danach gesammelt in einem Schreibvorgang
+    pro Cache-Datei. Fehlschläge landen im negativen Cache, sodass die anschließende
+    Bewertung ohne Netzwerk auskommt.
+
+    Returns:
+        Statistik mit den geholten bzw. fehlgeschlagenen Namen.
+    """
+    start = time.perf_counter()
+    stats = {"pokemon_fetched": [], "pokemon_failed": [], "moves_fetched": [], "moves_failed": []}
+
+    # --- Stufe 1: Pokémon-Seiten + bekannte Gegner-Attacken ---
+    pokemon_names = get_opponent_names(opponent_team) + list(owned_list)
+    missing_pokemon = _missing(pokemon_names, global_infos.POKEMON_CACHE_FILE_PATH, negative_cache.KIND_POKEMON)
+    missing_moves = _missing(sorted(get_opponent_moves(opponent_team)), global_infos.ATTACK_CACHE_FILE_PATH,
+                             negative_cache.KIND_ATTACK)
+
+    with ThreadPoolExecutor(max_workers=2) as stage:
+        pokemon_future = stage.submit(_fetch_concurrently, missing_pokemon, pokemon_web_scraper.build_pokemon_entry, workers)
+        moves_future = stage.submit(_fetch_concurrently, missing_moves, attack_web_scraper.build_attack_entry, workers)
+        pokemon_results = pokemon_future.result()
+        move_results = moves_future.result()
+
+    _store_pokemon(pokemon_results, stats)
+
+    # --- Stufe 2: Attacken aus den Learnsets der eigenen Pokémon ---
+    missing_moves = _missing(sorted(get_owned_moves(owned_list, fight_level)),
+                             global_infos.ATTACK_CACHE_FILE_PATH, negative_cache.KIND_ATTACK)
+    missing_moves = [m for m in missing_moves if m not in move_results]
+    move_results.update(_fetch_concurrently(missing_moves, attack_web_scraper.build_attack_entry, workers))
+
+    _store_moves(move_results, stats)
+    negative_cache.save()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _store_pokemon(results: Dict[str, Optional[Dict[str, Any]]], stats: Dict[str, Any]):
+    found = {name: entry for name, entry in results.items() if entry}
+    if found:
+        pokemon_web_scraper.save_many_to_cache_if_missing(found)
+    for name in results:
+        if results[name]:
+            negative_cache.forget_missing(negative_cache.KIND_POKEMON, name)
+            stats["pokemon_fetched"].append(name)
+        else:
+            stats["pokemon_failed"].append(name)
+
+
+def _store_moves(results: Dict[str, Optional[Dict[str, Any]]], stats: Dict[str, Any]):
+    found = {name: entry for name, entry in results.items() if entry}
+    if found:
+        attack_web_scraper.save_attacks_to_cache(found)
+    for name in results:
+        if results[name]:
+            negative_cache.forget_missing(negative_cache.KIND_ATTACK, name)
+            stats["moves_fetched"].append(name)
+        else:
+            stats["moves_failed"].append(name)
+
+
+def print_warmup_report(stats: Dict[str, Any]):
+    print(f" ~ Warmup ({stats['seconds']:.2f}s): "
+          f"{len(stats['pokemon_fetched'])} Pokémon, {len(stats['moves_fetched'])} Attacken geholt")
+    if stats["pokemon_failed"]:
+        print(f"   | Pokémon nicht auflösbar: {', '.join(stats['pokemon_failed'])}")
+    if stats["moves_failed"]:
+        print(f"   | Attacken nicht auflösbar: {', '.join(stats['moves_failed'])}")
@@ -0,0 +1,160 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Reihenfolge der Gewichte in allen Gewichtsvektoren (wie global_infos)
+WEIGHT_NAMES = ("w_dmg", "w_surv", "w_util", "w_expo")
+
+def min_max(*arrays: np.ndarray) -> Tuple[float, float]:
+    """Minimum und Maximum über alle (nicht leeren) Arrays."""
+    arrays = [a for a in arrays if a.size]
+    return float(min(a.min() for a in arrays)), float(max(a.max() for a in arrays))
+
+
+def normalize_damage(raw: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Min-Max-Normalisierung der Schadenswerte auf 0..1 (alle Werte gleich -> 0.5)."""
+    if math.isclose(vmin, vmax):
+        return np.full(raw.shape, 0.5)
+    return (raw - vmin) / (vmax - vmin)
+
+
+def exposure_scores(incoming: np.ndarray) -> np.ndarray:
+    """
+    Exposure pro eigenem Pokémon = Mittelwert der Zeile von incoming (eigene x Gegner-Slots).
+    Spaltenweise aufsummiert, damit die Summationsreihenfolge (und damit das Ergebnis
+    bitgenau) der bisherigen sum()-Schleife entspricht.
+    """
+    rows, cols = incoming.shape
+    if cols == 0:
+        return np.zeros(rows)
+    total = np.zeros(rows)
+    for j in range(cols):
+        total = total + incoming[:, j]
+    return total / cols
+
+
+def counter_raw_scores(damage: np.ndarray, incoming: np.ndarray, utility: np.ndarray,
+                       exposure: np.ndarray, weights: Sequence[float]) -> np.ndarray:
+    """Gewichtete Summe pro Paar (eigenes x Gegner); utility/exposure sind pro Zeile."""
+    w_dmg, w_surv, w_util, w_expo = weights
+    survival_estimate = 1.0 - incoming  # higher = better survive switch
+    return (w_dmg * damage) + (w_surv * survival_estimate) + (w_util * utility[:, None]) - (w_expo * exposure[:, None])
+
+
+def counter_features(damage: np.ndarray, incoming: np.ndarray, utility: np.ndarray,
+                     exposure: np.ndarray) -> np.ndarray:
+    """
+    Feature-Tensor (eigene x Gegner x 4) der Counter-Scores, linear in den Gewichten:
+    counter_raw = features @ (w_dmg, w_surv, w_util, w_expo). Das Minus der Exposure
+    steckt bereits im Feature.
+    """
+    rows, cols = damage.shape
+    return np.stack([
+        damage,
+        1.0 - incoming,
+        np.broadcast_to(utility[:, None], (rows, cols)),
+        -np.broadcast_to(exposure[:, None], (rows, cols)),
+    ], axis=-1)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Wie round(v, 2) pro Element. np.round rundet über v*100 und kann deshalb direkt an
+    der Grenze ...5 anders ausfallen; diese (seltenen) Werte rundet Python nach.
+    """
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    borderline = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if borderline.any():
+        rounded[borderline] = [round(v, 2) for v in values[borderline].tolist()]
+    return rounded
+
+
+def normalize_counter(counter_raw: np.ndarray, cr_min: float, cr_max: float) -> np.ndarray:
+    """Counter-Rohwerte auf 0..100 (zwei Nachkommastellen; alle gleich -> 50)."""
+    if math.isclose(cr_min, cr_max):
+        return np.full(counter_raw.shape, 50.0)
+    return _round2((counter_raw - cr_min) / (cr_max - cr_min) * 100.0)
+
+
+def survival_scores(incoming: np.ndarray, outgoing: np.ndarray, own_hp: np.ndarray, own_speed: np.ndarray,
+                    opp_hp: np.ndarray, opp_speed: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """
+    Vektorisierte Variante von damage_calc.calculate_survival_score für alle Paare.
+    own_* haben eine Zeile pro eigenem Pokémon, opp_* eine Spalte pro Gegner-Slot.
+    """
+    my_hp = np.maximum(own_hp, 1.0)[:, None]
+    opponent_hp = np.maximum(opp_hp, 1.0)[None, :]
+    my_speed = own_speed[:, None]
+    opponent_speed = opp_speed[None, :]
+
+    scaled_incoming_damage = ((vmax - vmin) * incoming + vmin)
+    survival_if_hit = 1.0 - np.minimum(scaled_incoming_damage / my_hp, 1.0)
+    can_i_ohko_opponent = ((vmax - vmin) * outgoing + vmin) >= opponent_hp
+
+    survival_if_win = np.where(can_i_ohko_opponent, 1.0, survival_if_hit)
+    speed_tie = 0.5 * survival_if_win + 0.5 * survival_if_hit
+    return np.where(my_speed > opponent_speed, survival_if_win,
+                    np.where(my_speed < opponent_speed, survival_if_hit, speed_tie))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indizes der k höchsten Scores, absteigend; bei Gleichstand gewinnt der kleinere Index
+    (wie ein stabiles sort(reverse=True) über die Originalreihenfolge).
+    """
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.zeros(0, dtype=int)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+def stat_vector(pokemon: Sequence[Optional[Dict[str, Any]]], stat: str, default: float) -> np.ndarray:
+    """Ein Statuswert (z. B. 'KP') für eine Liste von Pokémon-Einträgen aus dem Cache."""
+    return np.array([float(((p or {}).get("Statuswerte") or {}).get(stat, default)) for p in pokemon])
+
+
+def score_matrices(raw_p2o: np.ndarray, raw_o2p: np.ndarray, utility: np.ndarray,
+                   weights: Sequence[float]) -> Dict[str, Any]:
+    """
+    Die komplette Bewertung nach der Schadensberechnung in einem Durchgang.
+
+    Args:
+        raw_p2o: erwarteter Schaden eigene -> Gegner (eigene x Gegner-Slots)
+        raw_o2p: erwarteter Schaden Gegner -> eigene, ebenfalls (eigene x Gegner-Slots)
+        utility: Utility-Score pro eigenem Pokémon
+        weights: (w_dmg, w_surv, w_util, w_expo)
+
+    Returns:
+        Dict mit damage, incoming, exposure, counter_raw, counter_score und den Grenzen
+        vmin/vmax/cr_min/cr_max.
+    """
+    vmin, vmax = min_max(raw_p2o, raw_o2p)
+    damage = normalize_damage(raw_p2o, vmin, vmax)
+    incoming = normalize_damage(raw_o2p, vmin, vmax)
+    exposure = exposure_scores(incoming)
+    counter_raw = counter_raw_scores(damage, incoming, utility, exposure, weights)
+    cr_min, cr_max = min_max(counter_raw)
+    return {
+        "vmin": vmin, "vmax": vmax,
+        "damage": damage, "incoming": incoming, "exposure": exposure,
+        "counter_raw": counter_raw, "cr_min": cr_min, "cr_max": cr_max,
+        "counter_score": normalize_counter(counter_raw, cr_min, cr_max),
+    }
+
+
+def rows_to_matrix(rows: Dict[str, Dict[str, float]], row_names: List[str], col_names: List[str]) -> np.ndarray:
+    """Verschachteltes Dict row -> col -> Wert als Matrix (fehlende Werte = 0.0)."""
+    return np.array([[rows.get(r, {}).get(c, 0.0) for c in col_names] for r in row_names], dtype=float).reshape(len(row_names), len(col_names))
+
+
+def columns_to_matrix(columns: Dict[str, Dict[str, float]], row_names: List[str], col_names: List[str]) -> np.ndarray:
+    """Verschachteltes Dict col -> row -> Wert als Matrix (row x col, fehlende Werte = 0.0)."""
+    return np.array([[columns.get(c, {}).get(r, 0.0) for c in col_names] for r in row_names], dtype=float).reshape(len(row_names), len(col_names))
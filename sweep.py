@@ -0,0 +1,141 @@
+import argparse
+import itertools
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+import global_infos
+import incremental_analysis
+import main as counter_analysis
+import negative_cache
+import scoring
+
+
+def build_features(state: Dict[str, Any], owned_list: List[str], opp_names: List[str]) -> np.ndarray:
+    """Feature-Tensor (eigene x Gegner-Slots x 4) aus dem Analyse-Zustand (siehe incremental_analysis)."""
+    damage = scoring.rows_to_matrix(state["damage_p2o"], owned_list, opp_names)
+    incoming = scoring.columns_to_matrix(state["damage_o2p"], owned_list, opp_names)
+    utility = np.array([state["utility"].get(name, 0.0) for name in owned_list])
+    exposure = np.array([state["exposure"].get(name, 0.0) for name in owned_list])
+    return scoring.counter_features(damage, incoming, utility, exposure)
+
+
+def parse_grid(specs: Sequence[str]) -> List[List[float]]:
+    """
+    'w_surv=1,2,3' 'w_dmg=0.5,2' -> kartesisches Produkt; nicht genannte Gewichte
+    behalten ihren Wert aus global_infos.
+    """
+    axes = {name: [getattr(global_infos, name)] for name in scoring.WEIGHT_NAMES}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in axes:
+            raise ValueError(f"Unbekanntes Gewicht '{name}' (erlaubt: {', '.join(scoring.WEIGHT_NAMES)})")
+        axes[name] = [float(v) for v in values.split(",") if v.strip()]
+    return [list(combo) for combo in itertools.product(*(axes[name] for name in scoring.WEIGHT_NAMES))]
+
+
+def parse_weight_vectors(specs: Sequence[str]) -> List[List[float]]:
+    """'2,3,0.5,1' -> [2.0, 3.0, 0.5, 1.0] (Reihenfolge wie scoring.WEIGHT_NAMES)."""
+    vectors = []
+    for spec in specs:
+        values = [float(v) for v in spec.split(",")]
+        if len(values) != len(scoring.WEIGHT_NAMES):
+            raise ValueError(f"Gewichtsvektor braucht {len(scoring.WEIGHT_NAMES)} Werte: '{spec}'")
+        vectors.append(values)
+    return vectors
+
+
+def sweep(features: np.ndarray, weight_vectors: Sequence[Sequence[float]], top: int = 3) -> np.ndarray:
+    """
+    Wertet alle Gewichtsvektoren in einem Matrixprodukt aus.
+
+    Args:
+        features: (eigene x Gegner x 4), siehe scoring.counter_features
+        weight_vectors: K Vektoren (w_dmg, w_surv, w_util, w_expo)
+        top: Länge der Top-Liste pro Gegner
+
+    Returns:
+        (K x top x Gegner) Indizes der besten eigenen Pokémon pro Gewichtung und Gegner
+    """
+    weights = np.asarray(weight_vectors, dtype=float).T          # 4 x K
+    counter_raw = features @ weights                              # eigene x Gegner x K
+    rankings = []
+    for k in range(counter_raw.shape[2]):
+        cr_min, cr_max = scoring.min_max(counter_raw[:, :, k])
+        scores = scoring.normalize_counter(counter_raw[:, :, k], cr_min, cr_max)
+        # stabil: bei Gleichstand gewinnt die Reihenfolge aus owned_list (wie in main)
+        rankings.append(np.argsort(-scores, axis=0, kind="stable")[:top])
+    return np.stack(rankings)
+
+
+def rank_stability(rankings: np.ndarray, baseline: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Stabilität der Top-Listen über alle Gewichtungen im Vergleich zur Basis-Gewichtung.
+
+    Returns:
+        Dict mit
+        - "top1_agreement": Anteil der Gewichtungen mit derselben Nr. 1 (pro Gegner)
+        - "overlap":        mittlerer Anteil gemeinsamer Top-Pokémon (pro Gegner)
+    """
+    top = rankings.shape[1]
+    top1 = (rankings[:, 0, :] == baseline[0][None, :]).mean(axis=0)
+    # (K x top x 1 x Gegner) == (1 x 1 x top x Gegner) -> gemeinsame Einträge zählen
+    shared = (rankings[:, :, None, :] == baseline[None, None, :, :]).any(axis=2).sum(axis=1)
+    return {"top1_agreement": top1, "overlap": shared.mean(axis=0) / top}
+
+
+def print_report(rankings: np.ndarray, baseline: np.ndarray, owned_list: List[str], opp_names: List[str],
+                 seconds: float):
+    stability = rank_stability(rankings, baseline)
+    k, top, _ = rankings.shape
+    print(f"\n=== Gewichts-Sweep: {k} Gewichtungen in {seconds * 1000:.1f} ms (Top {top}) ===")
+    for j, opp_name in enumerate(opp_names):
+        counts = np.bincount(rankings[:, :, j].ravel(), minlength=len(owned_list))
+        frequent = np.argsort(-counts, kind="stable")[:top + 2]
+        print(f"\nGegner: {opp_name}")
+        print(f"    - Basis-Top: {', '.join(owned_list[i] for i in baseline[:, j])}")
+        print(f"    - gleiche Nr. 1: {stability['top1_agreement'][j]:.0%}, "
+              f"Top-{top}-Überschneidung: {stability['overlap'][j]:.0%}")
+        print("    - Häufigkeit in der Top-Liste: " + ", ".join(
+            f"{owned_list[i]} {counts[i] / k:.0%}" for i in frequent if counts[i]))
+
+
+def run(weight_vectors: List[List[float]], top: int = 3, full: bool = False):
+    opponent_team, owned_list, fight_level = counter_analysis.prepare_fight()
+    with negative_cache.offline_mode():
+        state = counter_analysis.update_analysis_state(opponent_team, owned_list, fight_level, full)
+    if state is None:
+        return
+
+    opp_names = incremental_analysis.get_opponent_names(opponent_team)
+    features = build_features(state, owned_list, opp_names)
+
+    start = time.perf_counter()
+    rankings = sweep(features, [incremental_analysis.get_weights()] + weight_vectors, top)
+    seconds = time.perf_counter() - start
+    print_report(rankings[1:], rankings[0], owned_list, opp_names, seconds)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Counter-Analyse für viele Gewichtungen auf einmal (Rang-Stabilität).")
+    ap.add_argument("--grid", nargs="+", default=[], metavar="NAME=V1,V2",
+                    help="Werte pro Gewicht, z. B. --grid w_surv=1,2,3 w_dmg=1,2 (kartesisches Produkt).")
+    ap.add_argument("--weights", nargs="+", default=[], metavar="DMG,SURV,UTIL,EXPO",
+                    help="Einzelne Gewichtsvektoren, z. B. --weights 2,3,0.5,1 1,1,1,1")
+    ap.add_argument("--top", type=int, default=3, help="Länge der Top-Liste pro Gegner.")
+    ap.add_argument("--full", action="store_true", help="Analyse-Zustand neu berechnen.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    vectors = parse_weight_vectors(args.weights)
+    if args.grid or not vectors:
+        vectors += parse_grid(args.grid)
+    run(vectors, args.top, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import argparse
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import campaign
+import compiled_snapshot
+import damage_distribution
+import global_infos
+import incremental_analysis
+import negative_cache
+import prefetch
+import scoring
+import team_optimizer
+from damage_distribution import OUTCOME_WEIGHTS
+
+# KP werden in so viele Stufen eingeteilt (Schlüssel der Transpositionstabelle)
+HP_BUCKETS = 16
+# Zeitbudget pro Kampf und maximale Suchtiefe (in Runden)
+TIME_BUDGET = 2.0
+MAX_DEPTH = 40
+
+# Zustand: (KP-Stufen des eigenen Teams, aktives eigenes Pokémon oder -1 = muss wählen,
+#           Index des aktiven Gegners in der Reihenfolge, KP-Stufe des aktiven Gegners,
+#           1 = die letzte Runde war ein freiwilliger Wechsel, sonst 0)
+State = Tuple[Tuple[int, ...], int, int, int, int]
+ATTACK = ("attack",)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def hit_buckets(damage: np.ndarray, accuracy: float, hp: float) -> Tuple[Tuple[int, float], ...]:
+    """
+    Schaden eines Angriffs in KP-Stufen des Verteidigers als Verteilung [(Stufen, Wahrscheinlichkeit)]:
+    Fehlschlag (0 Stufen) oder der mittlere Treffer über die 32 Ausgänge (Wurf und Volltreffer,
+    damage_distribution.OUTCOME_WEIGHTS). Der Bruchteil einer Stufe wird mit seinem Anteil als
+    Wahrscheinlichkeit aufgerundet, sonst abgerundet: der erwartete Schaden bleibt erhalten,
+    auch Treffer unter einer Stufe summieren sich.
+    """
+    buckets = min(float((damage * OUTCOME_WEIGHTS).sum()) / max(hp, 1.0) * HP_BUCKETS, HP_BUCKETS)
+    low = int(buckets)
+    frac = buckets - low
+    outcomes = {0: 1.0 - accuracy}
+    for value, p in ((low, accuracy * (1.0 - frac)), (low + 1, accuracy * frac)):
+        outcomes[value] = outcomes.get(value, 0.0) + p
+    return tuple(sorted((value, p) for value, p in outcomes.items() if p > 0.0))
+
+
+def build_matchups(snapshot: Dict[str, Any], fight: int, team: Sequence[int],
+                   own_level: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Alles, was die Suche über ein Paar wissen muss, in KP-Stufen des Verteidigers:
+    own_hit[i][k] / opp_hit[k][i] = Schadensverteilung eines Angriffs (siehe hit_buckets).
+    Schaden und KP kommen aus der Level-Formel (damage_distribution, eigene Pokémon auf
+    own_level, None = höchstes Gegner-Level). team sind Zeilen von snapshot["owned_pokemon"].
+    """
+    dist = damage_distribution.fight_distributions(snapshot, fight, own_level, team)
+    out, inc = dist["outgoing"], dist["incoming"]
+    accuracy = snapshot["move_accuracy"]
+
+    def hits(side: Dict[str, Any], i: int, k: int, hp: float) -> Tuple[Tuple[int, float], ...]:
+        move = side["move"][i, k]
+        return hit_buckets(side["damage"][i, k], float(accuracy[move]) if move >= 0 else 0.0, hp)
+
+    n_own, n_opp = out["move"].shape
+    return {"own_speed": dist["own_speed"].tolist(), "opp_speed": dist["slot_speed"].tolist(),
+            "own_hit": [[hits(out, i, k, out["hp"][k]) for k in range(n_opp)] for i in range(n_own)],
+            "opp_hit": [[hits(inc, i, k, inc["hp"][i]) for i in range(n_own)] for k in range(n_opp)]}
+
+
+def _after_hit(hp: int, damage: int) -> int:
+    """Neue KP-Stufe nach einem Treffer von damage Stufen."""
+    return max(0, hp - damage)
+
+
+class _Planner:
+    """
+    Expectimax über die eigenen Entscheidungen (Lead, Angreifen, Wechseln, Ersatz nach K.O.)
+    gegen die feste Reihenfolge des Gegners; Zufallsknoten sind Fehlschlag/Treffer beider Angriffe
+    (mit zufälliger Rundung auf KP-Stufen, siehe hit_buckets) und die Zugreihenfolge bei gleicher
+    Initiative. Der Gegner greift immer mit
+    seiner besten Attacke an. Wert eines Zustands = Siegwahrscheinlichkeit.
+
+    Direkt nach einem freiwilligen Wechsel wird gegen denselben Gegner-Slot nicht erneut
+    gewechselt: A -> B -> A bzw. A -> B -> C kostet nur Runden und KP gegenüber Angreifen
+    bzw. dem direkten Wechsel A -> C (der Gegner hat keine Reaktion außer seinem Angriff),
+    und solche Zyklen würden sonst jede Iteration bis an den Horizont füllen.
+    """
+
+    def __init__(self, matchups: Dict[str, Any], deadline: float):
+        self.m = matchups
+        self.n_opp = len(matchups["opp_hit"])
+        self.deadline = deadline
+        # Transpositionstabelle: Zustand -> (Wert, Tiefe, exakt, beste Aktion)
+        self.table: Dict[State, Tuple[float, int, bool, Any]] = {}
+        self.stats = {"nodes": 0, "hits": 0}
+
+    def heuristic(self, state: State) -> float:
+        """Schätzung am Horizont: Anteil der eigenen an allen verbleibenden KP (relativ)."""
+        own_hp, _, k, opp_hp, _ = state
+        own_share = sum(own_hp) / (HP_BUCKETS * len(own_hp))
+        opp_share = (self.n_opp - k - 1 + opp_hp / HP_BUCKETS) / self.n_opp
+        return own_share / (own_share + opp_share) if own_share + opp_share else 0.0
+
+    def _resolve(self, own_hp: Tuple[int, ...], active: int, k: int, opp_hp: int,
+                 switched: int) -> Tuple[Optional[float], State]:
+        """Zustand nach einer Runde; liefert (Endwert oder None, Zustand). Ein K.O. hebt die Wechselsperre auf."""
+        if opp_hp <= 0:
+            if k + 1 == self.n_opp:
+                return 1.0, (own_hp, active, k, 0, 0)
+            k, opp_hp, switched = k + 1, HP_BUCKETS, 0
+        if own_hp[active] <= 0:
+            if not any(own_hp):
+                return 0.0, (own_hp, active, k, opp_hp, 0)
+            active, switched = -1, 0
+        return None, (own_hp, active, k, opp_hp, switched)
+
+    def _outcomes(self, state: State, action: Any) -> List[Tuple[float, State, Optional[float]]]:
+        """Alle Folgezustände einer Aktion mit Wahrscheinlichkeit (und Endwert, falls vorbei)."""
+        own_hp, active, k, opp_hp, _ = state
+        merged: Dict[Tuple[State, Optional[float]], float] = {}
+
+        def add(p: float, new_own: Tuple[int, ...], new_active: int, hp_opp: int, switched: int = 0):
+            terminal, next_state = self._resolve(new_own, new_active, k, hp_opp, switched)
+            merged[(next_state, terminal)] = merged.get((next_state, terminal), 0.0) + p
+
+        if action == ATTACK:
+            own_speed, opp_speed = self.m["own_speed"][active], self.m["opp_speed"][k]
+            orders = [(1.0, True)] if own_speed > opp_speed else [(1.0, False)] if own_speed < opp_speed \
+                else [(0.5, True), (0.5, False)]
+            for p_order, own_first in orders:
+                for own_damage, p_own in self.m["own_hit"][active][k]:
+                    for opp_damage, p_opp in self.m["opp_hit"][k][active]:
+                        hp_me, hp_opp = own_hp[active], opp_hp
+                        if own_first:
+                            hp_opp = _after_hit(hp_opp, own_damage)
+                            if hp_opp > 0:
+                                hp_me = _after_hit(hp_me, opp_damage)
+                        else:
+                            hp_me = _after_hit(hp_me, opp_damage)
+                            if hp_me > 0:
+                                hp_opp = _after_hit(hp_opp, own_damage)
+                        add(p_order * p_own * p_opp, own_hp[:active] + (hp_me,) + own_hp[active + 1:], active, hp_opp)
+        else:
+            # Wechsel (oder Lead/Ersatz bei active == -1): nur bei freiwilligem Wechsel greift der Gegner an
+            target = action[1]
+            if active == -1:
+                return [(1.0, (own_hp, target, k, opp_hp, 0), None)]
+            for opp_damage, p in self.m["opp_hit"][k][target]:
+                hp_me = _after_hit(own_hp[target], opp_damage)
+                add(p, own_hp[:target] + (hp_me,) + own_hp[target + 1:], target, opp_hp, 1)
+        return [(p, next_state, terminal) for (next_state, terminal), p in merged.items()]
+
+    def actions(self, state: State) -> List[Any]:
+        own_hp, active, _, _, switched = state
+        switches = [("switch", b) for b, hp in enumerate(own_hp) if hp > 0 and b != active]
+        return switches if active == -1 else [ATTACK] if switched else [ATTACK] + switches
+
+    def value(self, state: State, depth: int) -> Tuple[float, bool]:
+        """(Siegwahrscheinlichkeit, exakt?) eines Zustands bei Suchtiefe depth (in Runden)."""
+        entry = self.table.get(state)
+        if entry is not None and (entry[2] or entry[1] >= depth):
+            self.stats["hits"] += 1
+            return entry[0], entry[2]
+        if depth <= 0:
+            return self.heuristic(state), False
+        self.stats["nodes"] += 1
+        if self.stats["nodes"] % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        # Lead/Ersatz kostet keine Runde
+        child_depth = depth if state[1] == -1 else depth - 1
+        best, all_exact, best_action = -1.0, True, None
+        for action in self.actions(state):
+            total, exact, p_self = 0.0, True, 0.0
+            for p, next_state, terminal in self._outcomes(state, action):
+                if terminal is not None:
+                    total += p * terminal
+                elif next_state == state:
+                    # beide verfehlen: gleicher Zustand -> geometrische Reihe statt Rekursion
+                    p_self += p
+                else:
+                    v, v_exact = self.value(next_state, child_depth)
+                    total += p * v
+                    exact = exact and v_exact
+            v = total / (1.0 - p_self) if p_self < 1.0 else 0.0
+            all_exact = all_exact and exact
+            if v > best:
+                best, best_action = v, action
+        # exakt nur, wenn keine Aktion am Horizont abgeschnitten wurde
+        self.table[state] = (best, depth, all_exact, best_action)
+        return best, all_exact
+
+    def best_action(self, state: State) -> Any:
+        entry = self.table.get(state)
+        return entry[3] if entry else None
+
+
+def plan_fight(matchups: Dict[str, Any], time_budget: float = TIME_BUDGET,
+               max_depth: int = MAX_DEPTH) -> Dict[str, Any]:
+    """
+    Iterative Vertiefung (1, 2, ... Runden) bis das Ergebnis exakt ist, max_depth erreicht
+    ist oder das Zeitbudget abläuft; die Transpositionstabelle bleibt zwischen den
+    Iterationen erhalten.
+
+    Returns:
+        Dict mit win (Siegwahrscheinlichkeit), depth, exact, plan (wahrscheinlichster Verlauf)
+        und Suchstatistik
+    """
+    n_own = len(matchups["own_hit"])
+    root: State = ((HP_BUCKETS,) * n_own, -1, 0, HP_BUCKETS, 0)
+    start = time.perf_counter()
+    planner = _Planner(matchups, start + time_budget)
+    result = {"win": planner.heuristic(root), "depth": 0, "exact": False}
+    table = dict(planner.table)
+    for depth in range(1, max_depth + 1):
+        try:
+            win, exact = planner.value(root, depth)
+        except _Timeout:
+            # angefangene Iteration verwerfen: Aktionen aus der letzten vollständigen Tiefe
+            planner.table = table
+            break
+        result.update(win=win, depth=depth, exact=exact)
+        table = dict(planner.table)
+        if exact:
+            break
+    result["plan"] = principal_variation(planner, root)
+    result["stats"] = {**planner.stats, "table": len(planner.table), "seconds": time.perf_counter() - start}
+    return result
+
+
+def principal_variation(planner: _Planner, root: State, max_steps: int = 100) -> List[Tuple[State, Any]]:
+    """Folgt den besten Aktionen und jeweils dem wahrscheinlichsten Ausgang."""
+    plan, state = [], root
+    for _ in range(max_steps):
+        action = planner.best_action(state)
+        if action is None:
+            break
+        plan.append((state, action))
+        outcomes = [o for o in planner._outcomes(state, action) if o[1] != state or o[2] is not None]
+        if not outcomes:
+            break
+        _, state, terminal = max(outcomes, key=lambda o: o[0])
+        if terminal is not None:
+            plan.append((state, "win" if terminal == 1.0 else "loss"))
+            break
+    return plan
+
+
+def select_team(snapshot: Dict[str, Any], fight: int, size: int) -> List[int]:
+    """Bestes Team für den Kampf (team_optimizer auf den Counter-Scores des Snapshots)."""
+    matrices = compiled_snapshot.fight_matrices(snapshot, fight)
+    if not matrices["raw_p2o"].size:
+        return list(range(min(size, len(snapshot["owned_pokemon"]))))
+    scores = scoring.score_matrices(matrices["raw_p2o"], matrices["raw_o2p"], matrices["utility"],
+                                    incremental_analysis.get_weights())
+    problem = team_optimizer.make_problem(snapshot["owned_names"], snapshot["fights"][fight]["opponents"],
+                                          scores["counter_score"], scores["exposure"])
+    return team_optimizer.optimize_team(problem, size, team_optimizer.get_team_weights())["members"]
+
+
+def print_plan(snapshot: Dict[str, Any], fight: int, team: List[int], result: Dict[str, Any]):
+    info = snapshot["fights"][fight]
+    names = [snapshot["owned_names"][i] for i in team]
+    opponents = info["opponents"]
+    stats = result["stats"]
+    print(f"\n=== {info['trainer_name']} ({info['location']}, Lv. {info['level']}) ===")
+    print(f" ~ Team: {', '.join(names)}")
+    label = "Siegchance" if result["exact"] else "geschätzte Siegchance (Horizont-Heuristik)"
+    print(f" ~ {label}: {result['win']:.1%} (Tiefe {result['depth']}{', exakt' if result['exact'] else ''}; "
+          f"{stats['nodes']:,} Knoten, {stats['hits']:,} TT-Treffer, {stats['table']:,} Einträge, "
+          f"{stats['seconds']:.2f}s)")
+    for state, action in result["plan"]:
+        own_hp, active, k, opp_hp, _ = state
+        if action in ("win", "loss"):
+            print(f"   => {'Sieg' if action == 'win' else 'Niederlage'}")
+        elif active == -1:
+            verb = "Lead" if k == 0 and all(hp == HP_BUCKETS for hp in own_hp) else "Ersatz"
+            print(f"   | {verb}: {names[action[1]]} (gegen {opponents[k]})")
+        elif action == ATTACK:
+            print(f"   | {names[active]} greift {opponents[k]} an "
+                  f"(KP {own_hp[active] / HP_BUCKETS:.0%} / {opp_hp / HP_BUCKETS:.0%})")
+        else:
+            print(f"   | Wechsel: {names[active]} -> {names[action[1]]} (gegen {opponents[k]})")
+
+
+def run(fights: List[Dict[str, Any]], owned_list: List[str], team_names: Optional[List[str]] = None,
+        time_budget: float = TIME_BUDGET, max_depth: int = MAX_DEPTH):
+    prefetch.print_warmup_report(campaign.warmup_campaign(fights, owned_list))
+    with negative_cache.offline_mode():
+        snapshot = compiled_snapshot.build_snapshot(team_names or owned_list, fights, global_infos.level_aware_moves)
+        for fight in range(len(snapshot["fights"])):
+            if not snapshot["fights"][fight]["opponents"] or not len(snapshot["owned_pokemon"]):
+                continue
+            if team_names:
+                team = list(range(min(global_infos.team_size, len(snapshot["owned_pokemon"]))))
+            else:
+                team = select_team(snapshot, fight, global_infos.team_size)
+            result = plan_fight(build_matchups(snapshot, fight, team, global_infos.own_pokemon_level), time_budget, max_depth)
+            print_plan(snapshot, fight, team, result)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Lead- und Wechselplan für ganze Kämpfe (Expectimax).")
+    ap.add_argument("--trainer", default=global_infos.opponent_trainer_name,
+                    help="Kämpfe, deren Trainername diesen Text enthält.")
+    ap.add_argument("--location", help="Nur Kämpfe, deren Ort diesen Text enthält.")
+    ap.add_argument("--edition", help="Nur Kämpfe dieser Edition (z. B. SWSH).")
+    ap.add_argument("--team", nargs="+", help="Festes Team statt des besten Teams aus team_optimizer.")
+    ap.add_argument("--time-budget", type=float, default=TIME_BUDGET, help="Sekunden pro Kampf.")
+    ap.add_argument("--max-depth", type=int, default=MAX_DEPTH, help="Maximale Suchtiefe in Runden.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    fights = campaign.select_fights(args.location, args.edition, args.trainer)
+    print(f" ~ {len(fights)} Kämpfe ausgewählt")
+    run(fights, global_infos.owned_pokemon_list, args.team, args.time_budget, args.max_depth)
+
+
+if __name__ == "__main__":
+    main()
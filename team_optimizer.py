@@ -0,0 +1,292 @@
+import argparse
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import global_infos
+import incremental_analysis
+import info_manager
+import main as counter_analysis
+import negative_cache
+import scoring
+
+# Bis zu so vielen Kandidaten wird exakt gesucht (Branch-and-Bound), darüber nur Beam-Search
+EXACT_CANDIDATE_LIMIT = 80
+# Abbruch des Branch-and-Bound nach so vielen Knoten (Ergebnis ist dann nicht bewiesen optimal)
+MAX_NODES = 500_000
+BEAM_WIDTH = 32
+
+
+def get_team_weights() -> List[float]:
+    return [global_infos.team_w_mean, global_infos.team_w_expo, global_infos.team_w_type]
+
+
+def build_problem(state: Dict[str, Any], owned_list: List[str], opp_names: List[str]) -> Dict[str, Any]:
+    """Eingaben der Team-Suche aus dem Analyse-Zustand (siehe incremental_analysis)."""
+    names = list(dict.fromkeys(owned_list))
+    return make_problem(names, opp_names, scoring.rows_to_matrix(state["counter_score"], names, opp_names),
+                        np.array([state["exposure"].get(name, 0.0) for name in names]))
+
+
+def make_problem(names: List[str], opp_names: List[str], scores: np.ndarray, exposure: np.ndarray) -> Dict[str, Any]:
+    """
+    Eingaben der Team-Suche: Counter-Scores (eigene x Gegner-Slots), Exposure pro eigenem
+    Pokémon und die Typen als boolesche Matrix (eigene x Typen).
+    """
+    type_names = list(global_infos.pokemon_types)
+    types = np.zeros((len(names), len(type_names)), dtype=bool)
+    for i, name in enumerate(names):
+        for type_name in (info_manager.get_pokemon_in_cache(name) or {}).get("Typen") or []:
+            if type_name not in type_names:
+                type_names.append(type_name)
+                types = np.pad(types, ((0, 0), (0, 1)))
+            types[i, type_names.index(type_name)] = True
+    return {
+        "names": names,
+        "opponents": opp_names,
+        "scores": scores,
+        "exposure": exposure,
+        "types": types,
+        "type_names": type_names,
+    }
+
+
+def _objective(coverage: np.ndarray, exposure: np.ndarray, redundancy: np.ndarray,
+               weights: Sequence[float]) -> np.ndarray:
+    """
+    Team-Score (auch zeilenweise für viele Teams auf einmal):
+    schlechteste Abdeckung + w_mean * mittlere Abdeckung - w_expo * Exposure - w_type * Typ-Dopplungen
+    (Summe über die Typen von max(Anzahl - 1, 0), also ein Punkt pro doppeltem Typ-Vorkommen).
+    """
+    w_mean, w_expo, w_type = weights
+    return coverage.min(axis=-1) + w_mean * coverage.mean(axis=-1) - w_expo * exposure - w_type * redundancy
+
+
+def evaluate_team(problem: Dict[str, Any], members: Sequence[int], weights: Sequence[float]) -> Dict[str, Any]:
+    """Score und Einzelteile eines Teams (Indizes in problem["names"])."""
+    members = list(members)
+    coverage = problem["scores"][members].max(axis=0) if members else np.zeros(len(problem["opponents"]))
+    type_counts = problem["types"][members].sum(axis=0)
+    exposure = float(problem["exposure"][members].sum())
+    redundancy = int(np.maximum(type_counts - 1, 0).sum())
+    return {
+        "members": members,
+        "score": float(_objective(coverage, np.float64(exposure), np.float64(redundancy), weights)),
+        "coverage": coverage,
+        "exposure": exposure,
+        "redundancy": redundancy,
+    }
+
+
+def team_values(problem: Dict[str, Any], teams: np.ndarray, weights: Sequence[float]) -> np.ndarray:
+    """Team-Scores vieler gleich großer Teams auf einmal (teams: Teams x Mitglieder, Indizes in problem["names"])."""
+    coverage = problem["scores"][teams].max(axis=1)
+    exposure = problem["exposure"][teams].sum(axis=1)
+    redundancy = np.maximum(problem["types"][teams].sum(axis=1) - 1, 0).sum(axis=1)
+    return _objective(coverage, exposure, redundancy, weights)
+
+
+def beam_teams(problem: Dict[str, Any], size: int, weights: Sequence[float],
+               width: int = BEAM_WIDTH) -> List[List[int]]:
+    """
+    Greedy/Beam-Suche: baut Teams Mitglied für Mitglied auf und behält pro Schritt die
+    width besten Teilteams. width=1 ist die reine Greedy-Suche.
+
+    Returns:
+        die bis zu width Teams der letzten Stufe, bestes zuerst
+    """
+    scores, exposure, types = problem["scores"], problem["exposure"], problem["types"]
+    n = scores.shape[0]
+    beams = [((), np.zeros(scores.shape[1]), 0.0, np.zeros(types.shape[1], dtype=bool), 0)]
+    for _ in range(min(size, n)):
+        expanded = {}
+        for members, coverage, expo, seen, redundancy in beams:
+            new_coverage = np.maximum(coverage, scores)
+            new_redundancy = redundancy + (types & seen).sum(axis=1)
+            values = _objective(new_coverage, expo + exposure, new_redundancy, weights)
+            values[list(members)] = -np.inf
+            for i in np.argsort(-values, kind="stable")[:width].tolist():
+                key = tuple(sorted(members + (i,)))
+                if values[i] == -np.inf or key in expanded:
+                    continue
+                expanded[key] = (float(values[i]), members + (i,), new_coverage[i], expo + float(exposure[i]),
+                                 seen | types[i], int(new_redundancy[i]))
+        best = sorted(expanded.values(), key=lambda x: x[0], reverse=True)[:width]
+        beams = [entry[1:] for entry in best]
+    return [sorted(beam[0]) for beam in beams]
+
+
+def beam_search(problem: Dict[str, Any], size: int, weights: Sequence[float],
+                width: int = BEAM_WIDTH) -> Tuple[List[int], float]:
+    """Bestes Team der Beam-Suche (siehe beam_teams) mit seinem Score."""
+    members = beam_teams(problem, size, weights, width)[0]
+    return members, evaluate_team(problem, members, weights)["score"]
+
+
+def _suffix_bounds(problem: Dict[str, Any], order: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Für jede Position r der Suchreihenfolge:
+    - höchster Counter-Score pro Gegner unter order[r:]
+    - Summe der k kleinsten Exposures unter order[r:] (k = 0..size)
+    """
+    scores = problem["scores"][order]
+    exposure = problem["exposure"][order]
+    n, m = scores.shape
+    suffix_max = np.zeros((n + 1, m))
+    min_exposure = np.full((n + 1, size + 1), np.inf)
+    min_exposure[:, 0] = 0.0
+    smallest: List[float] = []
+    for r in range(n - 1, -1, -1):
+        suffix_max[r] = np.maximum(suffix_max[r + 1], scores[r])
+        smallest = sorted(smallest + [float(exposure[r])])[:size]
+        min_exposure[r, 1:len(smallest) + 1] = np.cumsum(smallest)
+    return suffix_max, min_exposure
+
+
+def branch_and_bound(problem: Dict[str, Any], size: int, weights: Sequence[float],
+                     incumbent: Optional[Tuple[List[int], float]] = None,
+                     max_nodes: int = MAX_NODES) -> Tuple[List[int], float, Dict[str, Any]]:
+    """
+    Exakte Suche über alle Teams der Größe size mit Upper-Bound-Pruning.
+
+    Obere Schranke eines Teilteams: jeder Gegner wird höchstens so gut abgedeckt wie vom
+    besten noch möglichen Kandidaten, die Exposure steigt mindestens um die kleinsten noch
+    möglichen Werte, und Typ-Dopplungen werden nie weniger. Liegt die Schranke nicht über
+    dem besten bekannten Team (incumbent, z. B. aus beam_search), wird der Ast verworfen.
+    Die letzte Position wird für alle Kandidaten auf einmal ausgewertet.
+
+    Returns:
+        (Team, Score, Statistik); Statistik["optimal"] ist False, wenn max_nodes erreicht wurde
+    """
+    scores, exposure, types = problem["scores"], problem["exposure"], problem["types"]
+    n, m = scores.shape
+    w_mean, w_expo, w_type = weights
+    # starke Kandidaten zuerst: frühe gute Teams und enge Schranken für die späteren Suffixe
+    order = np.argsort(-(scores.max(axis=1) + w_mean * scores.mean(axis=1) - w_expo * exposure), kind="stable")
+    suffix_max, min_exposure = _suffix_bounds(problem, order, size)
+    order_scores, order_exposure, order_types = scores[order], exposure[order], types[order]
+
+    best_members, best_score = (list(incumbent[0]), incumbent[1]) if incumbent else ([], -math.inf)
+    stats = {"nodes": 0, "pruned": 0, "leaves": 0, "optimal": True}
+
+    def search(pos: int, members: List[int], coverage: np.ndarray, expo: float, seen: np.ndarray, redundancy: int):
+        nonlocal best_members, best_score
+        stats["nodes"] += 1
+        if stats["nodes"] > max_nodes:
+            stats["optimal"] = False
+            return
+        remaining = size - len(members)
+        if remaining == 1:
+            new_coverage = np.maximum(coverage, order_scores[pos:])
+            values = _objective(new_coverage, expo + order_exposure[pos:],
+                                redundancy + (order_types[pos:] & seen).sum(axis=1), weights)
+            stats["leaves"] += len(values)
+            best = int(np.argmax(values))
+            if values[best] > best_score:
+                best_score = float(values[best])
+                # Positionen in der Suchreihenfolge -> Indizes in problem["names"]
+                best_members = sorted(order[members + [pos + best]].tolist())
+            return
+        for r in range(pos, n - remaining + 1):
+            new_coverage = np.maximum(coverage, order_scores[r])
+            new_expo = expo + float(order_exposure[r])
+            new_redundancy = redundancy + int((order_types[r] & seen).sum())
+            bound = _objective(np.maximum(new_coverage, suffix_max[r + 1]),
+                               new_expo + min_exposure[r + 1, remaining - 1], np.float64(new_redundancy), weights)
+            if bound <= best_score:
+                stats["pruned"] += 1
+                continue
+            search(r + 1, members + [r], new_coverage, new_expo, seen | order_types[r], new_redundancy)
+            if not stats["optimal"]:
+                return
+
+    if size > 0:
+        search(0, [], np.zeros(m), 0.0, np.zeros(types.shape[1], dtype=bool), 0)
+    return sorted(best_members), best_score, stats
+
+
+def optimize_team(problem: Dict[str, Any], size: int, weights: Sequence[float], beam_width: int = BEAM_WIDTH,
+                  exact_limit: int = EXACT_CANDIDATE_LIMIT, max_nodes: int = MAX_NODES) -> Dict[str, Any]:
+    """
+    Bestes Team der Größe size: zuerst Beam-Search (liefert die Startlösung), dann bei bis zu
+    exact_limit Kandidaten Branch-and-Bound. Für größere Boxen bleibt es beim Beam-Ergebnis.
+    """
+    n = len(problem["names"])
+    size = min(size, n)
+    stats = {"candidates": n, "size": size, "search_space": math.comb(n, size), "method": "beam",
+             "nodes": 0, "pruned": 0, "leaves": 0, "optimal": False}
+
+    start = time.perf_counter()
+    members, score = beam_search(problem, size, weights, beam_width)
+    stats["beam_score"] = score
+    stats["beam_seconds"] = time.perf_counter() - start
+
+    if n <= exact_limit:
+        start = time.perf_counter()
+        members, score, bnb_stats = branch_and_bound(problem, size, weights, (members, score), max_nodes)
+        stats.update(bnb_stats, method="branch-and-bound")
+        stats["bnb_seconds"] = time.perf_counter() - start
+
+    result = evaluate_team(problem, members, weights)
+    result["stats"] = stats
+    return result
+
+
+def print_report(problem: Dict[str, Any], result: Dict[str, Any]):
+    names, opponents, scores = problem["names"], problem["opponents"], problem["scores"]
+    stats = result["stats"]
+    print(f"\n=== Bestes Team ({stats['size']} aus {stats['candidates']}) — Team-Score: {result['score']:.3f} ===")
+    for i in result["members"]:
+        types = "/".join(t for t, has in zip(problem["type_names"], problem["types"][i]) if has)
+        print(f" - {names[i]} ({types}) — Exposure: {problem['exposure'][i]:.3f}")
+    print(f"   | schlechteste Abdeckung: {result['coverage'].min():.2f}, "
+          f"mittlere Abdeckung: {result['coverage'].mean():.2f}")
+    print(f"   | Exposure gesamt: {result['exposure']:.3f}, Typ-Dopplungen: {result['redundancy']}")
+
+    print("\n=== Abdeckung pro Gegner ===")
+    for j, opp_name in enumerate(opponents):
+        best = max(result["members"], key=lambda i: scores[i, j])
+        print(f" - {opp_name}: {names[best]} ({scores[best, j]:.2f})")
+
+    print("\n=== Suche ===")
+    print(f" - Methode: {stats['method']}{'' if stats['optimal'] else ' (nicht bewiesen optimal)'}")
+    print(f" - Suchraum: {stats['search_space']:,} Teams")
+    print(f" - Beam-Search: Score {stats['beam_score']:.3f} in {stats['beam_seconds'] * 1000:.1f} ms")
+    if stats["method"] == "branch-and-bound":
+        print(f" - Branch-and-Bound: {stats['nodes']:,} Knoten, {stats['pruned']:,} verworfene Äste, "
+              f"{stats['leaves']:,} bewertete Teams in {stats['bnb_seconds']:.2f}s")
+
+
+def run(size: int, beam_width: int = BEAM_WIDTH, exact_limit: int = EXACT_CANDIDATE_LIMIT,
+        max_nodes: int = MAX_NODES, full: bool = False):
+    opponent_team, owned_list, fight_level = counter_analysis.prepare_fight()
+    with negative_cache.offline_mode():
+        state = counter_analysis.update_analysis_state(opponent_team, owned_list, fight_level, full)
+        if state is None:
+            return
+        problem = build_problem(state, owned_list, incremental_analysis.get_opponent_names(opponent_team))
+
+    result = optimize_team(problem, size, get_team_weights(), beam_width, exact_limit, max_nodes)
+    print_report(problem, result)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Sucht das beste Team aus owned_pokemon_list gegen das gegnerische Team.")
+    ap.add_argument("--size", type=int, default=global_infos.team_size, help="Teamgröße.")
+    ap.add_argument("--beam-width", type=int, default=BEAM_WIDTH, help="Breite der Beam-Search (1 = greedy).")
+    ap.add_argument("--exact-limit", type=int, default=EXACT_CANDIDATE_LIMIT,
+                    help="Bis zu so vielen eigenen Pokémon exakt per Branch-and-Bound suchen.")
+    ap.add_argument("--max-nodes", type=int, default=MAX_NODES, help="Knoten-Limit für Branch-and-Bound.")
+    ap.add_argument("--full", action="store_true", help="Analyse-Zustand neu berechnen.")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    run(args.size, args.beam_width, args.exact_limit, args.max_nodes, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import counter_search  # noqa: E402
+import global_infos  # noqa: E402
+import negative_cache  # noqa: E402
+
+# Fester Seed: jeder Lauf prüft dieselben Zufallsprobleme
+SEED = 0
+# Toleranz beim Vergleich von Scores (Summationsreihenfolge)
+SCORE_EPS = 1e-9
+
+# Zustandsdateien, die die Module schreiben; in den Tests landen sie im tmp-Verzeichnis
+STATE_FILES = ["NEGATIVE_CACHE_FILE_PATH", "MATCHUP_MEMO_FILE_PATH", "ANALYSIS_STATE_FILE_PATH",
+               "FEATURE_STORE_FILE_PATH"]
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(SEED)
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Zustandsdateien ins tmp-Verzeichnis, damit kein Test information_storage verändert."""
+    for name in STATE_FILES:
+        monkeypatch.setattr(global_infos, name, str(tmp_path / os.path.basename(getattr(global_infos, name))))
+
+
+@pytest.fixture
+def dex() -> Iterator[List[str]]:
+    """Alle Pokémon aus dem lokalen Cache; die Tests mit Cache-Daten laufen offline."""
+    names = counter_search.get_dex_names()
+    if len(names) < 2:
+        pytest.skip("pokemon_knowledge_cache.json fehlt oder ist leer")
+    with negative_cache.offline_mode():
+        yield names
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import campaign
+import compiled_snapshot
+import counter_search
+from conftest import SCORE_EPS
+
+TRIALS = 30
+POOL = 60
+
+
+def full_ranking(snapshot: dict, k: int, weights) -> list:
+    """Top-k pro Gegner-Slot aus der vollen Schadensmatrix (jeder Kandidat exakt bewertet)."""
+    w_dmg, w_surv, _, w_expo = weights
+    movesets = snapshot["owned_moveset"][0]
+    lo, hi = snapshot["fight_offsets"][0], snapshot["fight_offsets"][1]
+    incoming = counter_search.incoming_damage(snapshot)
+    counters = []
+    for j, slot in enumerate(range(lo, hi)):
+        defender = np.array([snapshot["slot_pokemon"][slot]])
+        ranked = []
+        for i in range(len(snapshot["owned_pokemon"])):
+            damage, move = compiled_snapshot.best_damage(snapshot, movesets[i], defender)
+            score = w_dmg * float(damage[0]) - w_surv * incoming[i, j] - w_expo * incoming[i].mean()
+            ranked.append((-score, i, int(move[0])))
+        counters.append([(i, -neg_score, move) for neg_score, i, move in sorted(ranked)[:k]])
+    return counters
+
+
+def test_top_counters_match_full_ranking(rng, dex):
+    fights = [fight for fight in campaign.select_fights(all_starters=True) if fight.get("team")]
+    checked = 0
+    for trial in range(TRIALS):
+        candidates = [dex[i] for i in rng.choice(len(dex), size=min(POOL, len(dex)), replace=False)]
+        snapshot = compiled_snapshot.build_snapshot(candidates, [fights[int(rng.integers(len(fights)))]])
+        if not snapshot["fights"][0]["opponents"]:
+            continue
+        k = int(rng.integers(1, 6))
+        weights = (rng.integers(0, 5, size=4) / 4.0).tolist()
+        result = counter_search.top_counters(snapshot, k, weights)
+        checked += 1
+        for slot, (expected, actual) in enumerate(zip(full_ranking(snapshot, k, weights), result["counters"])):
+            scores = [score for _, score, _ in expected]
+            assert scores == pytest.approx([c[1] for c in actual], abs=SCORE_EPS), f"Versuch {trial}, Slot {slot}"
+            # bei Gleichstand ist die Reihenfolge gleich guter Kandidaten frei
+            if all(b - a > SCORE_EPS for a, b in zip(scores[1:], scores)):
+                assert [(i, move) for i, _, move in expected] == [(c[0], c[3]) for c in actual], \
+                    f"Versuch {trial}, Slot {slot}"
+        assert len(result["counters"]) == len(snapshot["fights"][0]["opponents"])
+    assert checked, "kein Kampf mit gecachten Gegnern gezogen"
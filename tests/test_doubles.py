@@ -0,0 +1,98 @@
+import itertools
+from typing import Any, Dict, List
+
+import numpy as np
+
+import cache_files
+import compiled_snapshot
+import doubles
+import global_infos
+import info_manager
+from conftest import SCORE_EPS
+
+SYNTHETIC_TRIALS = 2000
+CACHE_TRIALS = 30
+POOL = 40
+
+
+def random_features(rng: np.random.Generator, n: int) -> tuple:
+    """
+    Merkmale im Format von own_features/opponent_threats mit kleinen ganzzahligen Werten
+    (viele Dominanzen und Gleichstände); threat wird wie in opponent_threats aus den
+    Attacken-Tabellen beider Gegner gebildet.
+    """
+    single = rng.integers(0, 4, size=(n, 2)).astype(float)
+    reach = single + rng.integers(0, 2, size=(n, 2)) * (rng.random((n, 1)) < 0.2)
+    ally_value = rng.integers(0, 6, size=(n, n)) * (rng.random((n, 1)) < 0.2)
+    np.fill_diagonal(ally_value, 0)
+    own = {"single": single, "reach": reach, "foe_spread": rng.integers(0, 5, size=n).astype(float),
+           "ally_value": ally_value.astype(float)}
+    threat, received = np.zeros((n, n)), []
+    for _ in range(2):
+        table = rng.integers(0, 3, size=(int(rng.integers(1, 4)), n)).astype(float)
+        spread = rng.random(len(table)) < 0.3
+        threat += np.where(spread[:, None, None], table[:, :, None] + table[:, None, :],
+                           np.maximum(table[:, :, None], table[:, None, :])).max(axis=0)
+        received.append(table.T)
+    return own, {"threat": threat, "received": np.hstack(received)}
+
+
+def random_fight(rng: np.random.Generator, dex: List[str], attacks: List[str]) -> Dict[str, Any]:
+    """Zufälliger Gegner aus dem Cache (fight_data.json hat kaum gecachte Gegner-Paare)."""
+    team = []
+    for i in rng.choice(len(dex), size=int(rng.integers(2, 7)), replace=False).tolist():
+        moves = [attacks[m] for m in rng.choice(len(attacks), size=4, replace=False).tolist()]
+        team.append({"id": info_manager.get_pokemon_in_cache(dex[i])["ID"], "level": int(rng.integers(5, 101)),
+                     "moves": moves})
+    return {"trainer_name": "Zufall", "location": "", "team": team}
+
+
+def ranking(score: np.ndarray, members: np.ndarray, top: int) -> List[tuple]:
+    """Top-Paare (Score, Paar) aus einer Score-Matrix über members."""
+    ranked = sorted((-score[a, b], int(members[a]), int(members[b]))
+                    for a, b in itertools.combinations(range(len(members)), 2))[:top]
+    return [(-neg_score, (a, b)) for neg_score, a, b in ranked]
+
+
+def assert_same_ranking(expected: List[tuple], actual: List[tuple], context: str):
+    """Gleiche Scores in gleicher Reihenfolge; die Paare nur dort, wo der Score eindeutig ist."""
+    assert len(expected) == len(actual), context
+    scores = [score for score, _ in expected]
+    for r, ((score, pair), (other_score, other_pair)) in enumerate(zip(expected, actual)):
+        assert abs(score - other_score) <= SCORE_EPS, f"{context}, Rang {r + 1}"
+        if all(abs(score - s) > SCORE_EPS for q, s in enumerate(scores) if q != r):
+            assert pair == other_pair, f"{context}, Rang {r + 1}"
+
+
+def test_dominance_pruning_keeps_top_pairs(rng):
+    for trial in range(SYNTHETIC_TRIALS):
+        n, top = int(rng.integers(2, 16)), int(rng.integers(1, 16))
+        weights = (rng.integers(0, 9, size=4) / 4.0).tolist()
+        own, opp = random_features(rng, n)
+        members = np.flatnonzero(~doubles.dominated(own, opp, top))
+        assert_same_ranking(ranking(doubles.pair_scores(own, opp, np.arange(n), weights)["score"], np.arange(n), top),
+                            ranking(doubles.pair_scores(own, opp, members, weights)["score"], members, top),
+                            f"Versuch {trial}")
+
+
+def test_rank_pairs_matches_all_pairs(rng, dex):
+    attacks = sorted(name for name, attack in (cache_files.load_json_cached(global_infos.ATTACK_CACHE_FILE_PATH, {}) or {}).items()
+                     if attack and attack.get("Stärke"))
+    checked = 0
+    for trial in range(CACHE_TRIALS):
+        candidates = [dex[i] for i in rng.choice(len(dex), size=min(POOL, len(dex)), replace=False)]
+        snapshot = compiled_snapshot.build_snapshot(candidates, [random_fight(rng, dex, attacks)])
+        n = len(snapshot["owned_pokemon"])
+        pairs = doubles.opponent_pairs(len(snapshot["fights"][0]["opponents"]))
+        if n < 2 or not pairs:
+            continue
+        pair = pairs[int(rng.integers(len(pairs)))]
+        top = int(rng.integers(1, 16))
+        weights = (rng.integers(0, 5, size=4) / 4.0).tolist()
+        own = doubles.own_features(snapshot, 0, pair)
+        opp = doubles.opponent_threats(snapshot, 0, pair)
+        expected = ranking(doubles.pair_scores(own, opp, np.arange(n), weights)["score"], np.arange(n), top)
+        actual = [(entry["score"], entry["pair"]) for entry in doubles.rank_pairs(snapshot, 0, pair, weights, top)["ranked"]]
+        assert_same_ranking(expected, actual, f"Versuch {trial}, Gegner-Paar {pair}")
+        checked += 1
+    assert checked, "kein Gegner-Paar aus dem Cache gezogen"
@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import gauntlet_planner
+import team_optimizer
+from conftest import SCORE_EPS
+
+TRIALS = 200
+
+
+def all_masks(n: int, size: int) -> list:
+    return [gauntlet_planner.team_mask(team) for team in itertools.combinations(range(n), size)]
+
+
+def brute_force(values: np.ndarray, allowed: np.ndarray) -> tuple:
+    """(Worst-Case, Summe) des besten Plans über alle erlaubten Zustandsfolgen."""
+    fights, states = values.shape
+    best = (-np.inf, -np.inf)
+    for path in itertools.product(range(states), repeat=fights):
+        if all(allowed[path[k], path[k - 1]] for k in range(1, fights)):
+            plan = values[np.arange(fights), path]
+            best = max(best, (float(plan.min()), float(plan.sum())))
+    return best
+
+
+def test_transitions_count_swaps(rng):
+    for _ in range(TRIALS):
+        n = int(rng.integers(3, 6))
+        size = int(rng.integers(1, n))
+        max_swaps = int(rng.integers(0, size + 1))
+        masks = all_masks(n, size)
+        expected = np.array([[bin(a & ~b).count("1") <= max_swaps for b in masks] for a in masks])
+        np.testing.assert_array_equal(gauntlet_planner.transitions(masks, n, size, max_swaps), expected)
+
+
+def test_solve_matches_brute_force(rng):
+    for trial in range(TRIALS):
+        n = int(rng.integers(3, 6))
+        size = int(rng.integers(1, n))
+        fights = int(rng.integers(1, 5))
+        max_swaps = int(rng.integers(-1, size + 1))
+        masks = all_masks(n, size)
+        allowed = gauntlet_planner.transitions(masks, n, size, None if max_swaps < 0 else max_swaps)
+        # ganzzahlige Werte, damit Gleichstände im Worst-Case (und damit die zweite Phase) vorkommen
+        values = rng.integers(0, 6, size=(fights, len(masks))).astype(float)
+        plan = gauntlet_planner.solve(values, allowed)
+        path = plan["path"]
+        plan_values = values[np.arange(fights), path]
+        context = f"Versuch {trial}: n={n}, Teamgröße {size}, {fights} Kämpfe, Tausche {max_swaps}"
+        assert all(allowed[path[k], path[k - 1]] for k in range(1, fights)), context
+        assert (float(plan_values.min()), float(plan_values.sum())) == (plan["worst"], plan["total"]), context
+        assert (plan["worst"], plan["total"]) == brute_force(values, allowed), context
+
+
+def test_plan_gauntlet_respects_swaps(rng):
+    for trial in range(20):
+        n, size, fights = int(rng.integers(4, 9)), int(rng.integers(1, 4)), int(rng.integers(2, 5))
+        max_swaps = int(rng.integers(0, size + 1))
+        problems = [{"names": [f"P{i}" for i in range(n)], "opponents": ["G0", "G1", "G2"],
+                     "scores": rng.integers(0, 8, size=(n, 3)) / 4.0, "exposure": rng.integers(0, 5, size=n) / 4.0,
+                     "types": rng.random((n, 4)) < 0.3, "type_names": ["T0", "T1", "T2", "T3"]}
+                    for _ in range(fights)]
+        weights = [0.25, 1.0, 0.5]
+        plan = gauntlet_planner.plan_gauntlet(problems, size, weights, max_swaps, time_limit=5.0, beam_width=4)
+        context = f"Versuch {trial}"
+        assert plan["worst"] >= plan["greedy"] - SCORE_EPS, context
+        assert plan["worst"] == pytest.approx(min(plan["values"]), abs=SCORE_EPS), context
+        for problem, team, value in zip(problems, plan["teams"], plan["values"]):
+            assert len(team) == size, context
+            assert team_optimizer.evaluate_team(problem, team, weights)["score"] == pytest.approx(value, abs=SCORE_EPS)
+        for before, after in zip(plan["teams"], plan["teams"][1:]):
+            assert len(set(after) - set(before)) <= max_swaps, context
@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import moveset_optimizer
+from conftest import SCORE_EPS
+
+TRIALS = 1000
+
+
+def moveset_key(damage: np.ndarray, weights: np.ndarray, moves, cover_share: float) -> tuple:
+    """(abgedeckte Ziele, Schadens-Abdeckung) eines Movesets, direkt nach der Definition in best_moveset."""
+    best = damage.max(axis=0)
+    reachable = best > 0.0
+    if not moves or not reachable.any():
+        return 0, 0.0
+    share = np.where(reachable, damage[list(moves)] / np.where(reachable, best, 1.0), 0.0).max(axis=0)
+    total = weights[reachable].sum()
+    coverage = float((share * np.where(reachable, weights, 0.0)).sum() / total) if total > 0.0 else 0.0
+    return int((share >= cover_share).sum()), coverage
+
+
+def brute_force(damage: np.ndarray, weights: np.ndarray, size: int, cover_share: float) -> tuple:
+    """Bester Schlüssel über alle Movesets mit höchstens size Attacken."""
+    best = (0, 0.0)
+    for k in range(1, min(size, len(damage)) + 1):
+        for moves in itertools.combinations(range(len(damage)), k):
+            key = moveset_key(damage, weights, moves, cover_share)
+            if key[0] > best[0] or (key[0] == best[0] and key[1] > best[1]):
+                best = key
+    return best
+
+
+def test_best_moveset_matches_brute_force(rng):
+    for trial in range(TRIALS):
+        # ganzzahlige Schäden und Nullzeilen/-gewichte: Dominanz und Gleichstände kommen oft vor
+        moves, targets = int(rng.integers(1, 13)), int(rng.integers(1, 9))
+        damage = rng.integers(0, 5, size=(moves, targets)).astype(float)
+        damage[rng.random(moves) < 0.15] = 0.0
+        weights = rng.integers(0, 4, size=targets).astype(float)
+        size = int(rng.integers(1, 5))
+        cover_share = float(rng.choice([0.5, 0.75, 1.0]))
+
+        result = moveset_optimizer.best_moveset(damage, weights, size, cover_share)
+        covered, coverage = brute_force(damage, weights, size, cover_share)
+        actual = moveset_key(damage, weights, result["moves"], cover_share)
+        context = f"Versuch {trial}: {moves} Attacken, {targets} Ziele, Größe {size}, Anteil {cover_share}"
+        assert len(set(result["moves"])) == len(result["moves"]) <= size, context
+        assert actual[0] == result["covered"] == covered, context
+        assert actual[1] == pytest.approx(result["coverage"], abs=SCORE_EPS), context
+        assert actual[1] == pytest.approx(coverage, abs=SCORE_EPS), context
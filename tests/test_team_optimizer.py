@@ -0,0 +1,62 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import team_optimizer
+from conftest import SCORE_EPS
+
+TRIALS = 300
+
+
+def random_problem(rng: np.random.Generator) -> dict:
+    """Kleines Team-Problem im Format von team_optimizer.make_problem (ohne Cache-Zugriff)."""
+    n, m, type_count = int(rng.integers(2, 11)), int(rng.integers(1, 7)), int(rng.integers(2, 6))
+    types = np.zeros((n, type_count), dtype=bool)
+    for i in range(n):
+        types[i, rng.choice(type_count, size=int(rng.integers(1, 3)), replace=False)] = True
+    return {
+        "names": [f"P{i}" for i in range(n)],
+        "opponents": [f"G{j}" for j in range(m)],
+        "scores": rng.integers(0, 8, size=(n, m)) / 4.0,
+        "exposure": rng.integers(0, 5, size=n) / 4.0,
+        "types": types,
+        "type_names": [f"T{t}" for t in range(type_count)],
+    }
+
+
+def brute_force(problem: dict, size: int, weights) -> float:
+    """Bester Team-Score über alle Teams der Größe size."""
+    return max(team_optimizer.evaluate_team(problem, team, weights)["score"]
+               for team in itertools.combinations(range(len(problem["names"])), size))
+
+
+def test_team_search_matches_brute_force(rng):
+    for trial in range(TRIALS):
+        problem = random_problem(rng)
+        n = len(problem["names"])
+        size = int(rng.integers(1, min(n, 6) + 1))
+        weights = rng.integers(0, 5, size=3) / 4.0
+        expected = brute_force(problem, size, weights)
+
+        beam = team_optimizer.beam_search(problem, size, weights, 2)
+        optimized = team_optimizer.optimize_team(problem, size, weights, beam_width=2)
+        results = {
+            "branch_and_bound": team_optimizer.branch_and_bound(problem, size, weights)[:2],
+            "branch_and_bound mit Startlösung": team_optimizer.branch_and_bound(problem, size, weights, beam)[:2],
+            "optimize_team": (optimized["members"], optimized["score"]),
+        }
+        for method, (members, score) in results.items():
+            assert len(set(members)) == size, f"Versuch {trial}, {method}: Team {members}"
+            assert team_optimizer.evaluate_team(problem, members, weights)["score"] == pytest.approx(score, abs=SCORE_EPS)
+            assert score == pytest.approx(expected, abs=SCORE_EPS), f"Versuch {trial}, {method}"
+
+
+def test_team_values_matches_evaluate_team(rng):
+    for _ in range(50):
+        problem = random_problem(rng)
+        size = int(rng.integers(1, len(problem["names"]) + 1))
+        weights = rng.integers(0, 5, size=3) / 4.0
+        teams = np.array(list(itertools.combinations(range(len(problem["names"])), size)))
+        single = [team_optimizer.evaluate_team(problem, team, weights)["score"] for team in teams]
+        np.testing.assert_allclose(team_optimizer.team_values(problem, teams, weights), single, rtol=0.0, atol=SCORE_EPS)
@@ -1,7 +1,16 @@
+import hashlib
 import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import cache_files
 import global_infos
 
-def load_type_effectiveness_data(filename="information_storage/pokemon_type_effectiveness.json"):
+# Bitmasken-Engine (get_type_masks): Bits über die Typ-Kombinationen in der Reihenfolge der
+# Type Chart (171 Bits) bzw. über die Angriffstypen in der Reihenfolge von global_infos.pokemon_types
+_masks: Optional[Dict[str, Any]] = None
+_masks_chart = None
+
+def load_type_effectiveness_data(filename=global_infos.TYPE_CHART_FILE_PATH):
     """
     Lädt die Typen-Effektivitätstabelle aus einer JSON-Datei.
 
@@ -48,8 +57,18 @@ def get_effectiveness_from_type_chart(type_chart, attack_type, defense_types):
     except (TypeError, ValueError):
         raise ValueError(f"Ungültiger Effektivitätswert für Schlüssel '{key}'")
 
+def get_type_chart():
+    """Die Type Chart aus global_infos.TYPE_CHART_FILE_PATH (im Speicher gehalten, nicht verändern!)."""
+    return cache_files.load_json_cached(global_infos.TYPE_CHART_FILE_PATH)
+
+def get_type_chart_version():
+    """Hash über den Inhalt der Type Chart; ändert sich, sobald die Tabelle neu generiert wird."""
+    chart = get_type_chart()
+    payload = json.dumps(chart, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
 def get_effectiveness(attack_type, defense_types):
-    return float(get_effectiveness_from_type_chart(load_type_effectiveness_data(), attack_type, defense_types))
+    return float(get_effectiveness_from_type_chart(get_type_chart(), attack_type, defense_types))
 
 def get_type_matchups(type_chart, defense_types, filter_mode=None):
     """
@@ -81,3 +100,148 @@ def get_type_matchups(type_chart, defense_types, filter_mode=None):
         result[attack_type] = eff
 
     return dict(sorted(result.items(), key=lambda x: x[1], reverse=True))  # Höchste Effektivität zuerst
+
+def combo_key(defense_types: Sequence[str]) -> str:
+    """Schlüssel einer Typ-Kombination in der Type Chart ("Feuer, None" bzw. alphabetisch "Boden, Feuer")."""
+    types = list(defense_types)
+    if len(types) == 2 and types[0] == types[1]:
+        types = types[:1]
+    return f"{types[0]}, None" if len(types) == 1 else ", ".join(sorted(types))
+
+def combo_types(key: str) -> List[str]:
+    """Umkehrung von combo_key."""
+    return [typ for typ in key.split(", ") if typ != "None"]
+
+def build_type_masks(type_chart) -> Dict[str, Any]:
+    """
+    Rechnet die Type Chart einmal in Bitmasken um (Python-ints).
+
+    Returns:
+        Dict mit
+        - "types", "combos": Bit-Reihenfolge der Angriffstypen bzw. Typ-Kombinationen
+        - "all_combos": Maske mit allen Kombinationen
+        - "super_effective": Angriffstyp -> Kombinationen, die er sehr effektiv trifft
+        - "groups": pro Kombination (als Verteidiger) Multiplikator -> Angriffstypen
+        - "resists" / "immune" / "weak": pro Kombination die Angriffstypen mit < 1 / 0 / > 1
+        - "combo_attack_types": pro Kombination ihre eigenen Typen (als Angreifer, STAB)
+        - "resists_combo": pro Kombination die Kombinationen, deren Typen sie alle resistiert
+    """
+    types = list(global_infos.pokemon_types)
+    combos = list(type_chart[types[0]])
+    type_bits = {typ: 1 << t for t, typ in enumerate(types)}
+
+    super_effective = {typ: 0 for typ in types}
+    groups: List[Dict[float, int]] = [{} for _ in combos]
+    for typ in types:
+        for c, key in enumerate(combos):
+            eff = float(type_chart[typ][key])
+            if eff >= 2.0:
+                super_effective[typ] |= 1 << c
+            groups[c][eff] = groups[c].get(eff, 0) | type_bits[typ]
+
+    def collect(group: Dict[float, int], condition) -> int:
+        mask = 0
+        for eff, types_mask in group.items():
+            if condition(eff):
+                mask |= types_mask
+        return mask
+
+    resists = [collect(group, lambda eff: eff < 1.0) for group in groups]
+    combo_attack_types = [sum(type_bits.get(typ, 0) for typ in combo_types(key)) for key in combos]
+    resists_combo = []
+    for resisted in resists:
+        mask = 0
+        for c, attack_types in enumerate(combo_attack_types):
+            if attack_types & ~resisted == 0:
+                mask |= 1 << c
+        resists_combo.append(mask)
+
+    return {
+        "types": types,
+        "combos": combos,
+        "combo_index": {key: c for c, key in enumerate(combos)},
+        "all_combos": (1 << len(combos)) - 1,
+        "super_effective": super_effective,
+        "groups": groups,
+        "resists": resists,
+        "immune": [collect(group, lambda eff: eff == 0.0) for group in groups],
+        "weak": [collect(group, lambda eff: eff > 1.0) for group in groups],
+        "combo_attack_types": combo_attack_types,
+        "resists_combo": resists_combo,
+    }
+
+def get_type_masks() -> Dict[str, Any]:
+    """Die Bitmasken zur aktuellen Type Chart (neu gebaut, sobald sich die Datei ändert)."""
+    global _masks, _masks_chart
+    chart = get_type_chart()
+    if _masks is None or chart is not _masks_chart:
+        _masks = build_type_masks(chart)
+        _masks_chart = chart
+    return _masks
+
+def _combo_bit(masks: Dict[str, Any], defense_types: Sequence[str]) -> Optional[int]:
+    return masks["combo_index"].get(combo_key(defense_types)) if defense_types else None
+
+def _super_effective(masks: Dict[str, Any], move_types: Iterable[Optional[str]]) -> int:
+    mask = 0
+    for typ in move_types:
+        mask |= masks["super_effective"].get(typ, 0)
+    return mask
+
+def super_effective_mask(move_types: Iterable[Optional[str]]) -> int:
+    """Typ-Kombinationen, die mindestens eine der Attacken-Typen sehr effektiv trifft."""
+    return _super_effective(get_type_masks(), move_types)
+
+def team_coverage(members_move_types: Iterable[Iterable[Optional[str]]]) -> int:
+    """Typ-Kombinationen, die irgendein Teammitglied sehr effektiv trifft (OR über die Mitglieder)."""
+    masks = get_type_masks()
+    mask = 0
+    for move_types in members_move_types:
+        mask |= _super_effective(masks, move_types)
+    return mask
+
+def resist_mask(defense_types: Sequence[str]) -> int:
+    """Angriffstypen, die ein Pokémon mit diesen Typen resistiert (inklusive Immunitäten)."""
+    masks = get_type_masks()
+    c = _combo_bit(masks, defense_types)
+    return masks["resists"][c] if c is not None else 0
+
+def types_mask(attack_types: Iterable[Optional[str]]) -> int:
+    """Angriffstypen als Bitmaske (unbekannte Typen fallen weg)."""
+    types = get_type_masks()["types"]
+    mask = 0
+    for typ in attack_types:
+        if typ in types:
+            mask |= 1 << types.index(typ)
+    return mask
+
+def team_resisted_combos(members_types: Iterable[Sequence[str]]) -> int:
+    """Typ-Kombinationen, deren Typen (als STAB-Attacken) mindestens ein Teammitglied alle resistiert."""
+    masks = get_type_masks()
+    mask = 0
+    for defense_types in members_types:
+        c = _combo_bit(masks, defense_types)
+        if c is not None:
+            mask |= masks["resists_combo"][c]
+    return mask
+
+def combo_bit(defense_types: Sequence[str]) -> int:
+    """Bitmaske einer einzelnen Typ-Kombination (0, wenn es sie in der Type Chart nicht gibt)."""
+    c = _combo_bit(get_type_masks(), defense_types)
+    return 1 << c if c is not None else 0
+
+def mask_to_combos(mask: int) -> List[str]:
+    """Schlüssel der Typ-Kombinationen einer Maske."""
+    return [key for c, key in enumerate(get_type_masks()["combos"]) if mask >> c & 1]
+
+def mask_to_types(mask: int) -> List[str]:
+    """Angriffstypen einer Maske."""
+    return [typ for t, typ in enumerate(get_type_masks()["types"]) if mask >> t & 1]
+
+def effectiveness_groups(defense_types: Sequence[str]) -> Dict[float, List[str]]:
+    """Angriffstypen gruppiert nach Multiplikator gegen diese Typen (wie get_type_matchups, über die Masken)."""
+    masks = get_type_masks()
+    c = _combo_bit(masks, defense_types)
+    if c is None:
+        return {}
+    return {eff: mask_to_types(types_mask) for eff, types_mask in masks["groups"][c].items()}